@@ -0,0 +1,54 @@
+import secrets
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import PlainTextResponse, Response
+from app.core import profile_capture
+
+router = APIRouter()
+
+def require_admin_token(x_admin_token: str = Header(None)):
+    # Users have no real authentication yet: the capture is gated by a shared
+    # token (PROFILING_ADMIN_TOKEN), and hidden when none is configured
+    if not profile_capture.ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, profile_capture.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+@router.get("/capture", dependencies=[Depends(require_admin_token)], include_in_schema=False)
+async def capture_profile(
+    mode: str = profile_capture.SAMPLE,
+    seconds: float = 10,
+    path: str = None,
+    requests: int = None,
+    interval_ms: float = None,
+    idle: bool = False,
+):
+    """
+    Profiles this API process for `seconds`, or only the requests whose path
+    starts with `path`, until `requests` of them are done. Answers when the
+    capture ends: collapsed stacks (mode=sample, idle=true to keep the threads
+    waiting for work) or a pstats dump (mode=cprofile).
+    """
+    if mode not in profile_capture.MODES:
+        raise HTTPException(status_code=400, detail=f"mode must be one of {', '.join(profile_capture.MODES)}")
+    if not 0 < seconds <= profile_capture.MAX_SECONDS:
+        raise HTTPException(status_code=400, detail=f"seconds must be between 0 and {profile_capture.MAX_SECONDS:g}")
+    if requests is not None and requests < 1:
+        raise HTTPException(status_code=400, detail="requests must be positive")
+    interval = interval_ms / 1000 if interval_ms else profile_capture.SAMPLE_INTERVAL
+    if interval < 0.001:
+        raise HTTPException(status_code=400, detail="interval_ms must be at least 1")
+
+    try:
+        capture = await profile_capture.run_capture(mode, seconds, path, requests, interval, idle)
+    except profile_capture.CaptureBusy:
+        raise HTTPException(status_code=409, detail="A capture is already running in this process")
+
+    headers = {"X-Profile-Requests": str(capture.matched)}
+    if mode == profile_capture.SAMPLE:
+        headers.update({
+            "X-Profile-Samples": str(capture.samples),
+            "Content-Disposition": "attachment; filename=profile.folded",
+        })
+        return PlainTextResponse(capture.collapsed(), headers=headers)
+    headers["Content-Disposition"] = "attachment; filename=profile.pstats"
+    return Response(capture.pstats_dump(), media_type="application/octet-stream", headers=headers)
@@ -1,123 +1,48 @@
 from fastapi import APIRouter, HTTPException, Depends
-from fastapi.responses import Response, StreamingResponse
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from app.services.pdf_generator import PDFGenerator
-from app.core.database import get_db
-from app.models import db_models
-import io
+from fastapi.responses import Response, StreamingResponse, FileResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.services.pdf_cache import cache_key, pdf_cache
+from app.services.pdf_pool import render_report_card
+from app.services.zip_stream import stream_zip
+from app.services.results import get_student_result, get_leaderboard
+from app.services.bulletins import build_student_data, class_render_jobs, render_class_bulletins, render_class_pdf
+from app.core.database import get_async_db
+from app.core.metrics import BULK_ZIP_BYTES
+from app.models import db_models, schemas
+from app.services import bulletin_jobs
+import logging
 import zipfile
 
 router = APIRouter()
-pdf_gen = PDFGenerator()
 
-def calculate_averages(student_id: str, period_id: str, db: Session):
-    # Fetch all grades for this student and period
-    grades = db.query(db_models.Grade).filter(
-        db_models.Grade.student_id == student_id,
-        db_models.Grade.period_id == period_id
-    ).all()
-    
-    if not grades:
-        return None
+logger = logging.getLogger("edumanager.bulletins")
 
-    grades_data = []
-    total_points = 0
-    total_coef = 0
-
-    for grade in grades:
-        # Calculate subject average: (Interro*1 + Devoir*1 + Compo*2) / 4 ?? 
-        # or (Interro*0.25 + Devoir*0.25 + Compo*0.5)? 
-        # The prompt mentioned 25%, 25%, 50% which sums to 1. So it's weighted average.
-        
-        # Check for missing values, treat as 0 or skip? usually 0 if registered.
-        i = grade.interro_avg or 0
-        d = grade.devoir_avg or 0
-        c = grade.compo_grade or 0
-        
-        average = (i * 0.25) + (d * 0.25) + (c * 0.5)
-        
-        # Get subject info for coefficient
-        subject = db.query(db_models.Subject).get(grade.subject_id)
-        if not subject:
-            continue
-            
-        # Mock coefficient if not in DB (Subject model might not have it yet)
-        # Using a default of 2 for now
-        coef = getattr(subject, 'coefficient', 2) 
-        
-        grades_data.append({
-            'subject': subject.name,
-            'coef': coef,
-            'interro': i,
-            'devoir': d,
-            'compo': c,
-            'moyenne': average,
-            'appreciation': 'Passable' if average >= 10 else 'Faible' # Simple logic
-        })
-        
-        total_points += average * coef
-        total_coef += coef
-
-    general_avg = total_points / total_coef if total_coef > 0 else 0
-    
-    return {
-        'grades_data': grades_data,
-        'general_avg': general_avg
-    }
-
-def get_class_rank(student_id: str, class_id: str, period_id: str, db: Session):
-    # This is expensive, calculating for everyone. In prod, cache this.
-    # Get all students in class
-    enrollments = db.query(db_models.StudentEnrollment).filter(db_models.StudentEnrollment.class_id == class_id).all()
-    
-    averages = []
-    student_avg = 0
-    
-    for enrollment in enrollments:
-        stats = calculate_averages(enrollment.student_id, period_id, db)
-        if stats:
-            avg = stats['general_avg']
-            averages.append(avg)
-            if enrollment.student_id == student_id:
-                student_avg = avg
-    
-    averages.sort(reverse=True)
-    try:
-        rank = averages.index(student_avg) + 1
-        return f"{rank}e" if rank > 1 else "1er"
-    except ValueError:
-        return "-"
+@router.get("/ranking/{class_id}")
+async def get_class_ranking(class_id: str, period_id: str, db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(get_leaderboard, class_id, period_id)
 
 @router.get("/download-single/{student_id}")
-async def download_single_bulletin(student_id: str, period_id: str = "T1", db: Session = Depends(get_db)):
-    student = db.query(db_models.Student).get(student_id)
+async def download_single_bulletin(student_id: str, period_id: str = "T1", db: AsyncSession = Depends(get_async_db)):
+    student = await db.get(db_models.Student, student_id)
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
         
     # Get class info
-    enrollment = db.query(db_models.StudentEnrollment).filter(db_models.StudentEnrollment.student_id == student_id).first()
+    enrollment = (await db.execute(
+        select(db_models.StudentEnrollment).where(db_models.StudentEnrollment.student_id == student_id)
+    )).scalars().first()
     if not enrollment:
         raise HTTPException(status_code=404, detail="Student not enrolled in any class")
     
-    cls = db.query(db_models.Class).get(enrollment.class_id)
+    cls = await db.get(db_models.Class, enrollment.class_id)
     
-    # Calculate stats
-    stats = calculate_averages(student_id, period_id, db)
-    if not stats:
+    # Averages and rank are read from the materialized results layer
+    result = await db.run_sync(get_student_result, student_id, enrollment.class_id, period_id)
+    if not result:
         raise HTTPException(status_code=400, detail="No grades found for this period")
-        
-    rank = get_class_rank(student_id, enrollment.class_id, period_id, db)
     
-    student_data = {
-        'name': f"{student.first_name} {student.last_name}",
-        'matricule': student.registration_number,
-        'academic_year': '2023-2024', # TODO: Get from enrollment/academic year
-        'period': 'Trimestre 1' if period_id == 'T1' else period_id,
-        'class': cls.name if cls else "Unknown",
-        'rank': rank,
-        'general_avg': stats['general_avg']
-    }
+    student_data = build_student_data(student, cls, 'Trimestre 1' if period_id == 'T1' else period_id, result)
     
     school_info = {
         'name': 'Lycée Moderne de Tokoin', # Could fetch from Establishment table
@@ -126,7 +51,12 @@ async def download_single_bulletin(student_id: str, period_id: str = "T1", db: S
     }
 
     try:
-        pdf_content = pdf_gen.generate_report_card(student_data, stats['grades_data'], school_info)
+        key = cache_key(student_data, result['grades_data'], school_info)
+        pdf_content = await pdf_cache.get_async(enrollment.class_id, period_id, key)
+        if pdf_content is None:
+            # Rendered in the PDF pool, the event loop keeps serving other requests
+            pdf_content = await render_report_card(student_data, result['grades_data'], school_info)
+            await pdf_cache.put_async(enrollment.class_id, period_id, key, pdf_content)
         return Response(
             content=pdf_content,
             media_type="application/pdf",
@@ -136,46 +66,84 @@ async def download_single_bulletin(student_id: str, period_id: str = "T1", db: S
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/download-bulk/{class_id}")
-async def download_bulk_bulletins(class_id: str, period_id: str = "T1", db: Session = Depends(get_db)):
-    enrollments = db.query(db_models.StudentEnrollment).filter(db_models.StudentEnrollment.class_id == class_id).all()
-    if not enrollments:
-        raise HTTPException(status_code=404, detail="No students in this class")
-        
-    zip_buffer = io.BytesIO()
-    with zipfile.ZipFile(zip_buffer, "a", zipfile.ZIP_DEFLATED, False) as zip_file:
-         for enrollment in enrollments:
-            try:
-                # Reuse logic (refactor this ideally)
-                student = db.query(db_models.Student).get(enrollment.student_id)
-                stats = calculate_averages(student.id, period_id, db)
-                if not stats:
-                    continue # Skip students with no grades
-                
-                rank = get_class_rank(student.id, class_id, period_id, db)
-                
-                cls = db.query(db_models.Class).get(class_id)
-                
-                student_data = {
-                    'name': f"{student.first_name} {student.last_name}",
-                    'matricule': student.registration_number,
-                    'academic_year': '2023-2024',
-                    'period': period_id,
-                    'class': cls.name,
-                    'rank': rank,
-                    'general_avg': stats['general_avg']
-                }
-                
-                school_info = {'name': 'Lycée Moderne', 'address': 'Lomé', 'phone': ''}
-                
-                pdf_content = pdf_gen.generate_report_card(student_data, stats['grades_data'], school_info)
-                zip_file.writestr(f"bulletin_{student.registration_number}.pdf", pdf_content)
-            except Exception as e:
-                print(f"Error generating for {enrollment.student_id}: {e}")
+async def download_bulk_bulletins(class_id: str, period_id: str = "T1", output: str = "zip", compress: bool = False, db: AsyncSession = Depends(get_async_db)):
+    if output not in ("zip", "pdf"):
+        raise HTTPException(status_code=400, detail="output must be 'zip' or 'pdf'")
+
+    jobs = await db.run_sync(class_render_jobs, class_id, period_id)
+    if not jobs:
+        raise HTTPException(status_code=404, detail="No graded students in this class")
+    
+    if output == "pdf":
+        # One multi-page document for printing instead of a ZIP of small PDFs
+        try:
+            pdf_content = await render_class_pdf(class_id, period_id, jobs)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=str(e))
+        return Response(
+            content=pdf_content,
+            media_type="application/pdf",
+            headers={"Content-Disposition": f"attachment; filename=bulletins_{class_id}.pdf"}
+        )
+
+    async def rendered_entries():
+        # Each report card is sent as soon as it is read from the cache or rendered
+        async for student, pdf_content in render_class_bulletins(class_id, period_id, jobs):
+            if isinstance(pdf_content, Exception):
+                logger.error("Report card of student %s failed, left out of the archive: %r", student.id, pdf_content)
                 continue
+            yield f"bulletin_{student.registration_number}.pdf", pdf_content
 
-    zip_buffer.seek(0)
+    # PDFs are already compressed, deflate only on request
+    compression = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
     return StreamingResponse(
-        zip_buffer,
+        stream_zip(rendered_entries(), compression, on_complete=lambda size: BULK_ZIP_BYTES.observe(size, "download")),
         media_type="application/x-zip-compressed",
         headers={"Content-Disposition": f"attachment; filename=bulletins_{class_id}.zip"}
     )
+
+@router.post("/jobs")
+async def create_bulletin_job(job_data: schemas.BulletinJobCreate, db: AsyncSession = Depends(get_async_db)):
+    if job_data.scope not in bulletin_jobs.SCOPES:
+        raise HTTPException(status_code=400, detail=f"scope must be one of {', '.join(bulletin_jobs.SCOPES)}")
+    if job_data.scope == "class" and not job_data.class_id:
+        raise HTTPException(status_code=400, detail="class_id is required for a class job")
+    if job_data.scope != "class" and not job_data.establishment_id:
+        raise HTTPException(status_code=400, detail="establishment_id is required for this scope")
+    if job_data.scope == "level" and not job_data.level:
+        raise HTTPException(status_code=400, detail="level is required for a level job")
+
+    class_ids = await db.run_sync(
+        bulletin_jobs.resolve_class_ids, job_data.scope, job_data.establishment_id, job_data.class_id, job_data.level
+    )
+    if not class_ids:
+        raise HTTPException(status_code=404, detail="No classes found for this job")
+
+    label = job_data.class_id if job_data.scope == "class" else (job_data.level or job_data.establishment_id)
+    job = bulletin_jobs.submit_job(job_data.scope, job_data.period_id, class_ids, label)
+    return job.to_dict()
+
+@router.get("/jobs")
+async def list_bulletin_jobs():
+    return [job.to_dict() for job in bulletin_jobs.list_jobs()]
+
+@router.get("/jobs/{job_id}")
+async def get_bulletin_job(job_id: str):
+    job = bulletin_jobs.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+@router.get("/jobs/{job_id}/download")
+async def download_bulletin_job(job_id: str):
+    job = bulletin_jobs.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status != bulletin_jobs.DONE:
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+    # FileResponse honours Range headers, so interrupted downloads can resume
+    return FileResponse(
+        job.artifact_path,
+        media_type="application/x-zip-compressed",
+        filename=f"bulletins_{job.label}_{job.period_id}.zip"
+    )
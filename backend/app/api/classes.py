@@ -1,11 +1,37 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from app.core.database import get_db
+from fastapi import APIRouter, Depends, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db
+from app.core.data_versions import etag
+from app.core.listing import ListQuery
 from app.models import db_models
 
 router = APIRouter()
 
-@router.get("/")
-async def list_classes(db: Session = Depends(get_db)):
+CLASS_LIST = ListQuery(
+    fields={column.name: column for column in db_models.Class.__table__.columns},
+    search=[db_models.Class.name],
+    sortable=["name"],
+    default_sort="name",
+)
+
+@router.get("/", dependencies=[Depends(etag(db_models.Class))])
+async def list_classes(
+    response: Response,
+    establishment_id: str = None,
+    academic_year_id: str = None,
+    q: str = None,
+    sort: str = None,
+    fields: str = None,
+    cursor: str = None,
+    limit: int = None,
+    db: AsyncSession = Depends(get_async_db)
+):
     # You might want to define a schema for ClassResponse, but default ORM mode often works if simple
-    return db.query(db_models.Class).all()
+    where = []
+    if establishment_id:
+        where.append(db_models.Class.establishment_id == establishment_id)
+    if academic_year_id:
+        where.append(db_models.Class.academic_year_id == academic_year_id)
+    return await CLASS_LIST.respond(
+        db, response, where=where, q=q, sort=sort, fields=fields, cursor=cursor, limit=limit
+    )
@@ -1,40 +1,48 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from app.core.database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db
+from app.core.data_versions import etag
+from app.core.listing import ListQuery
 from app.models import db_models
+from app.services.stats import compute_stats, establishment_stats
 
 router = APIRouter()
 
+ESTABLISHMENT_LIST = ListQuery(
+    fields={column.name: column for column in db_models.Establishment.__table__.columns},
+    search=[db_models.Establishment.name, db_models.Establishment.address],
+    sortable=["name", "type"],
+    default_sort="name",
+)
+
+# Tables read by compute_stats
+STATS_TABLES = [
+    db_models.Student, db_models.Class, db_models.TeacherAssignment,
+    db_models.StudentEnrollment, db_models.Grade, db_models.Period,
+]
+
 @router.get("/stats")
-async def get_stats(establishment_id: str = None, db: Session = Depends(get_db)):
-    # Total Students
-    student_query = db.query(func.count(db_models.Student.id))
-    if establishment_id:
-        student_query = student_query.filter(db_models.Student.establishment_id == establishment_id)
-    total_students = student_query.scalar()
-    
-    # Total Teachers (Users with assignments)
-    teacher_query = db.query(func.count(func.distinct(db_models.TeacherAssignment.user_id)))
-    # Note: this is a simple approximation
-    total_teachers = teacher_query.scalar()
-    
-    # Total Classes
-    class_query = db.query(func.count(db_models.Class.id))
-    if establishment_id:
-        class_query = class_query.filter(db_models.Class.establishment_id == establishment_id)
-    total_classes = class_query.scalar()
-    
-    return {
-        "totalStudents": total_students,
-        "totalTeachers": total_teachers,
-        "classesManaged": total_classes,
-        "studentsTrend": 0,
-        "teachersTrend": 0,
-        "gradesSubmitted": 0, # To be implemented
-        "gradesPending": 0,    # To be implemented
-    }
+async def get_stats(establishment_id: str = None, period_id: str = None,
+                    data_version: tuple = Depends(etag(*STATS_TABLES)), db: AsyncSession = Depends(get_async_db)):
+    # Served from the in-process cache, the database is only hit on a miss.
+    # The entry must be of the data version the ETag was built from, whichever process wrote since.
+    stats = establishment_stats.get(establishment_id, period_id, data_version)
+    if stats is None:
+        generation = establishment_stats.generation
+        stats = await db.run_sync(compute_stats, establishment_id, period_id)
+        establishment_stats.put(establishment_id, period_id, stats, generation, data_version)
+    return stats
 
-@router.get("/")
-async def list_establishments(db: Session = Depends(get_db)):
-    return db.query(db_models.Establishment).all()
+@router.get("/", dependencies=[Depends(etag(db_models.Establishment))])
+async def list_establishments(
+    response: Response,
+    q: str = None,
+    sort: str = None,
+    fields: str = None,
+    cursor: str = None,
+    limit: int = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    return await ESTABLISHMENT_LIST.respond(
+        db, response, q=q, sort=sort, fields=fields, cursor=cursor, limit=limit
+    )
@@ -1,75 +1,154 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, UploadFile, File, HTTPException, Depends, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
 from typing import List
 from app.models import schemas, db_models
-from app.core.database import get_db
+from app.core.data_versions import etag
+from app.core.database import get_async_db
+from app.core.pagination import keyset, page_size, set_next_cursor, split_page
+from app.core.responses import fast_response, result_rows
 from app.services.csv_parser import CSVParser
+from app.services.grade_ingestion import GradeIngestion
+from app.services.results import set_period_avg, refresh_student_result, student_class_id
+from app.services.pdf_cache import pdf_cache
+from app.services.stats import class_establishment_id, student_establishment_id, establishment_stats
 from app.services.pdf_generator import PDFGenerator # Just to show it's there
+import csv
 import json
 
 router = APIRouter()
 
+# Columns of GradeResponse, in its field order
+GRADE_COLUMNS = [getattr(db_models.Grade, name) for name in schemas.GradeResponse.model_fields]
+
 
 @router.post("/upload")
 async def upload_grades(
     class_id: str,
     period_id: str,
     subject_id: str,
-    file: UploadFile = File(...)
+    file: UploadFile = File(...),
+    db: AsyncSession = Depends(get_async_db)
 ):
     if not file.filename.endswith('.csv'):
         raise HTTPException(status_code=400, detail="Only CSV files are allowed")
     
-    content = await file.read()
     try:
-        grades = CSVParser.parse_grades_csv(content)
-        # Logic to save to Supabase would go here
-        return {
-            "message": "File parsed successfully",
-            "received": len(grades),
-            "class_id": class_id,
-            "period_id": period_id
-        }
+        # Rows are parsed lazily from the spooled upload and fed to the ingestion
+        records = CSVParser.iter_grades_csv(file.file)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    try:
+        # The ingestion works on a sync session: run it on the async connection
+        report = await db.run_sync(
+            lambda session: GradeIngestion(session, class_id, subject_id, period_id).run(records)
+        )
+    except (UnicodeDecodeError, csv.Error) as e:
+        # Rows are decoded lazily: a bad byte or quote past the header surfaces here
+        raise HTTPException(status_code=400, detail=f"Invalid CSV file: {e}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/", response_model=List[schemas.GradeResponse])
+    if report["inserted"] or report["updated"]:
+        await pdf_cache.invalidate_async(class_id, period_id)
+        establishment_stats.invalidate(await db.run_sync(class_establishment_id, class_id))
+
+    return {
+        "message": "File imported successfully" if not report["errors"] else "File imported with errors",
+        "class_id": class_id,
+        "subject_id": subject_id,
+        "period_id": period_id,
+        **report
+    }
+
+@router.get("/", response_model=List[schemas.GradeResponse],
+            dependencies=[Depends(etag(db_models.Grade, db_models.StudentEnrollment))])
 async def list_grades(
+    response: Response,
     class_id: str = None, 
     subject_id: str = None, 
     period_id: str = None, 
-    db: Session = Depends(get_db)
+    cursor: str = None,
+    limit: int = None,
+    compact: bool = False,
+    db: AsyncSession = Depends(get_async_db)
 ):
-    query = db.query(db_models.Grade)
+    """
+    Grades ordered by id, paged when a limit or cursor is given (see app.core.pagination).
+    compact=true returns only the mark columns plus the ids that differ
+    between rows: subject_id and period_id are left out when filtered on.
+    Rows are built from the selected columns (app.core.responses).
+    """
+    limit = page_size(limit, cursor)
+    if compact:
+        columns = [db_models.Grade.id, db_models.Grade.student_id]
+        if not subject_id:
+            columns.append(db_models.Grade.subject_id)
+        if not period_id:
+            columns.append(db_models.Grade.period_id)
+        columns += [db_models.Grade.interro_avg, db_models.Grade.devoir_avg,
+                    db_models.Grade.compo_grade, db_models.Grade.period_avg]
+    else:
+        columns = GRADE_COLUMNS
+    query = select(*columns)
+
     if period_id:
-        query = query.filter(db_models.Grade.period_id == period_id)
+        query = query.where(db_models.Grade.period_id == period_id)
     if subject_id:
-        query = query.filter(db_models.Grade.subject_id == subject_id)
-    # Note: filtering by class_id requires joining with StudentEnrollment or Student, complicated for now without join.
-    # Assuming frontend filters or we add join later. 
-    # For now let's just return all matching subject/period.
-    
-    return query.all()
+        query = query.where(db_models.Grade.subject_id == subject_id)
+    if class_id:
+        query = query.where(db_models.Grade.student_id.in_(
+            select(db_models.StudentEnrollment.student_id).where(db_models.StudentEnrollment.class_id == class_id)
+        ))
+    query = keyset(query, [db_models.Grade.id], cursor, limit)
+
+    rows = result_rows(await db.execute(query))
+    rows, next_cursor = split_page(rows, limit, lambda row: [row["id"]])
+
+    page = fast_response(rows, response)
+    set_next_cursor(page, next_cursor)
+    return page
 
 @router.post("/", response_model=schemas.GradeResponse)
-async def save_grade(grade_data: schemas.GradeCreate, db: Session = Depends(get_db)):
-    # Check if grade exists
-    db_grade = db.query(db_models.Grade).filter(
-        db_models.Grade.student_id == grade_data.student_id,
-        db_models.Grade.subject_id == grade_data.subject_id,
-        db_models.Grade.period_id == grade_data.period_id
-    ).first()
+async def save_grade(grade_data: schemas.GradeCreate, db: AsyncSession = Depends(get_async_db)):
+    for attempt in range(2):
+        # Check if grade exists (unique on student, subject, period)
+        db_grade = (await db.execute(select(db_models.Grade).where(
+            db_models.Grade.student_id == grade_data.student_id,
+            db_models.Grade.subject_id == grade_data.subject_id,
+            db_models.Grade.period_id == grade_data.period_id
+        ))).scalars().first()
+        
+        if db_grade:
+            db_grade.interro_avg = grade_data.interro_avg
+            db_grade.devoir_avg = grade_data.devoir_avg
+            db_grade.compo_grade = grade_data.compo_grade
+        else:
+            db_grade = db_models.Grade(**grade_data.dict())
+            db.add(db_grade)
+        
+        # Keep the materialized averages and class ranks in step with this grade
+        set_period_avg(db_grade)
+        try:
+            await db.flush()
+            break
+        except IntegrityError:
+            # A concurrent request inserted the same grade first: update that row instead
+            await db.rollback()
+            if attempt:
+                raise HTTPException(status_code=409, detail="Grade was modified concurrently, retry")
     
-    if db_grade:
-        db_grade.interro_avg = grade_data.interro_avg
-        db_grade.devoir_avg = grade_data.devoir_avg
-        db_grade.compo_grade = grade_data.compo_grade
-        # Recalculate average logic here if needed, or trigger it
-    else:
-        db_grade = db_models.Grade(**grade_data.dict())
-        db.add(db_grade)
+    await db.run_sync(refresh_student_result, grade_data.student_id, grade_data.period_id)
     
-    db.commit()
-    db.refresh(db_grade)
+    await db.commit()
+    await db.refresh(db_grade)
+
+    # Ranks of the whole class may have moved: drop its cached bulletins
+    class_id = await db.run_sync(student_class_id, grade_data.student_id)
+    if class_id:
+        await pdf_cache.invalidate_async(class_id, grade_data.period_id)
+    establishment_stats.invalidate(await db.run_sync(student_establishment_id, grade_data.student_id))
     return db_grade
 
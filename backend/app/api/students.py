@@ -1,19 +1,31 @@
-from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, HTTPException, Depends, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models import schemas, db_models
-from app.core.database import get_db
+from app.core.database import get_async_db
+from app.core.data_versions import etag
+from app.core.listing import ListQuery
+from app.services.stats import establishment_stats
 from typing import List
 
 router = APIRouter()
 
+STUDENT_LIST = ListQuery(
+    fields={column.name: column for column in db_models.Student.__table__.columns},
+    search=[db_models.Student.last_name, db_models.Student.first_name, db_models.Student.registration_number],
+    sortable=["last_name", "first_name", "registration_number"],
+    default_sort="last_name",
+    schema=schemas.Student,
+)
+
 @router.post("/", response_model=schemas.Student)
-async def create_student(student_data: schemas.StudentCreate, db: Session = Depends(get_db)):
+async def create_student(student_data: schemas.StudentCreate, db: AsyncSession = Depends(get_async_db)):
     # 1. Create Student
     db_student = db_models.Student(
         **student_data.dict(exclude={"class_id", "academic_year_id"})
     )
     db.add(db_student)
-    db.flush() # Get the generated ID
+    await db.flush() # Get the generated ID
     
     # 2. Create Enrollment
     db_enrollment = db_models.StudentEnrollment(
@@ -24,21 +36,36 @@ async def create_student(student_data: schemas.StudentCreate, db: Session = Depe
     db.add(db_enrollment)
     
     try:
-        db.commit()
-        db.refresh(db_student)
+        await db.commit()
+        await db.refresh(db_student)
+        establishment_stats.invalidate(db_student.establishment_id)
         return db_student
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/", response_model=List[schemas.Student])
-async def list_students(establishment_id: str = None, class_id: str = None, db: Session = Depends(get_db)):
-    query = db.query(db_models.Student)
-    
+@router.get("/", response_model=List[schemas.Student],
+            dependencies=[Depends(etag(db_models.Student, db_models.StudentEnrollment))])
+async def list_students(
+    response: Response,
+    establishment_id: str = None,
+    class_id: str = None,
+    q: str = None,
+    sort: str = None,
+    fields: str = None,
+    cursor: str = None,
+    limit: int = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    where = []
     if class_id:
-        # Join with enrollment
-        query = query.join(db_models.StudentEnrollment).filter(db_models.StudentEnrollment.class_id == class_id)
+        # Students enrolled in the class
+        where.append(db_models.Student.id.in_(
+            select(db_models.StudentEnrollment.student_id).where(db_models.StudentEnrollment.class_id == class_id)
+        ))
     elif establishment_id:
-        query = query.filter(db_models.Student.establishment_id == establishment_id)
+        where.append(db_models.Student.establishment_id == establishment_id)
         
-    return query.all()
+    return await STUDENT_LIST.respond(
+        db, response, where=where, q=q, sort=sort, fields=fields, cursor=cursor, limit=limit
+    )
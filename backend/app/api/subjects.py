@@ -1,10 +1,33 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from app.core.database import get_db
+from fastapi import APIRouter, Depends, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.database import get_async_db
+from app.core.data_versions import etag
+from app.core.listing import ListQuery
 from app.models import db_models
 
 router = APIRouter()
 
-@router.get("/")
-async def list_subjects(db: Session = Depends(get_db)):
-    return db.query(db_models.Subject).all()
+SUBJECT_LIST = ListQuery(
+    fields={column.name: column for column in db_models.Subject.__table__.columns},
+    search=[db_models.Subject.name],
+    sortable=["name"],
+    default_sort="name",
+)
+
+@router.get("/", dependencies=[Depends(etag(db_models.Subject))])
+async def list_subjects(
+    response: Response,
+    establishment_id: str = None,
+    q: str = None,
+    sort: str = None,
+    fields: str = None,
+    cursor: str = None,
+    limit: int = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    where = []
+    if establishment_id:
+        where.append(db_models.Subject.establishment_id == establishment_id)
+    return await SUBJECT_LIST.respond(
+        db, response, where=where, q=q, sort=sort, fields=fields, cursor=cursor, limit=limit
+    )
@@ -1,59 +1,110 @@
 from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, or_, select
 from app.models import schemas, db_models
-from app.core.database import get_db
+from app.core.data_versions import etag
+from app.core.database import get_async_db
+from app.services.stats import class_establishment_id, establishment_stats
 from typing import List
 
 router = APIRouter()
 
 @router.post("/assignments", response_model=schemas.TeacherAssignment)
-async def create_assignment(assignment_data: schemas.TeacherAssignmentCreate, db: Session = Depends(get_db)):
+async def create_assignment(assignment_data: schemas.TeacherAssignmentCreate, db: AsyncSession = Depends(get_async_db)):
     db_assignment = db_models.TeacherAssignment(**assignment_data.dict())
     db.add(db_assignment)
     try:
-        db.commit()
-        db.refresh(db_assignment)
+        await db.commit()
+        await db.refresh(db_assignment)
+        establishment_stats.invalidate(await db.run_sync(class_establishment_id, db_assignment.class_id))
         return db_assignment
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.get("/assignments", response_model=List[schemas.TeacherAssignment])
-async def list_assignments(academic_year_id: str = None, db: Session = Depends(get_db)):
-    query = db.query(db_models.TeacherAssignment)
+@router.get("/assignments", response_model=List[schemas.TeacherAssignment],
+            dependencies=[Depends(etag(db_models.TeacherAssignment))])
+async def list_assignments(academic_year_id: str = None, db: AsyncSession = Depends(get_async_db)):
+    query = select(db_models.TeacherAssignment)
     if academic_year_id:
-        query = query.filter(db_models.TeacherAssignment.academic_year_id == academic_year_id)
-    return query.all()
+        query = query.where(db_models.TeacherAssignment.academic_year_id == academic_year_id)
+    return (await db.execute(query)).scalars().all()
 
-@router.get("/my-assignments")
-async def get_my_assignments(user_id: str, db: Session = Depends(get_db)):
+@router.get("/my-assignments", dependencies=[Depends(etag(
+    db_models.TeacherAssignment, db_models.Class, db_models.Subject,
+    db_models.StudentEnrollment, db_models.Grade, db_models.Period
+))])
+async def get_my_assignments(user_id: str, period_id: str = None, db: AsyncSession = Depends(get_async_db)):
+    """
+    Teacher home screen: every assignment with its enrolled and graded
+    student counts, in a single query. Progress is for `period_id`,
+    by default the active period of the assignment's academic year.
+    """
     # In a real app, we'd get user_id from token
-    assignments = db.query(db_models.TeacherAssignment).filter(
-        db_models.TeacherAssignment.user_id == user_id
-    ).all()
-    
+    ta = db_models.TeacherAssignment
+    if period_id is None:
+        period = select(db_models.Period.id).where(
+            db_models.Period.academic_year_id == ta.academic_year_id,
+            db_models.Period.is_active == True
+        ).limit(1).correlate(ta).scalar_subquery()
+    else:
+        period = period_id
+
+    enrolled = select(func.count(db_models.StudentEnrollment.id)).where(
+        db_models.StudentEnrollment.class_id == ta.class_id
+    ).scalar_subquery()
+    # A student counts as graded once one of the three marks is entered
+    graded = select(func.count(func.distinct(db_models.Grade.student_id))).join(
+        db_models.StudentEnrollment, db_models.StudentEnrollment.student_id == db_models.Grade.student_id
+    ).where(
+        db_models.StudentEnrollment.class_id == ta.class_id,
+        db_models.Grade.subject_id == ta.subject_id,
+        db_models.Grade.period_id == period,
+        or_(
+            db_models.Grade.interro_avg.isnot(None),
+            db_models.Grade.devoir_avg.isnot(None),
+            db_models.Grade.compo_grade.isnot(None)
+        )
+    ).scalar_subquery()
+
+    # Counts are correlated per assignment row, so the assignments are found
+    # through the user_id index rather than grouped
+    query = select(
+        ta.id, ta.class_id, ta.subject_id,
+        db_models.Class.name.label("class_name"),
+        db_models.Subject.name.label("subject_name"),
+        enrolled.label("students"),
+        graded.label("graded"),
+    ).outerjoin(
+        db_models.Class, db_models.Class.id == ta.class_id
+    ).outerjoin(
+        db_models.Subject, db_models.Subject.id == ta.subject_id
+    ).where(
+        ta.user_id == user_id
+    ).order_by(db_models.Class.name, db_models.Subject.name)
+
     results = []
-    for assign in assignments:
-        cls = db.query(db_models.Class).get(assign.class_id)
-        subj = db.query(db_models.Subject).get(assign.subject_id)
-        
-        # Count students in class
-        student_count = db.query(func.count(db_models.StudentEnrollment.id)).filter(
-            db_models.StudentEnrollment.class_id == assign.class_id
-        ).scalar()
-        
+    for row in (await db.execute(query)).all():
+        progress = round(100 * row.graded / row.students) if row.students else 0
+        if row.students and row.graded == row.students:
+            status = "completed"
+        elif row.graded:
+            status = "in_progress"
+        else:
+            status = "pending"
         results.append({
-            "id": assign.id,
-            "class_id": assign.class_id,
-            "subject_id": assign.subject_id,
-            "class_name": cls.name if cls else "N/A",
-            "subject_name": subj.name if subj else "N/A",
-            "students": student_count,
+            "id": row.id,
+            "class_id": row.class_id,
+            "subject_id": row.subject_id,
+            "class_name": row.class_name or "N/A",
+            "subject_name": row.subject_name or "N/A",
+            "students": row.students,
             "room": "N/A", # Not in model yet
-            "gradingProgress": 0,
-            "status": "pending",
-            "studentsGraded": 0
+            "gradingProgress": progress,
+            "status": status,
+            "studentsGraded": row.graded,
+            # Keys read by the teacher dashboard
+            "grading_progress": progress,
+            "students_graded": row.graded,
         })
     return results
-
@@ -1,38 +1,49 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from app.core.database import get_db
+from app.core.database import get_async_db
+from app.core.data_versions import etag
+from app.core.listing import ListQuery
 from app.models import db_models, schemas
 import uuid
 
 router = APIRouter()
 
-@router.get("/", response_model=List[schemas.UserResponse])
-async def list_users(role: str = None, db: Session = Depends(get_db)):
-    query = db.query(db_models.User)
-    
-    if role == "ENSEIGNANT":
-        query = query.filter(db_models.User.is_super_admin == False, db_models.User.can_generate_bulletins == False)
-    # Add other role filters if needed
-    
-    users = query.all()
-    # Enrich with 'role' field for response
-    results = []
-    for u in users:
-        role_label = "ENSEIGNANT"
-        if u.is_super_admin:
-            role_label = "SUPER_ADMIN"
-        elif u.can_generate_bulletins:
-            role_label = "PROVISEUR"
-            
-        u.role = role_label # Dynamically add attribute for Pydantic
-        results.append(u)
-        
-    return results
+# Every column but the password, plus the role derived in SQL
+USER_LIST = ListQuery(
+    fields={
+        **{column.name: column for column in db_models.User.__table__.columns if column.name != "password"},
+        "role": db_models.User.role,
+    },
+    search=[db_models.User.name, db_models.User.email],
+    sortable=["name", "email", "role"],
+    default_sort="name",
+    schema=schemas.UserResponse,
+)
+
+@router.get("/", response_model=List[schemas.UserResponse], dependencies=[Depends(etag(db_models.User))])
+async def list_users(
+    response: Response,
+    role: str = None,
+    q: str = None,
+    sort: str = None,
+    fields: str = None,
+    cursor: str = None,
+    limit: int = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    where = []
+    if role:
+        where.append(db_models.User.role == role)
+    return await USER_LIST.respond(
+        db, response, where=where, q=q, sort=sort, fields=fields, cursor=cursor, limit=limit
+    )
 
 @router.post("/", response_model=schemas.UserResponse)
-async def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    if db.query(db_models.User).filter(db_models.User.email == user.email).first():
+async def create_user(user: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
+    existing = await db.execute(select(db_models.User.id).where(db_models.User.email == user.email))
+    if existing.first():
         raise HTTPException(status_code=400, detail="Email already registered")
     
     db_user = db_models.User(
@@ -46,16 +57,10 @@ async def create_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
     )
     db.add(db_user)
     try:
-        db.commit()
-        db.refresh(db_user)
-        # Assign role for response
-        role_label = "ENSEIGNANT"
-        if db_user.is_super_admin:
-            role_label = "SUPER_ADMIN"
-        elif db_user.can_generate_bulletins:
-            role_label = "PROVISEUR"
-        db_user.role = role_label
+        await db.commit()
+        # Also loads the role column
+        await db.refresh(db_user)
         return db_user
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=str(e))
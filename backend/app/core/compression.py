@@ -0,0 +1,97 @@
+import os
+from typing import Set
+
+import anyio.to_thread
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.middleware.gzip import DEFAULT_EXCLUDED_CONTENT_TYPES, GZipResponder, IdentityResponder
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # optional, responses are gzipped only
+    brotli = None
+
+# Response compression: brotli when the client accepts it (and the brotli
+# package is installed), gzip otherwise. Bodies under MINIMUM_SIZE are sent
+# as is, and so are PDFs and archives, which are already compressed.
+MINIMUM_SIZE = int(os.environ.get("COMPRESSION_MINIMUM_SIZE", 1024))
+GZIP_LEVEL = int(os.environ.get("GZIP_LEVEL", 6))
+BROTLI_QUALITY = int(os.environ.get("BROTLI_QUALITY", 4))
+# Larger bodies are compressed in a worker thread so the event loop keeps serving
+THREAD_MINIMUM_SIZE = 128 * 1024
+# The bulletin ZIPs are sent as application/x-zip-compressed (application/zip is in the defaults)
+EXCLUDED_CONTENT_TYPES = DEFAULT_EXCLUDED_CONTENT_TYPES + ("application/pdf", "application/x-zip-compressed")
+
+
+def accepted_encodings(accept_encoding: str) -> Set[str]:
+    encodings = set()
+    for item in accept_encoding.split(","):
+        name, _, params = item.partition(";")
+        params = params.replace(" ", "")
+        if params.startswith("q="):
+            try:
+                if float(params[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        if name.strip():
+            encodings.add(name.strip().lower())
+    return encodings
+
+
+class BrotliResponder(IdentityResponder):
+    content_encoding = "br"
+
+    def __init__(self, app: ASGIApp, minimum_size: int, quality: int = BROTLI_QUALITY, *,
+                 exclude_content_types=EXCLUDED_CONTENT_TYPES) -> None:
+        super().__init__(app, minimum_size, exclude_content_types=exclude_content_types)
+        self.quality = quality
+        self.compressor = None
+
+    def _compress(self, body: bytes, more_body: bool) -> bytes:
+        data = self.compressor.process(body)
+        # Streamed chunks are flushed so the client gets them right away
+        return data + (self.compressor.flush() if more_body else self.compressor.finish())
+
+    async def apply_compression(self, body: bytes, *, more_body: bool) -> bytes:
+        if self.compressor is None:
+            self.compressor = brotli.Compressor(quality=self.quality)
+        if len(body) >= THREAD_MINIMUM_SIZE:
+            return await anyio.to_thread.run_sync(self._compress, body, more_body)
+        return self._compress(body, more_body)
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: int = MINIMUM_SIZE,
+                 gzip_level: int = GZIP_LEVEL, brotli_quality: int = BROTLI_QUALITY) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encodings = accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+        if brotli is not None and "br" in encodings:
+            responder = BrotliResponder(self.app, self.minimum_size, self.brotli_quality)
+        elif "gzip" in encodings:
+            responder = GZipResponder(self.app, self.minimum_size, self.gzip_level,
+                                      thread_minimum_size=THREAD_MINIMUM_SIZE,
+                                      exclude_content_types=EXCLUDED_CONTENT_TYPES)
+        else:
+            responder = IdentityResponder(self.app, self.minimum_size, exclude_content_types=EXCLUDED_CONTENT_TYPES)
+
+        async def send_with_etag(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                # A strong ETag names one representation: tell the encoded one apart
+                headers = MutableHeaders(raw=message["headers"])
+                tag = headers.get("etag")
+                encoding = headers.get("content-encoding")
+                if tag and encoding and tag.endswith('"') and not tag.startswith("W/"):
+                    headers["ETag"] = f'{tag[:-1]}-{encoding}"'
+            await send(message)
+
+        await responder(scope, receive, send_with_etag)
@@ -0,0 +1,123 @@
+import hashlib
+import json
+from typing import Iterable, Optional
+
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy import Integer, String, column, event, select, table, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.database import get_async_db
+
+# Table write counters and the ETags built from them.
+# Every session records the tables it writes (unit of work flushes and
+# insert/update/delete statements alike; bulk_*_mappings and raw driver SQL
+# fire no event and call record_write()) and bumps their counter in
+# data_versions as the last statement of the commit, so the counters move
+# with the data whichever process wrote it. A list endpoint's ETag is a hash
+# of its URL and the counters of the tables it reads: a client sending it
+# back in If-None-Match gets a 304 for the price of one small lookup, before
+# any row is read or serialized.
+
+VERSIONS_TABLE = "data_versions"
+CACHE_CONTROL = "private, no-cache"
+
+# Lightweight table so this module does not depend on the models
+versions = table(VERSIONS_TABLE, column("name", String), column("version", Integer))
+
+_CHANGED = "changed_tables"
+
+
+def _record(session: Session, names: Iterable[str]) -> None:
+    changed = session.info.setdefault(_CHANGED, set())
+    changed.update(name for name in names if name and name != VERSIONS_TABLE)
+
+
+def record_write(session: Session, *table_names: str) -> None:
+    """For writes that go around the session (e.g. raw driver SQL): bumps the tables at commit."""
+    _record(session, table_names)
+
+
+@event.listens_for(Session, "after_flush")
+def _record_flush(session, flush_context):
+    objects = list(session.new) + list(session.dirty) + list(session.deleted)
+    _record(session, {obj.__table__.name for obj in objects if hasattr(obj, "__table__")})
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _record_statement(state):
+    if state.is_insert or state.is_update or state.is_delete:
+        _record(state.session, [getattr(getattr(state.statement, "table", None), "name", None)])
+
+
+def _bump_statement(dialect_name: str, names: list):
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return update(versions).where(versions.c.name.in_(names)).values(version=versions.c.version + 1)
+    # Upsert, so tables without a counter row yet get one
+    return insert(versions).values([{"name": name, "version": 1} for name in names]).on_conflict_do_update(
+        index_elements=[versions.c.name], set_={"version": versions.c.version + 1}
+    )
+
+
+@event.listens_for(Session, "before_commit")
+def _bump_versions(session):
+    # Changes still pending are flushed by this commit too
+    session.flush()
+    names = session.info.pop(_CHANGED, None)
+    if names:
+        # Sorted, so concurrent commits lock the counter rows in the same order
+        session.execute(_bump_statement(session.get_bind().dialect.name, sorted(names)))
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changes(session):
+    session.info.pop(_CHANGED, None)
+
+
+def _matching_tag(if_none_match: str, tag: str) -> Optional[str]:
+    """
+    The If-None-Match entry matching `tag`, as the client sent it: the 304
+    carries it back so the client's stored ETag stays the same.
+    """
+    if if_none_match.strip() == "*":
+        return tag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        opaque = candidate[2:] if candidate.startswith("W/") else candidate
+        # Compressed responses carry "<tag>-<encoding>" (app.core.compression)
+        if opaque.strip('"').partition("-")[0] == tag.strip('"'):
+            return candidate
+    return None
+
+
+def etag(*models):
+    """
+    Dependency of a GET endpoint reading the tables of `models`: sets the
+    ETag header, or answers 304 Not Modified when If-None-Match matches.
+    Returns the counters the tag was built from (a tuple, in table name
+    order), for endpoints that serve a cached result: it has to be of the
+    same data version as the tag (see app.services.stats).
+    """
+    names = sorted(model.__tablename__ for model in models)
+
+    async def check_etag(request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+        rows = (await db.execute(
+            select(versions.c.name, versions.c.version).where(versions.c.name.in_(names))
+        )).all()
+        current = dict(rows)
+        data_version = tuple(current.get(name, 0) for name in names)
+        payload = [request.url.path, sorted(request.query_params.multi_items()), list(data_version)]
+        tag = '"%s"' % hashlib.blake2b(json.dumps(payload).encode(), digest_size=16).hexdigest()
+
+        if_none_match = request.headers.get("if-none-match")
+        matched = _matching_tag(if_none_match, tag) if if_none_match else None
+        if matched:
+            raise HTTPException(status_code=304, headers={"ETag": matched, "Cache-Control": CACHE_CONTROL})
+        response.headers.update({"ETag": tag, "Cache-Control": CACHE_CONTROL})
+        return data_version
+
+    return check_etag
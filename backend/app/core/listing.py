@@ -0,0 +1,103 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Response
+from sqlalchemy import or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.pagination import keyset, page_size, set_next_cursor, split_page
+from app.core.responses import FastJSONResponse, fast_response
+
+SORT_KEY = "_sort_key"
+
+
+def escape_like(text: str) -> str:
+    """`text` matched literally by LIKE ... ESCAPE '\\': no % or _ wildcards."""
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class ListQuery:
+    """
+    Search, sort, field projection and keyset pagination for a list endpoint.
+
+    `fields` maps the public field names to column expressions (computed
+    ones included, e.g. a CASE). Only the requested fields are selected,
+    all of them by default. `search` are the columns matched by `q`
+    (case-insensitive substring) and `sortable` the fields accepted by
+    `sort` (prefix with "-" for descending). Rows are paged on
+    (sort field, id), so every page is a seek whatever the sort.
+
+    With a `schema` (the route's response model), full rows are shaped like
+    it: only its fields are selected and the ones that are not columns get
+    their default, so the rows can skip model validation (app.core.responses).
+    """
+
+    def __init__(self, fields: Dict[str, Any], search: Sequence = (), sortable: Sequence[str] = (),
+                 default_sort: str = "id", schema=None):
+        self.fields = fields
+        self.search = list(search)
+        self.sortable = set(sortable) | {"id"}
+        self.default_sort = default_sort
+        if schema is not None:
+            self.default_fields = [name for name in schema.model_fields if name in fields]
+            self.defaults = {name: field.default for name, field in schema.model_fields.items() if name not in fields}
+        else:
+            self.default_fields = list(fields)
+            self.defaults = {}
+
+    def _selected(self, fields: Optional[str]) -> List[str]:
+        if not fields:
+            return list(self.default_fields)
+        names = [name.strip() for name in fields.split(",") if name.strip()]
+        unknown = [name for name in names if name not in self.fields]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+        # id is the tie breaker of every cursor
+        return ["id"] + [name for name in names if name != "id"]
+
+    def _sort(self, sort: Optional[str]) -> Tuple[str, bool]:
+        sort = sort or self.default_sort
+        descending = sort.startswith("-")
+        name = sort.lstrip("-")
+        if name not in self.sortable:
+            raise HTTPException(status_code=400, detail=f"Cannot sort by {name}, use one of: {', '.join(sorted(self.sortable))}")
+        return name, descending
+
+    async def fetch(self, db: AsyncSession, where: Sequence = (), q: str = None, sort: str = None,
+                    fields: str = None, cursor: str = None, limit: int = None) -> Tuple[List[Dict], Optional[str]]:
+        names = self._selected(fields)
+        sort_name, descending = self._sort(sort)
+        limit = page_size(limit, cursor)
+
+        columns = [self.fields[name].label(name) for name in names]
+        key_columns = [self.fields["id"]]
+        if sort_name != "id":
+            # The raw column, so an index on it can serve the sort; keyset() places its NULLs
+            sort_key = self.fields[sort_name]
+            columns.append(sort_key.label(SORT_KEY))
+            key_columns.insert(0, sort_key)
+
+        query = select(*columns).where(*where)
+        if q and self.search:
+            pattern = f"%{escape_like(q)}%"
+            query = query.where(or_(*(column.ilike(pattern, escape="\\") for column in self.search)))
+        query = keyset(query, key_columns, cursor, limit, descending=descending, nullable=sort_name != "id")
+
+        rows = (await db.execute(query)).all()
+        if sort_name != "id":
+            key = lambda row: [getattr(row, SORT_KEY), row.id]
+        else:
+            key = lambda row: [row.id]
+        rows, next_cursor = split_page(rows, limit, key)
+        # Row tuples start with the selected columns, in order
+        defaults = self.defaults if not fields else {}
+        items = [{**dict(zip(names, row)), **defaults} for row in rows]
+        return items, next_cursor
+
+    async def respond(self, db: AsyncSession, response: Response, fields: str = None, **params) -> FastJSONResponse:
+        """
+        fetch() turned into the endpoint's response, next cursor header included.
+        """
+        items, next_cursor = await self.fetch(db, fields=fields, **params)
+        page = fast_response(items, response)
+        set_next_cursor(page, next_cursor)
+        return page
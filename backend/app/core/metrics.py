@@ -0,0 +1,174 @@
+import os
+import secrets
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# In-process metrics, served by GET /metrics in the Prometheus text format.
+# Metrics are updated from the event loop thread (middleware, PDF pool
+# futures, ZIP streams), so they are plain counters without locks: an
+# observation is a dict lookup and a few additions. Gauges that can be read
+# on demand (the DB pools) are computed at scrape time instead. Every API
+# process has its own metrics: scrape each one (or run a single worker).
+# Off unless a scrape token is configured (METRICS_TOKEN): Prometheus sends
+# it as "Authorization: Bearer <token>" (authorization.credentials in the
+# scrape config) and anyone else gets a 401.
+TOKEN = os.environ.get("METRICS_TOKEN")
+ENABLED = bool(TOKEN)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+RENDER_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+SIZE_BUCKETS = tuple(mb * 1024 * 1024 for mb in (1, 5, 10, 25, 50, 100, 250, 500, 1000))
+
+
+def _labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{str(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{%s}" % ",".join(pairs) if pairs else ""
+
+
+class Counter:
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name, self.help, self.labelnames = name, help, labelnames
+        # Unlabelled metrics are exposed from the start
+        self.values: Dict[Tuple, float] = {} if labelnames else {(): 0}
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def samples(self) -> Iterable[str]:
+        for labels, value in sorted(self.values.items()):
+            yield f"{self.name}{_labels(self.labelnames, labels)} {value}"
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, *labels, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram:
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, buckets: Tuple[float, ...], labelnames: Tuple[str, ...] = ()):
+        self.name, self.help, self.labelnames = name, help, labelnames
+        self.buckets = buckets
+        # labels -> [per bucket counts (last one is +Inf), sum]
+        self.values: Dict[Tuple, list] = {}
+
+    def observe(self, value: float, *labels) -> None:
+        entry = self.values.get(labels)
+        if entry is None:
+            entry = self.values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        # Counted in its own bucket only, made cumulative at scrape time
+        entry[0][bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+
+    def samples(self) -> Iterable[str]:
+        for labels, (counts, total) in sorted(self.values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                le = 'le="%s"' % bound
+                yield f"{self.name}_bucket{_labels(self.labelnames, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.labelnames, labels)} {total}"
+            yield f"{self.name}_count{_labels(self.labelnames, labels)} {cumulative}"
+
+
+_metrics: List = []
+# Callables yielding (name, help, type, {labels: value}, labelnames) at scrape time
+_collectors: List[Callable] = []
+
+
+def register(metric):
+    _metrics.append(metric)
+    return metric
+
+
+REQUESTS = register(Counter("http_requests_total", "HTTP requests by route and status.", ("method", "route", "status")))
+REQUEST_DURATION = register(Histogram("http_request_duration_seconds", "HTTP request latency by route.",
+                                      LATENCY_BUCKETS, ("method", "route")))
+IN_FLIGHT = register(Gauge("http_requests_in_flight", "HTTP requests being served."))
+PDF_RENDERS = register(Counter("pdf_renders_total", "PDF renders in the pool by kind and result.", ("kind", "result")))
+PDF_RENDER_DURATION = register(Histogram("pdf_render_duration_seconds", "PDF render time in the pool worker.",
+                                         RENDER_BUCKETS, ("kind",)))
+BULK_ZIP_BYTES = register(Histogram("bulletin_zip_bytes", "Size of the bulk report card archives.",
+                                    SIZE_BUCKETS, ("source",)))
+
+
+def add_pool_gauges(engines: Dict[str, object]) -> None:
+    """Connection pool usage of `engines` (name -> sync engine), read at scrape time."""
+    def collect():
+        in_use, idle, size = {}, {}, {}
+        for name, engine in engines.items():
+            pool = engine.pool
+            # NullPool / StaticPool don't count their connections
+            if not hasattr(pool, "checkedout"):
+                continue
+            in_use[(name,)] = pool.checkedout()
+            idle[(name,)] = pool.checkedin()
+            size[(name,)] = pool.size()
+        yield "db_pool_connections_in_use", "Connections checked out of the pool.", "gauge", in_use, ("engine",)
+        yield "db_pool_connections_idle", "Connections idle in the pool.", "gauge", idle, ("engine",)
+        yield "db_pool_size", "Configured pool size (without overflow).", "gauge", size, ("engine",)
+
+    _collectors.append(collect)
+
+
+def render() -> str:
+    lines = []
+    for metric in _metrics:
+        lines += [f"# HELP {metric.name} {metric.help}", f"# TYPE {metric.name} {metric.type}", *metric.samples()]
+    for collect in _collectors:
+        for name, help, kind, values, labelnames in collect():
+            lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+            lines += [f"{name}{_labels(labelnames, labels)} {value}" for labels, value in sorted(values.items())]
+    return "\n".join(lines) + "\n"
+
+
+def authorized(authorization: Optional[str]) -> bool:
+    scheme, _, credentials = (authorization or "").partition(" ")
+    return bool(TOKEN) and scheme.lower() == "bearer" and secrets.compare_digest(credentials.strip(), TOKEN)
+
+
+def route_template(scope: Scope) -> str:
+    """The matched route's path template, not the path: ids would make one series per object."""
+    # Recent FastAPI keeps included routes relative to their router, the full template is here
+    context = (scope.get("fastapi") or {}).get("effective_route_context")
+    route = context or scope.get("route")
+    return getattr(route, "path_format", None) or getattr(route, "path", None) or "unmatched"
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            IN_FLIGHT.dec()
+            route = route_template(scope)
+            REQUESTS.inc(scope["method"], route, status)
+            REQUEST_DURATION.observe(time.perf_counter() - start, scope["method"], route)
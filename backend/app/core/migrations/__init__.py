@@ -0,0 +1,147 @@
+"""
+Versioned schema migrations.
+
+Each module in versions/ named NNNN_description.py is one migration with an
+upgrade(conn, log) function, log being the runner's logger for anything it
+has to report. Applied versions are recorded in schema_migrations, so every
+database (fresh, or created by the old create_all() startup) is brought to
+the same schema by running the pending ones in order. Migrations spell out
+their own DDL rather than use the models, which keep changing after them.
+
+Migrations declare `transactional = False` when they must run outside a
+transaction, e.g. CREATE INDEX CONCURRENTLY on PostgreSQL.
+
+    python scripts/migrate.py            # apply pending migrations
+    python scripts/migrate.py --status   # list applied / pending
+"""
+import importlib
+import os
+import pkgutil
+import re
+from typing import List, NamedTuple
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, inspect, select, text
+from sqlalchemy.engine import Engine
+
+MIGRATIONS_TABLE = "schema_migrations"
+VERSIONS_PACKAGE = __name__ + ".versions"
+VERSION_PATTERN = re.compile(r"^(\d{4})_(\w+)$")
+
+# Arbitrary key, serializes concurrent upgrades on PostgreSQL (several workers starting at once)
+PG_LOCK_ID = 720514
+
+_metadata = MetaData()
+migrations_table = Table(
+    MIGRATIONS_TABLE, _metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("applied_at", DateTime, server_default=func.now()),
+)
+
+
+class MigrationError(RuntimeError):
+    pass
+
+
+class Migration(NamedTuple):
+    version: int
+    name: str
+    module: object
+
+    @property
+    def transactional(self) -> bool:
+        return getattr(self.module, "transactional", True)
+
+    def __str__(self):
+        return f"{self.version:04d}_{self.name}"
+
+
+def load_migrations() -> List[Migration]:
+    package = importlib.import_module(VERSIONS_PACKAGE)
+    migrations = []
+    for info in pkgutil.iter_modules(package.__path__):
+        match = VERSION_PATTERN.match(info.name)
+        if not match:
+            continue
+        module = importlib.import_module(f"{VERSIONS_PACKAGE}.{info.name}")
+        migrations.append(Migration(int(match.group(1)), match.group(2), module))
+    migrations.sort(key=lambda m: m.version)
+
+    versions = [m.version for m in migrations]
+    if len(versions) != len(set(versions)):
+        raise MigrationError(f"Duplicate migration versions in {VERSIONS_PACKAGE}")
+    return migrations
+
+
+def applied_versions(engine: Engine) -> set:
+    with engine.connect() as conn:
+        if not inspect(conn).has_table(MIGRATIONS_TABLE):
+            return set()
+        return set(conn.execute(select(migrations_table.c.version)).scalars())
+
+
+def pending_migrations(engine: Engine) -> List[Migration]:
+    applied = applied_versions(engine)
+    return [m for m in load_migrations() if m.version not in applied]
+
+
+def _record(conn, migration: Migration) -> None:
+    conn.execute(migrations_table.insert().values(version=migration.version, name=migration.name))
+
+
+def _apply(engine: Engine, migration: Migration, log=print) -> None:
+    if migration.transactional:
+        # DDL and the version row commit together (SQLite and PostgreSQL have transactional DDL)
+        with engine.begin() as conn:
+            migration.module.upgrade(conn, log)
+            _record(conn, migration)
+    else:
+        # Steps must be idempotent: a crash before the version row is written reruns them
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            migration.module.upgrade(conn, log)
+            _record(conn, migration)
+
+
+def upgrade(engine: Engine, log=print) -> List[Migration]:
+    """
+    Applies pending migrations in version order and returns them.
+    """
+    _metadata.create_all(bind=engine)
+
+    lock = None
+    if engine.dialect.name == "postgresql":
+        lock = engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+        lock.execute(text("SELECT pg_advisory_lock(:id)"), {"id": PG_LOCK_ID})
+    try:
+        # Read after taking the lock, another process may just have migrated
+        pending = pending_migrations(engine)
+        for migration in pending:
+            log(f"Applying migration {migration}")
+            _apply(engine, migration, log)
+        return pending
+    finally:
+        if lock is not None:
+            lock.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": PG_LOCK_ID})
+            lock.close()
+
+
+def check(engine: Engine) -> None:
+    pending = pending_migrations(engine)
+    if pending:
+        names = ", ".join(str(m) for m in pending)
+        raise MigrationError(
+            f"Database schema is out of date, pending migrations: {names}. "
+            "Run `python scripts/migrate.py` before starting the API."
+        )
+
+
+def startup_check(engine: Engine) -> None:
+    """
+    Called when the API starts. With DB_AUTO_MIGRATE=0 (production) the API
+    refuses to start on a stale schema; by default pending migrations are
+    applied, which keeps local SQLite setups working out of the box.
+    """
+    if os.getenv("DB_AUTO_MIGRATE", "1") == "1":
+        upgrade(engine)
+    else:
+        check(engine)
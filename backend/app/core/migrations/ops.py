@@ -0,0 +1,66 @@
+"""
+Schema operations for migrations. All of them are idempotent, so a migration
+replayed on a database that already has the change (created by create_all()
+or by a half-finished run) is a no-op.
+"""
+from typing import Iterable, Sequence
+
+from sqlalchemy import Table, inspect, text
+from sqlalchemy.engine import Connection
+
+
+def _quote(conn: Connection, name: str) -> str:
+    return conn.dialect.identifier_preparer.quote(name)
+
+
+def has_table(conn: Connection, table_name: str) -> bool:
+    return inspect(conn).has_table(table_name)
+
+
+def has_column(conn: Connection, table_name: str, column_name: str) -> bool:
+    return any(c["name"] == column_name for c in inspect(conn).get_columns(table_name))
+
+
+def create_tables(conn: Connection, tables: Iterable[Table]) -> None:
+    """
+    Creates missing tables, with the indexes and constraints they declare.
+    """
+    for table in tables:
+        table.create(bind=conn, checkfirst=True)
+
+
+def add_column(conn: Connection, table_name: str, column_name: str, type_sql: str, default_sql: str = None) -> None:
+    if has_column(conn, table_name, column_name):
+        return
+    ddl = f"ALTER TABLE {_quote(conn, table_name)} ADD COLUMN {_quote(conn, column_name)} {type_sql}"
+    if default_sql is not None:
+        ddl += f" DEFAULT {default_sql}"
+    conn.execute(text(ddl))
+
+
+def create_index(conn: Connection, name: str, table_name: str, columns: Sequence[str],
+                 unique: bool = False, concurrently: bool = False) -> None:
+    """
+    concurrently=True builds the index without blocking writes on PostgreSQL.
+    It needs an AUTOCOMMIT connection (migration with transactional = False).
+    SQLite has no such option, the build there holds the write lock briefly.
+    """
+    postgres = conn.dialect.name == "postgresql"
+    if postgres and concurrently:
+        # An interrupted concurrent build leaves an INVALID index behind that
+        # IF NOT EXISTS would happily keep: drop it and build again
+        invalid = conn.execute(text(
+            "SELECT 1 FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid "
+            "WHERE c.relname = :name AND NOT i.indisvalid"
+        ), {"name": name}).first()
+        if invalid:
+            conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {_quote(conn, name)}"))
+
+    ddl = "CREATE {unique}INDEX {concurrently}IF NOT EXISTS {name} ON {table} ({columns})".format(
+        unique="UNIQUE " if unique else "",
+        concurrently="CONCURRENTLY " if postgres and concurrently else "",
+        name=_quote(conn, name),
+        table=_quote(conn, table_name),
+        columns=", ".join(_quote(conn, c) for c in columns),
+    )
+    conn.execute(text(ddl))
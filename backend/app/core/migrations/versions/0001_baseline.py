@@ -0,0 +1,144 @@
+"""
+Tables of the original schema, previously created by create_all() at startup.
+Frozen as they were then: later model changes get their own migrations.
+"""
+from sqlalchemy import (JSON, TIMESTAMP, Boolean, Column, Date, ForeignKey, Integer, MetaData, Numeric, String,
+                        Table, func)
+
+from app.core.migrations import ops
+
+metadata = MetaData()
+
+
+def _fk(target):
+    return ForeignKey(target, ondelete="CASCADE")
+
+
+establishments = Table(
+    "establishments", metadata,
+    Column("id", String, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("type", String, nullable=False),
+    Column("address", String),
+    Column("phone", String),
+    Column("logo_url", String),
+    Column("grading_config", JSON),
+    Column("period_type", String),
+    Column("created_at", TIMESTAMP, server_default=func.now()),
+)
+
+users = Table(
+    "users", metadata,
+    Column("id", String, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("email", String, unique=True, nullable=False),
+    Column("avatar_url", String),
+    Column("password", String),
+    Column("is_super_admin", Boolean),
+    Column("can_generate_bulletins", Boolean),
+    Column("created_at", TIMESTAMP, server_default=func.now()),
+)
+
+roles = Table(
+    "roles", metadata,
+    Column("id", String, primary_key=True),
+    Column("name", String, unique=True, nullable=False),
+)
+
+user_roles = Table(
+    "user_roles", metadata,
+    Column("id", String, primary_key=True),
+    Column("user_id", String, _fk("users.id")),
+    Column("role_id", String, _fk("roles.id")),
+    Column("establishment_id", String, _fk("establishments.id")),
+)
+
+academic_years = Table(
+    "academic_years", metadata,
+    Column("id", String, primary_key=True),
+    Column("label", String, nullable=False),
+    Column("is_active", Boolean),
+    Column("is_locked", Boolean),
+    Column("establishment_id", String, _fk("establishments.id")),
+)
+
+classes = Table(
+    "classes", metadata,
+    Column("id", String, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("academic_year_id", String, _fk("academic_years.id")),
+    Column("establishment_id", String, _fk("establishments.id")),
+)
+
+subjects = Table(
+    "subjects", metadata,
+    Column("id", String, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("coefficient", Integer),
+    Column("establishment_id", String, _fk("establishments.id")),
+)
+
+teacher_assignments = Table(
+    "teacher_assignments", metadata,
+    Column("id", String, primary_key=True),
+    Column("user_id", String, _fk("users.id")),
+    Column("class_id", String, _fk("classes.id")),
+    Column("subject_id", String, _fk("subjects.id")),
+    Column("academic_year_id", String, _fk("academic_years.id")),
+)
+
+students = Table(
+    "students", metadata,
+    Column("id", String, primary_key=True),
+    Column("first_name", String, nullable=False),
+    Column("last_name", String, nullable=False),
+    Column("birth_date", Date),
+    Column("gender", String(1)),
+    Column("address", String),
+    Column("phone", String),
+    Column("email", String),
+    Column("photo_url", String),
+    Column("registration_number", String, unique=True),
+    Column("establishment_id", String, _fk("establishments.id")),
+    Column("parent_name", String),
+    Column("parent_phone", String),
+    Column("parent_email", String),
+    Column("parent_profession", String),
+    Column("created_at", TIMESTAMP, server_default=func.now()),
+)
+
+student_enrollments = Table(
+    "student_enrollments", metadata,
+    Column("id", String, primary_key=True),
+    Column("student_id", String, _fk("students.id")),
+    Column("class_id", String, _fk("classes.id")),
+    Column("academic_year_id", String, _fk("academic_years.id")),
+)
+
+periods = Table(
+    "periods", metadata,
+    Column("id", String, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("start_date", Date),
+    Column("end_date", Date),
+    Column("is_active", Boolean),
+    Column("academic_year_id", String, _fk("academic_years.id")),
+)
+
+grades = Table(
+    "grades", metadata,
+    Column("id", String, primary_key=True),
+    Column("student_id", String, _fk("students.id")),
+    Column("subject_id", String, _fk("subjects.id")),
+    Column("period_id", String, _fk("periods.id")),
+    Column("interro_avg", Numeric(4, 2)),
+    Column("devoir_avg", Numeric(4, 2)),
+    Column("compo_grade", Numeric(4, 2)),
+    Column("period_avg", Numeric(4, 2)),
+    Column("created_at", TIMESTAMP, server_default=func.now()),
+    Column("updated_at", TIMESTAMP, server_default=func.now()),
+)
+
+
+def upgrade(conn, log):
+    ops.create_tables(conn, metadata.sorted_tables)
@@ -0,0 +1,8 @@
+"""
+users.password, formerly added by the root migrate_db.py script.
+"""
+from app.core.migrations import ops
+
+
+def upgrade(conn, log):
+    ops.add_column(conn, "users", "password", "VARCHAR", default_sql="'password123'")
@@ -0,0 +1,28 @@
+"""
+Materialized averages and ranks (app.services.results).
+"""
+from sqlalchemy import (TIMESTAMP, Column, Float, ForeignKey, Index, Integer, MetaData, String, Table,
+                        UniqueConstraint, func)
+
+from app.core.migrations import ops
+
+
+def upgrade(conn, log):
+    metadata = MetaData()
+    # The tables referenced by the foreign keys, as they are in the database
+    metadata.reflect(bind=conn, only=["students", "periods", "classes"])
+    period_results = Table(
+        "period_results", metadata,
+        Column("id", String, primary_key=True),
+        Column("student_id", String, ForeignKey("students.id", ondelete="CASCADE"), nullable=False),
+        Column("period_id", String, ForeignKey("periods.id", ondelete="CASCADE"), nullable=False),
+        Column("class_id", String, ForeignKey("classes.id", ondelete="CASCADE"), nullable=False),
+        Column("total_points", Float),
+        Column("total_coef", Integer),
+        Column("general_avg", Float),
+        Column("rank", Integer),
+        Column("updated_at", TIMESTAMP, server_default=func.now()),
+        UniqueConstraint("student_id", "period_id", name="uq_period_results_student_period"),
+        Index("ix_period_results_class_period_rank", "class_id", "period_id", "rank"),
+    )
+    ops.create_tables(conn, [period_results])
@@ -0,0 +1,22 @@
+"""
+Keeps only the most recently updated row of each (student, subject, period)
+so the unique grade index of the next migration can be built.
+"""
+from sqlalchemy import text
+
+
+def upgrade(conn, log):
+    result = conn.execute(text("""
+        DELETE FROM grades WHERE id IN (
+            SELECT id FROM (
+                SELECT id, ROW_NUMBER() OVER (
+                    PARTITION BY student_id, subject_id, period_id
+                    ORDER BY COALESCE(updated_at, created_at) DESC NULLS LAST, id DESC
+                ) AS position
+                FROM grades
+            ) ranked
+            WHERE position > 1
+        )
+    """))
+    if result.rowcount:
+        log(f"Removed {result.rowcount} duplicate grade rows")
@@ -0,0 +1,22 @@
+"""
+Indexes of the grade, enrollment and assignment hot paths. Built
+concurrently on PostgreSQL so a populated database keeps taking writes.
+"""
+from app.core.migrations import ops
+
+transactional = False
+
+INDEXES = [
+    ("uq_grades_student_subject_period", "grades", ["student_id", "subject_id", "period_id"], True),
+    ("ix_grades_student_period", "grades", ["student_id", "period_id"], False),
+    ("ix_grades_subject_period", "grades", ["subject_id", "period_id"], False),
+    ("ix_student_enrollments_class_id", "student_enrollments", ["class_id"], False),
+    ("ix_student_enrollments_student_id", "student_enrollments", ["student_id"], False),
+    ("ix_teacher_assignments_user_id", "teacher_assignments", ["user_id"], False),
+    ("ix_teacher_assignments_class_subject", "teacher_assignments", ["class_id", "subject_id"], False),
+]
+
+
+def upgrade(conn, log):
+    for name, table_name, columns, unique in INDEXES:
+        ops.create_index(conn, name, table_name, columns, unique=unique, concurrently=True)
@@ -0,0 +1,16 @@
+"""
+Table write counters behind the ETags of the list endpoints (app.core.data_versions).
+"""
+from sqlalchemy import Column, Integer, MetaData, String, Table
+
+from app.core.migrations import ops
+
+data_versions = Table(
+    "data_versions", MetaData(),
+    Column("name", String, primary_key=True),
+    Column("version", Integer, nullable=False),
+)
+
+
+def upgrade(conn, log):
+    ops.create_tables(conn, [data_versions])
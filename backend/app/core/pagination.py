@@ -0,0 +1,104 @@
+import base64
+import json
+from typing import Any, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Response
+from sqlalchemy import and_, or_, tuple_
+
+# Keyset pagination shared by the list endpoints.
+# Pages are ordered by a unique key (e.g. (last_name, id)) and the cursor is
+# the key of the last row sent, so the next page is an indexed range seek
+# instead of an OFFSET that rescans every previous row. Bodies stay plain
+# lists for existing clients; the cursor of the next page travels in the
+# X-Next-Cursor header, absent on the last page. Paging is opt-in: without a
+# limit or a cursor the whole result is returned, as before, since existing
+# clients don't follow the header.
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+DEFAULT_PAGE_SIZE = 200
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps(list(values), default=str, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list) or len(values) != size:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+def page_size(limit: Optional[int], cursor: Optional[str] = None) -> Optional[int]:
+    """
+    The page size asked for, capped, or None (no paging) without a limit and a cursor.
+    """
+    if limit is None:
+        return DEFAULT_PAGE_SIZE if cursor else None
+    if limit < 1:
+        raise HTTPException(status_code=400, detail="limit must be positive")
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def _seek(key_columns: Sequence, values: Sequence, descending: bool):
+    key = tuple_(*key_columns) if len(key_columns) > 1 else key_columns[0]
+    bound = tuple_(*values) if len(key_columns) > 1 else values[0]
+    return key < bound if descending else key > bound
+
+
+def keyset(query, key_columns: Sequence, cursor: Optional[str], limit: Optional[int], descending: bool = False,
+           nullable: bool = False):
+    """
+    Orders `query` by the key columns, seeks past `cursor` and fetches one
+    row more than the page so the caller can tell whether a next page exists.
+    With limit=None every row is fetched.
+
+    nullable=True when the first key column can be NULL (the last ones must
+    be unique and not null, e.g. id): NULLs come first ascending and last
+    descending, on every database, and the seek steps over them explicitly
+    since a comparison with NULL matches nothing.
+    """
+    if cursor:
+        values = decode_cursor(cursor, len(key_columns))
+        if not nullable:
+            query = query.where(_seek(key_columns, values, descending))
+        else:
+            first, rest = key_columns[0], key_columns[1:]
+            if values[0] is None:
+                in_nulls = and_(first.is_(None), _seek(rest, values[1:], descending))
+                query = query.where(in_nulls if descending else or_(in_nulls, first.is_not(None)))
+            else:
+                past = _seek(key_columns, values, descending)
+                query = query.where(or_(past, first.is_(None)) if descending else past)
+    if descending:
+        order = [c.desc() for c in key_columns]
+        if nullable:
+            order[0] = order[0].nulls_last()
+    else:
+        order = list(key_columns)
+        if nullable:
+            order[0] = order[0].asc().nulls_first()
+    query = query.order_by(*order)
+    return query.limit(limit + 1) if limit is not None else query
+
+
+def split_page(rows: Sequence, limit: Optional[int], key) -> Tuple[Sequence, Optional[str]]:
+    """
+    Drops the look-ahead row and returns (page, next cursor or None).
+    `key(row)` gives the key column values of a row.
+    """
+    if limit is None or len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    return page, encode_cursor(key(page[-1]))
+
+
+def set_next_cursor(response: Response, next_cursor: Optional[str]) -> None:
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
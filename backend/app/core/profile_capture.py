@@ -0,0 +1,260 @@
+import asyncio
+import cProfile
+import linecache
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Optional
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+# On-demand profile of a live API process, started by an admin through
+# GET /api/admin/profiling/capture (app.api.admin). One capture at a
+# time, time-boxed, of the whole process or of the requests under a path:
+#  - "sample": a thread reads the stack of every thread each SAMPLE_INTERVAL
+#    and counts them, returned as collapsed stacks (flamegraph.pl, speedscope).
+#    Cheap enough for production; renders show up as waits on the PDF pool.
+#  - "cprofile": deterministic profile of the event loop thread (handlers,
+#    ORM hydration in run_sync greenlets, serialization), plus the report
+#    card renders sent to the PDF pool meanwhile, profiled in the worker
+#    processes. Returned as a pstats dump (pstats, snakeviz). Slows the
+#    process down while it runs.
+# The event loop serves requests concurrently: while a request capture
+# records, whatever else runs at the same time is recorded too.
+ADMIN_TOKEN = os.environ.get("PROFILING_ADMIN_TOKEN")
+ENABLED = bool(ADMIN_TOKEN)
+MAX_SECONDS = float(os.environ.get("PROFILING_CAPTURE_MAX_SECONDS", 120))
+SAMPLE_INTERVAL = float(os.environ.get("PROFILING_SAMPLE_INTERVAL_MS", 5)) / 1000
+
+SAMPLE = "sample"
+CPROFILE = "cprofile"
+MODES = (SAMPLE, CPROFILE)
+
+
+# Innermost frames of threads waiting for work (and of the event loop waiting
+# for I/O): left out unless asked, they would dwarf the threads doing something
+IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+}
+
+
+def _is_idle(frame) -> bool:
+    code = frame.f_code
+    if (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+        return True
+    # Blocked in a C queue (SimpleQueue.get, e.g. the aiosqlite connection threads)
+    return linecache.getline(code.co_filename, frame.f_lineno).strip().endswith(".get()")
+
+
+class CaptureBusy(Exception):
+    pass
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    filename = code.co_filename
+    # Site packages and the app are told apart by their last path components
+    parts = filename.replace("\\", "/").split("/")
+    return f"{getattr(code, 'co_qualname', code.co_name)} ({'/'.join(parts[-2:])}:{code.co_firstlineno})"
+
+
+class _Sampler(threading.Thread):
+    def __init__(self, interval: float, recording: threading.Event, idle: bool):
+        super().__init__(name="profile-sampler", daemon=True)
+        self.interval = interval
+        self.recording = recording
+        self.idle = idle
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        names = {}
+        while not self._stop_event.wait(self.interval):
+            if not self.recording.is_set():
+                continue
+            self.samples += 1
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == self.ident:
+                    continue
+                if not self.idle and _is_idle(frame):
+                    continue
+                if thread_id not in names:
+                    names = {thread.ident: thread.name for thread in threading.enumerate()}
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, f"thread-{thread_id}"))
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+
+
+class _Snapshot:
+    """Raw profile stats (e.g. from a pool worker), in the form pstats.Stats loads."""
+
+    def __init__(self, stats: Dict):
+        self.stats = stats
+
+    def create_stats(self) -> None:
+        pass
+
+
+class Capture:
+    def __init__(self, mode: str, path_prefix: Optional[str] = None, requests: Optional[int] = None,
+                 interval: float = SAMPLE_INTERVAL, idle: bool = False):
+        self.mode = mode
+        self.path_prefix = path_prefix
+        self.requests = requests
+        self.matched = 0
+        self.started_at = time.time()
+        self._in_flight = 0
+        self._done = asyncio.Event()
+        # Whole process: recording from the start, else only while a matching request runs
+        self._recording = threading.Event()
+        self._sampler = _Sampler(interval, self._recording, idle) if mode == SAMPLE else None
+        self._profile = cProfile.Profile() if mode == CPROFILE else None
+        self._render_stats: List[Dict] = []
+
+    @property
+    def targets_requests(self) -> bool:
+        return self.path_prefix is not None or self.requests is not None
+
+    @property
+    def recording(self) -> bool:
+        return self._recording.is_set()
+
+    def start(self) -> None:
+        if self._sampler:
+            self._sampler.start()
+        if not self.targets_requests:
+            self._set_recording(True)
+
+    def stop(self) -> None:
+        self._set_recording(False)
+        if self._sampler:
+            self._sampler.stop()
+
+    def _set_recording(self, on: bool) -> None:
+        if on == self._recording.is_set():
+            return
+        # cProfile follows the thread it is enabled in: this is the event loop thread
+        if on:
+            if self._profile:
+                self._profile.enable()
+            self._recording.set()
+        else:
+            if self._profile:
+                self._profile.disable()
+            self._recording.clear()
+
+    def matches(self, scope: Scope) -> bool:
+        if self._done.is_set():
+            return False
+        return self.path_prefix is None or scope["path"].startswith(self.path_prefix)
+
+    def request_started(self) -> None:
+        self._in_flight += 1
+        self._set_recording(True)
+
+    def request_finished(self) -> None:
+        self._in_flight -= 1
+        self.matched += 1
+        if self.requests is not None and self.matched >= self.requests:
+            self._done.set()
+        if self._in_flight == 0:
+            self._set_recording(False)
+
+    def add_render_stats(self, stats: Dict) -> None:
+        self._render_stats.append(stats)
+
+    async def wait(self, seconds: float) -> None:
+        try:
+            await asyncio.wait_for(self._done.wait(), seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    @property
+    def samples(self) -> int:
+        return self._sampler.samples if self._sampler else 0
+
+    def collapsed(self) -> str:
+        """Collapsed stacks, one "frame;frame;... count" line per distinct stack."""
+        return "".join(f"{stack} {count}\n" for stack, count in self._sampler.stacks.most_common())
+
+    def pstats_dump(self) -> bytes:
+        """The event loop profile merged with the worker render profiles, as pstats.dump_stats writes it."""
+        sources = []
+        self._profile.create_stats()
+        if self._profile.stats:
+            sources.append(_Snapshot(self._profile.stats))
+        sources += [_Snapshot(stats) for stats in self._render_stats if stats]
+        if not sources:
+            return marshal.dumps({})
+        merged = pstats.Stats(sources[0])
+        for source in sources[1:]:
+            merged.add(source)
+        return marshal.dumps(merged.stats)
+
+
+_active: Optional[Capture] = None
+
+
+def active() -> Optional[Capture]:
+    return _active
+
+
+def profiling_renders() -> bool:
+    """Whether PDF pool renders submitted now should be profiled in their worker."""
+    return _active is not None and _active.mode == CPROFILE and _active.recording
+
+
+def add_render_stats(stats: Optional[Dict]) -> None:
+    if stats and _active is not None:
+        _active.add_render_stats(stats)
+
+
+async def run_capture(mode: str, seconds: float, path_prefix: Optional[str] = None, requests: Optional[int] = None,
+                      interval: float = SAMPLE_INTERVAL, idle: bool = False) -> Capture:
+    """Records for `seconds`, or until `requests` matching requests are done. Runs in the event loop."""
+    global _active
+    if _active is not None:
+        raise CaptureBusy()
+    capture = Capture(mode, path_prefix, requests, interval, idle)
+    _active = capture
+    try:
+        capture.start()
+        await capture.wait(seconds)
+    finally:
+        capture.stop()
+        _active = None
+    return capture
+
+
+class CaptureMiddleware:
+    """Hands the requests matching the running capture to it; a global lookup otherwise."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        capture = _active
+        if capture is None or scope["type"] != "http" or not capture.targets_requests or not capture.matches(scope):
+            await self.app(scope, receive, send)
+            return
+
+        capture.request_started()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            capture.request_finished()
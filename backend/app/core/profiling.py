@@ -0,0 +1,153 @@
+import heapq
+import json
+import logging
+import os
+import time
+from contextvars import ContextVar
+from typing import List, Optional, Tuple
+
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Per-request profiling (PROFILING=1, off by default).
+# Every request gets a RequestProfile in a context variable, which the
+# cursor events of the instrumented engines fill with the time and the text
+# of each statement: contextvars follow the request into the threads and
+# greenlets its queries run in. The totals go back in a Server-Timing header
+# (shown by the browser devtools), and requests that are slow, issue too many
+# statements (N+1 loops) or run a slow statement are logged as one JSON line
+# on the "edumanager.profiling" logger.
+# Disabled, neither the middleware nor the engine events are installed.
+ENABLED = os.environ.get("PROFILING", "0") == "1"
+SERVER_TIMING = os.environ.get("PROFILING_SERVER_TIMING", "1") == "1"
+SLOW_REQUEST_MS = float(os.environ.get("PROFILING_SLOW_REQUEST_MS", 500))
+SLOW_QUERY_MS = float(os.environ.get("PROFILING_SLOW_QUERY_MS", 100))
+MAX_QUERIES = int(os.environ.get("PROFILING_MAX_QUERIES", 50))
+# Slowest statements kept per request, and how much of their SQL is logged
+TOP_STATEMENTS = int(os.environ.get("PROFILING_TOP_STATEMENTS", 5))
+STATEMENT_MAX_LENGTH = 500
+
+logger = logging.getLogger("edumanager.profiling")
+
+_START_TIMES = "profiling_start_times"
+
+
+class RequestProfile:
+    def __init__(self) -> None:
+        self.start = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        # Min-heap of (duration, statement): the TOP_STATEMENTS slowest
+        self.slowest: List[Tuple[float, str]] = []
+
+    def add_statement(self, duration: float, statement: str) -> None:
+        self.queries += 1
+        self.db_time += duration
+        if len(self.slowest) < TOP_STATEMENTS:
+            heapq.heappush(self.slowest, (duration, statement))
+        elif duration > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, (duration, statement))
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.start
+
+
+_current: ContextVar[Optional[RequestProfile]] = ContextVar("request_profile", default=None)
+
+
+def current_profile() -> Optional[RequestProfile]:
+    return _current.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault(_START_TIMES, []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current.get()
+    start_times = conn.info.get(_START_TIMES)
+    if profile is not None and start_times:
+        profile.add_statement(time.perf_counter() - start_times.pop(), statement)
+
+
+def _handle_error(exception_context):
+    # A failed statement never reaches after_cursor_execute
+    connection = exception_context.connection
+    if connection is not None and connection.info.get(_START_TIMES):
+        connection.info[_START_TIMES].pop()
+
+
+def instrument(*engines) -> None:
+    """Times the statements of `engines` (sync engines, e.g. async_engine.sync_engine)."""
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
+
+
+def server_timing(profile: RequestProfile) -> str:
+    return (f'app;dur={profile.elapsed() * 1000:.1f}, '
+            f'db;dur={profile.db_time * 1000:.1f};desc="{profile.queries} queries"')
+
+
+def log_request(scope: Scope, status: Optional[int], profile: RequestProfile) -> None:
+    elapsed_ms = profile.elapsed() * 1000
+    slowest = sorted(profile.slowest, reverse=True)
+    reasons = []
+    if elapsed_ms >= SLOW_REQUEST_MS:
+        reasons.append("slow_request")
+    if profile.queries > MAX_QUERIES:
+        reasons.append("too_many_queries")
+    if slowest and slowest[0][0] * 1000 >= SLOW_QUERY_MS:
+        reasons.append("slow_query")
+    if not reasons:
+        return
+    logger.warning(json.dumps({
+        "event": "slow_request",
+        "reasons": reasons,
+        "method": scope["method"],
+        "path": scope["path"],
+        "query": scope.get("query_string", b"").decode("latin-1"),
+        "status": status,
+        "duration_ms": round(elapsed_ms, 1),
+        "db_ms": round(profile.db_time * 1000, 1),
+        "queries": profile.queries,
+        "slowest": [{"ms": round(duration * 1000, 1), "sql": " ".join(statement.split())[:STATEMENT_MAX_LENGTH]}
+                    for duration, statement in slowest],
+    }))
+
+
+class ProfilingMiddleware:
+    """Outermost middleware, so the timings include everything the app does."""
+
+    def __init__(self, app: ASGIApp, server_timing_header: bool = SERVER_TIMING) -> None:
+        self.app = app
+        self.server_timing_header = server_timing_header
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile()
+        token = _current.set(profile)
+        status = None
+
+        async def send_with_timing(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.server_timing_header:
+                    # Time to the response headers: streamed bodies are only in the log
+                    headers = MutableHeaders(scope=message)
+                    headers.append("Server-Timing", server_timing(profile))
+                    headers["Timing-Allow-Origin"] = "*"
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            log_request(scope, status, profile)
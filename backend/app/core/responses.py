@@ -0,0 +1,55 @@
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List
+
+from fastapi import Response
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # optional, falls back to the standard encoder
+    orjson = None
+
+# Fast path of the large list endpoints.
+# Rows are built as plain dicts straight from the SQL result tuples and
+# encoded by orjson, instead of loading ORM objects, validating each one
+# through the response model and encoding the result with json. An endpoint
+# opts in by returning a FastJSONResponse; its response_model still documents
+# the shape, so the rows must carry the same keys and JSON types.
+
+
+def _default(value: Any):
+    # Numeric columns (marks) come back as Decimal, sent as floats like the schemas do
+    if isinstance(value, Decimal):
+        return float(value)
+    # Only reached without orjson, which encodes dates itself
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_default)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def fast_response(content: Any, response: Response = None) -> FastJSONResponse:
+    """
+    FastJSONResponse of `content`. FastAPI drops the headers dependencies set
+    on the injected `response` (e.g. the ETag) when a Response is returned,
+    so they are carried over.
+    """
+    return FastJSONResponse(content, headers=response.headers if response is not None else None)
+
+
+def result_rows(result) -> List[Dict[str, Any]]:
+    """Rows of a column select as dicts keyed by column label."""
+    keys = list(result.keys())
+    return [dict(zip(keys, row)) for row in result]
@@ -1,13 +1,27 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Header
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from app.api import grades, bulletins, students, teachers, auth, establishments, users, classes, subjects
-from app.core.database import engine, Base
+from app.api import grades, bulletins, students, teachers, auth, establishments, users, classes, subjects, admin
+from app.core.compression import CompressionMiddleware
+from app.core.database import engine, async_engine
+from app.core.migrations import startup_check
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core import metrics, profile_capture, profiling
 from app.models import db_models
+from app.services import pdf_pool
 
-# Initialize Database
-Base.metadata.create_all(bind=engine)
+# Apply or check schema migrations (DB_AUTO_MIGRATE=0: refuse to start on a stale schema)
+startup_check(engine)
 
-app = FastAPI(title="EduManager API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    # Shutdown: stop the PDF workers and close the async connections
+    pdf_pool.shutdown()
+    await async_engine.dispose()
+
+app = FastAPI(title="EduManager API", version="1.0.0", lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -16,12 +30,36 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "Server-Timing"],
 )
+# gzip / brotli for large JSON bodies
+app.add_middleware(CompressionMiddleware)
+# Per-route latency histograms and in-flight requests, served by /metrics (METRICS_TOKEN)
+if metrics.ENABLED:
+    metrics.add_pool_gauges({"sync": engine, "async": async_engine.sync_engine})
+    app.add_middleware(metrics.MetricsMiddleware)
+# Admin profile captures of the next requests under a path (PROFILING_ADMIN_TOKEN)
+if profile_capture.ENABLED:
+    app.add_middleware(profile_capture.CaptureMiddleware)
+# Server-Timing header and slow request log (PROFILING=1). The last one
+# added is the outermost: keep it last so its timings cover every other one
+if profiling.ENABLED:
+    profiling.instrument(engine, async_engine.sync_engine)
+    app.add_middleware(profiling.ProfilingMiddleware)
 
 @app.get("/")
 async def root():
     return {"message": "Welcome to EduManager API", "status": "online"}
 
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics(authorization: str = Header(None)):
+    # Prometheus text format, for the scraper holding METRICS_TOKEN; hidden when none is configured
+    if not metrics.ENABLED:
+        return PlainTextResponse("Not Found\n", status_code=404)
+    if not metrics.authorized(authorization):
+        return PlainTextResponse("Metrics token required\n", status_code=401, headers={"WWW-Authenticate": "Bearer"})
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
 # Include routers
 app.include_router(grades.router, prefix="/api/grades", tags=["Grades"])
 app.include_router(bulletins.router, prefix="/api/bulletins", tags=["Bulletins"])
@@ -32,4 +70,5 @@ app.include_router(establishments.router, prefix="/api/establishments", tags=["E
 app.include_router(users.router, prefix="/api/users", tags=["Users"])
 app.include_router(classes.router, prefix="/api/classes", tags=["Classes"])
 app.include_router(subjects.router, prefix="/api/subjects", tags=["Subjects"])
+app.include_router(admin.router, prefix="/api/admin/profiling", tags=["Admin"])
 
@@ -1,7 +1,10 @@
-from sqlalchemy import Column, String, Boolean, TIMESTAMP, ForeignKey, Integer, JSON, Date, Numeric, Text
+from sqlalchemy import Column, String, Boolean, TIMESTAMP, ForeignKey, Integer, JSON, Date, Numeric, Text, Float, Index, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.sql import func
+from sqlalchemy.orm import column_property
+from sqlalchemy.sql import case, func
 from app.core.database import Base
+# Registers the session hooks that keep DataVersion up to date
+from app.core import data_versions  # noqa: F401
 import uuid
 
 def generate_uuid():
@@ -30,6 +33,13 @@ class User(Base):
     can_generate_bulletins = Column(Boolean, default=False)
     created_at = Column(TIMESTAMP, server_default=func.now())
 
+    # Role label shown in the UI, derived in SQL so lists can filter and sort on it
+    role = column_property(case(
+        (is_super_admin == True, "SUPER_ADMIN"),
+        (can_generate_bulletins == True, "PROVISEUR"),
+        else_="ENSEIGNANT"
+    ))
+
 class Role(Base):
     __tablename__ = "roles"
     id = Column(String, primary_key=True, default=generate_uuid)
@@ -72,6 +82,11 @@ class TeacherAssignment(Base):
     subject_id = Column(String, ForeignKey("subjects.id", ondelete="CASCADE"))
     academic_year_id = Column(String, ForeignKey("academic_years.id", ondelete="CASCADE"))
 
+    __table_args__ = (
+        Index("ix_teacher_assignments_user_id", "user_id"),
+        Index("ix_teacher_assignments_class_subject", "class_id", "subject_id"),
+    )
+
 class Student(Base):
     __tablename__ = "students"
     id = Column(String, primary_key=True, default=generate_uuid)
@@ -101,6 +116,11 @@ class StudentEnrollment(Base):
     class_id = Column(String, ForeignKey("classes.id", ondelete="CASCADE"))
     academic_year_id = Column(String, ForeignKey("academic_years.id", ondelete="CASCADE"))
 
+    __table_args__ = (
+        Index("ix_student_enrollments_class_id", "class_id"),
+        Index("ix_student_enrollments_student_id", "student_id"),
+    )
+
 class Period(Base):
     __tablename__ = "periods"
     id = Column(String, primary_key=True, default=generate_uuid)
@@ -122,3 +142,41 @@ class Grade(Base):
     period_avg = Column(Numeric(4,2))
     created_at = Column(TIMESTAMP, server_default=func.now())
     updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        # One grade row per student, subject and period (upsert key of save_grade)
+        Index("uq_grades_student_subject_period", "student_id", "subject_id", "period_id", unique=True),
+        Index("ix_grades_student_period", "student_id", "period_id"),
+        Index("ix_grades_subject_period", "subject_id", "period_id"),
+    )
+
+class PeriodResult(Base):
+    """
+    Materialized general average and class rank of a student for one period.
+    Maintained by app.services.results whenever grades are written.
+    """
+    __tablename__ = "period_results"
+    id = Column(String, primary_key=True, default=generate_uuid)
+    student_id = Column(String, ForeignKey("students.id", ondelete="CASCADE"), nullable=False)
+    period_id = Column(String, ForeignKey("periods.id", ondelete="CASCADE"), nullable=False)
+    class_id = Column(String, ForeignKey("classes.id", ondelete="CASCADE"), nullable=False)
+    total_points = Column(Float, default=0)
+    total_coef = Column(Integer, default=0)
+    general_avg = Column(Float)
+    rank = Column(Integer)
+    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        UniqueConstraint("student_id", "period_id", name="uq_period_results_student_period"),
+        Index("ix_period_results_class_period_rank", "class_id", "period_id", "rank"),
+    )
+
+class DataVersion(Base):
+    """
+    Write counter of each table, bumped in the transaction of every commit
+    that changed it (app.core.data_versions). The list endpoints build their
+    ETags from these, so a conditional GET is answered without reading rows.
+    """
+    __tablename__ = "data_versions"
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
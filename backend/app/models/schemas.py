@@ -85,3 +85,10 @@ class UserResponse(UserBase):
     class Config:
         from_attributes = True
 
+
+class BulletinJobCreate(BaseModel):
+    scope: str = "class" # class, level or establishment
+    period_id: str
+    class_id: Optional[str] = None
+    establishment_id: Optional[str] = None
+    level: Optional[str] = None # e.g. "6ème", "Tle"
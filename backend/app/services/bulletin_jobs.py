@@ -0,0 +1,267 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+import zipfile
+from typing import Dict, List, Optional
+from app.core.database import SessionLocal
+from app.core.metrics import BULK_ZIP_BYTES
+from app.models import db_models
+from app.services.bulletins import class_render_jobs, render_class_bulletins
+
+# Finished archives (and their job metadata) live on local disk, so a job can be
+# downloaded again, or resumed with a Range request, without re-rendering.
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../.."))
+STORAGE_DIR = os.environ.get("BULLETIN_STORAGE_DIR", os.path.join(backend_dir, "storage", "bulletins"))
+
+# Number of jobs rendering at the same time; each one already uses the whole PDF pool
+MAX_RUNNING_JOBS = int(os.environ.get("BULLETIN_JOB_CONCURRENCY", 1))
+
+SCOPES = ("class", "level", "establishment")
+
+# Render failures kept on a job (and in its metadata file), the count covers them all
+MAX_RECORDED_FAILURES = 50
+
+logger = logging.getLogger("edumanager.bulletin_jobs")
+
+# The process running a job, kept in its metadata. Several API workers (and
+# hosts, with shared storage) answer the polls of a job: only the one that
+# can tell its owner is gone reports it as interrupted
+OWNER = {"host": socket.gethostname(), "pid": os.getpid(), "instance": uuid.uuid4().hex}
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class BulletinJob:
+    def __init__(self, scope: str, period_id: str, class_ids: List[str], label: str, job_id: str = None):
+        self.id = job_id or str(uuid.uuid4())
+        self.scope = scope
+        self.period_id = period_id
+        self.class_ids = class_ids
+        self.label = label
+        self.status = PENDING
+        self.total = 0
+        self.done = 0
+        self.failed = 0
+        self.failures: List[Dict] = []
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.owner: Optional[Dict] = OWNER
+
+    @property
+    def artifact_path(self) -> str:
+        return os.path.join(STORAGE_DIR, f"{self.id}.zip")
+
+    @property
+    def metadata_path(self) -> str:
+        return os.path.join(STORAGE_DIR, f"{self.id}.json")
+
+    def eta_seconds(self) -> Optional[float]:
+        processed = self.done + self.failed
+        if self.status != RUNNING or not processed or not self.total:
+            return None
+        elapsed = time.time() - self.started_at
+        return round(elapsed / processed * (self.total - processed), 1)
+
+    def record_failure(self, student, error: Exception):
+        self.failed += 1
+        if len(self.failures) < MAX_RECORDED_FAILURES:
+            self.failures.append({
+                "student_id": student.id,
+                "registration_number": student.registration_number,
+                "error": str(error),
+            })
+
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id,
+            "scope": self.scope,
+            "label": self.label,
+            "period_id": self.period_id,
+            "class_ids": self.class_ids,
+            "status": self.status,
+            "total": self.total,
+            "done": self.done,
+            "failed": self.failed,
+            "failures": self.failures,
+            "eta_seconds": self.eta_seconds(),
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "download_url": f"/api/bulletins/jobs/{self.id}/download" if self.status == DONE else None,
+        }
+
+    def save(self):
+        os.makedirs(STORAGE_DIR, exist_ok=True)
+        tmp_path = self.metadata_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(dict(self.to_dict(), owner=self.owner), f)
+        os.replace(tmp_path, self.metadata_path)
+
+    @classmethod
+    def load(cls, job_id: str) -> Optional["BulletinJob"]:
+        if not valid_job_id(job_id):
+            return None
+        path = os.path.join(STORAGE_DIR, f"{job_id}.json")
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            data = json.load(f)
+        job = cls(data["scope"], data["period_id"], data["class_ids"], data["label"], job_id=data["id"])
+        for field in ("status", "total", "done", "failed", "error", "created_at", "started_at", "finished_at"):
+            setattr(job, field, data[field])
+        job.failures = data.get("failures", [])
+        job.owner = data.get("owner")
+        if job.status in (PENDING, RUNNING) and _owner_gone(job.owner):
+            job.status = FAILED
+            job.error = "Interrupted by a server restart"
+            job.save()
+        return job
+
+
+def valid_job_id(job_id: str) -> bool:
+    # Job ids end up in file paths: only the UUIDs we hand out are accepted
+    try:
+        return str(uuid.UUID(job_id)) == job_id
+    except ValueError:
+        return False
+
+
+def _owner_gone(owner: Optional[Dict]) -> bool:
+    """
+    Whether the process that ran a job is known to be gone. Jobs of this
+    process are in _jobs, so one loaded from disk with our pid belongs to a
+    previous process that had the same pid. Another host can't be checked.
+    """
+    if not owner:
+        # Written before owners were recorded
+        return True
+    if owner["host"] != OWNER["host"]:
+        return False
+    if owner["pid"] == OWNER["pid"]:
+        return owner["instance"] != OWNER["instance"]
+    if os.name == "nt":
+        # os.kill would terminate the process there
+        return False
+    try:
+        os.kill(owner["pid"], 0)
+    except ProcessLookupError:
+        return True
+    except PermissionError:
+        pass
+    return False
+
+
+_jobs: Dict[str, BulletinJob] = {}
+_jobs_lock = threading.Lock()
+_semaphore: Optional[asyncio.Semaphore] = None
+# Keep references so running tasks are not garbage collected
+_tasks = set()
+
+
+def resolve_class_ids(db, scope: str, establishment_id: str = None, class_id: str = None, level: str = None) -> List[str]:
+    """
+    Classes covered by a job. A level is the first word of the class name
+    ("6ème", "Tle"...) within an establishment.
+    """
+    if scope == "class":
+        return [class_id] if class_id and db.query(db_models.Class).get(class_id) else []
+
+    query = db.query(db_models.Class.id, db_models.Class.name).filter(
+        db_models.Class.establishment_id == establishment_id
+    ).order_by(db_models.Class.name)
+    classes = query.all()
+    if scope == "level":
+        classes = [c for c in classes if c.name.split(" ")[0].lower() == (level or "").lower()]
+    return [c.id for c in classes]
+
+
+def get_job(job_id: str) -> Optional[BulletinJob]:
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+    return job or BulletinJob.load(job_id)
+
+
+def list_jobs() -> List[BulletinJob]:
+    with _jobs_lock:
+        return sorted(_jobs.values(), key=lambda j: j.created_at, reverse=True)
+
+
+def _collect_render_jobs(job: BulletinJob):
+    # Runs in a thread: the DB session is synchronous. A class whose results
+    # get backfilled commits, which must not expire the previous classes' students
+    db = SessionLocal(expire_on_commit=False)
+    try:
+        per_class = []
+        for class_id in job.class_ids:
+            cls = db.query(db_models.Class).get(class_id)
+            folder = f"{cls.name}/" if cls and len(job.class_ids) > 1 else ""
+            per_class.append((class_id, folder, class_render_jobs(db, class_id, job.period_id)))
+        return per_class
+    finally:
+        db.close()
+
+
+async def _run(job: BulletinJob):
+    async with _semaphore:
+        job.status = RUNNING
+        job.started_at = time.time()
+        job.save()
+        part_path = job.artifact_path + ".part"
+        try:
+            per_class = await asyncio.to_thread(_collect_render_jobs, job)
+            job.total = sum(len(render_jobs) for _, _, render_jobs in per_class)
+            job.save()
+
+            # PDFs are already compressed: store them
+            with zipfile.ZipFile(part_path, "w", zipfile.ZIP_STORED) as archive:
+                for class_id, folder, render_jobs in per_class:
+                    async for student, pdf_content in render_class_bulletins(class_id, job.period_id, render_jobs):
+                        if isinstance(pdf_content, Exception):
+                            logger.error("Job %s: report card of student %s failed: %r", job.id, student.id, pdf_content)
+                            job.record_failure(student, pdf_content)
+                            continue
+                        name = f"{folder}bulletin_{student.registration_number}.pdf"
+                        await asyncio.to_thread(archive.writestr, name, pdf_content)
+                        job.done += 1
+            os.replace(part_path, job.artifact_path)
+            BULK_ZIP_BYTES.observe(os.path.getsize(job.artifact_path), "job")
+            job.status = DONE
+        except Exception as e:
+            logger.exception("Job %s failed", job.id)
+            job.status = FAILED
+            job.error = str(e)
+            if os.path.exists(part_path):
+                os.remove(part_path)
+        finally:
+            job.finished_at = time.time()
+            job.save()
+
+
+def submit_job(scope: str, period_id: str, class_ids: List[str], label: str) -> BulletinJob:
+    """
+    Registers a job and schedules it on the running event loop.
+    """
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(MAX_RUNNING_JOBS)
+
+    job = BulletinJob(scope, period_id, class_ids, label)
+    with _jobs_lock:
+        _jobs[job.id] = job
+    job.save()
+
+    task = asyncio.get_running_loop().create_task(_run(job))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return job
@@ -0,0 +1,85 @@
+from sqlalchemy.orm import Session
+from typing import AsyncIterator, Dict, List, Tuple
+from app.models import db_models
+from app.services.ranking import format_rank
+from app.services.results import get_class_results
+from app.services.pdf_cache import cache_key, pdf_cache
+from app.services.pdf_pool import render_many, render_class_report
+
+BULK_SCHOOL_INFO = {'name': 'Lycée Moderne', 'address': 'Lomé', 'phone': ''}
+
+
+def build_student_data(student, cls, period_label: str, result: dict):
+    return {
+        'name': f"{student.first_name} {student.last_name}",
+        'matricule': student.registration_number,
+        'academic_year': '2023-2024', # TODO: Get from enrollment/academic year
+        'period': period_label,
+        'class': cls.name if cls else "Unknown",
+        'rank': format_rank(result['rank']),
+        'general_avg': result['general_avg']
+    }
+
+
+def class_render_jobs(db: Session, class_id: str, period_id: str) -> List[Tuple[db_models.Student, Dict, List[Dict], Dict]]:
+    """
+    Everything needed to render the bulletins of a class, as
+    (student, student_data, grades_data, school_info) tuples ready for the
+    PDF pool. Students without grades for the period are left out.
+    """
+    # Results first: a first read may rebuild and commit them, expiring loaded objects
+    ranking = get_class_results(db, class_id, period_id)
+    students = db.query(db_models.Student).join(
+        db_models.StudentEnrollment, db_models.StudentEnrollment.student_id == db_models.Student.id
+    ).filter(db_models.StudentEnrollment.class_id == class_id).all()
+    if not students:
+        return []
+
+    cls = db.query(db_models.Class).get(class_id)
+
+    jobs = []
+    for student in students:
+        result = ranking.get(student.id)
+        if not result:
+            continue # Skip students with no grades
+        student_data = build_student_data(student, cls, period_id, result)
+        jobs.append((student, student_data, result['grades_data'], BULK_SCHOOL_INFO))
+    return jobs
+
+
+async def render_class_bulletins(class_id: str, period_id: str, jobs) -> AsyncIterator[Tuple]:
+    """
+    Yields (student, pdf bytes or exception) for class_render_jobs output.
+    Cached PDFs are returned first, the rest are rendered by the PDF pool
+    and added to the cache.
+    """
+    misses = []
+    for student, student_data, grades_data, school_info in jobs:
+        key = cache_key(student_data, grades_data, school_info)
+        pdf_content = await pdf_cache.get_async(class_id, period_id, key)
+        if pdf_content is not None:
+            yield student, pdf_content
+        else:
+            misses.append(((student, key), student_data, grades_data, school_info))
+
+    async for (student, key), pdf_content in render_many(misses):
+        if not isinstance(pdf_content, Exception):
+            await pdf_cache.put_async(class_id, period_id, key, pdf_content)
+        yield student, pdf_content
+
+
+async def render_class_pdf(class_id: str, period_id: str, jobs) -> bytes:
+    """
+    The whole class in a single multi-page PDF (print shop output), ordered
+    by student name and cached like individual bulletins.
+    """
+    ordered = sorted(jobs, key=lambda job: (job[0].last_name or "", job[0].first_name or ""))
+    students = [(student_data, grades_data) for _, student_data, grades_data, _ in ordered]
+    school_info = ordered[0][3]
+
+    key = cache_key([s for s, _ in students], [g for _, g in students], school_info)
+    pdf_content = await pdf_cache.get_async(class_id, period_id, key)
+    if pdf_content is None:
+        pdf_content = await render_class_report(students, school_info)
+        await pdf_cache.put_async(class_id, period_id, key, pdf_content)
+    return pdf_content
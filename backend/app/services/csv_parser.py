@@ -1,33 +1,99 @@
-import pandas as pd
+import csv
 import io
-from typing import List, Dict
+from typing import BinaryIO, Dict, Iterator, List, NamedTuple, Optional
+
+REQUIRED_COLUMNS = ['matricule', 'name', 'interro', 'devoir', 'compo']
+
+# Size of the reads from the uploaded file; only one chunk is held in memory
+CHUNK_SIZE = 64 * 1024
+
+
+class GradeRecord(NamedTuple):
+    """
+    One validated row of a grades CSV. `line` is the 1-based line in the file
+    and `error` is set when the row could not be used.
+    """
+    line: int
+    matricule: str
+    name: str
+    interro: Optional[float]
+    devoir: Optional[float]
+    compo: Optional[float]
+    error: Optional[str] = None
+
 
 class CSVParser:
     @staticmethod
-    def parse_grades_csv(file_content: bytes) -> List[Dict]:
+    def iter_grades_csv(stream: BinaryIO, chunk_size: int = CHUNK_SIZE) -> Iterator[GradeRecord]:
         """
-        Parses a CSV file containing student grades.
+        Streams a CSV file containing student grades, one typed record per row.
         Expected columns: matricule, name, interro, devoir, compo
+        The header is checked immediately; rows are read lazily in chunks.
         """
-        df = pd.read_csv(io.BytesIO(file_content))
-        
+        text = io.TextIOWrapper(io.BufferedReader(stream, buffer_size=chunk_size), encoding='utf-8-sig', newline='')
+        header_line = text.readline()
+        # Spreadsheets configured for French locales export with ';'
+        delimiter = ';' if header_line.count(';') > header_line.count(',') else ','
+        header = [col.strip().lower() for col in next(csv.reader([header_line], delimiter=delimiter), [])]
+
         # Basic validation
-        required_columns = ['matricule', 'name', 'interro', 'devoir', 'compo']
-        for col in required_columns:
-            if col not in df.columns:
+        for col in REQUIRED_COLUMNS:
+            if col not in header:
                 raise ValueError(f"Missing required column: {col}")
-        
-        # Clean data (replace NaN with 0 or empty string)
-        df = df.fillna(0)
-        
-        return df.to_dict('records')
+        index = {col: header.index(col) for col in REQUIRED_COLUMNS}
+
+        def records():
+            reader = csv.reader(text, delimiter=delimiter)
+            for line, row in enumerate(reader, start=2):
+                if not any(cell.strip() for cell in row):
+                    continue
+                cells = {col: (row[i].strip() if i < len(row) else '') for col, i in index.items()}
+                values = {}
+                error = None
+                for col in ('interro', 'devoir', 'compo'):
+                    try:
+                        values[col] = CSVParser.clamp_grade(cells[col])
+                    except ValueError:
+                        values[col] = None
+                        error = error or f"Invalid {col}: {cells[col]!r}"
+                yield GradeRecord(line, cells['matricule'], cells['name'], error=error, **values)
+
+        return records()
+
+    @staticmethod
+    def parse_grades_csv(file_content: bytes) -> List[Dict]:
+        """
+        Parses a whole CSV file containing student grades into dicts.
+        Expected columns: matricule, name, interro, devoir, compo
+        """
+        return [
+            {
+                'matricule': r.matricule,
+                'name': r.name,
+                'interro': r.interro or 0,
+                'devoir': r.devoir or 0,
+                'compo': r.compo or 0,
+            }
+            for r in CSVParser.iter_grades_csv(io.BytesIO(file_content))
+        ]
+
+    @staticmethod
+    def clamp_grade(value) -> Optional[float]:
+        """
+        Blank cells give None, non-numeric values raise ValueError and
+        numbers are clamped to the 0-20 scale.
+        """
+        if value is None or (isinstance(value, str) and not value.strip()):
+            return None
+        val = float(str(value).replace(',', '.'))
+        if val != val:
+            return None
+        return min(max(val, 0.0), 20.0)
 
     @staticmethod
     def validate_grade(value):
         try:
-            val = float(value)
-            if 0 <= val <= 20:
-                return val
-            return 0
+            val = CSVParser.clamp_grade(value)
+            return val if val is not None else 0
         except (ValueError, TypeError):
             return 0
@@ -0,0 +1,145 @@
+from sqlalchemy.orm import Session
+from typing import Dict, Iterable, List, Optional
+from app.core.data_versions import record_write
+from app.models import db_models
+from app.services.csv_parser import GradeRecord
+from app.services.ranking import subject_average
+from app.services.results import refresh_class_results
+
+# Rows are resolved and written in batches so that IN (...) lookups stay
+# below the bound-parameter limits of SQLite and PostgreSQL.
+BATCH_SIZE = 500
+
+def _chunks(rows: Iterable, size: int):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class GradeIngestion:
+    """
+    Upserts the grades of one class for a (subject, period) from CSV records.
+    Matricules are resolved with one query per batch, existing grades are
+    looked up the same way and everything is written with bulk insert/update
+    inside a single transaction. Invalid rows are reported, not fatal.
+    Blank cells insert no mark and keep the stored one on update.
+    """
+
+    def __init__(self, db: Session, class_id: str, subject_id: str, period_id: str):
+        self.db = db
+        self.class_id = class_id
+        self.subject_id = subject_id
+        self.period_id = period_id
+        self.received = 0
+        self.inserted = 0
+        self.updated = 0
+        self.errors: List[Dict] = []
+        self._seen = set()
+        self._student_ids = set()
+
+    def _error(self, line: int, matricule, message: str):
+        self.errors.append({'row': line, 'matricule': matricule, 'error': message})
+
+    def _validate(self, record: GradeRecord) -> Optional[GradeRecord]:
+        if not record.matricule:
+            self._error(record.line, None, "Missing matricule")
+            return None
+        if record.error:
+            self._error(record.line, record.matricule, record.error)
+            return None
+        if record.matricule in self._seen:
+            self._error(record.line, record.matricule, "Duplicate matricule in file")
+            return None
+        self._seen.add(record.matricule)
+        return record
+
+    def _write_batch(self, batch: List[GradeRecord]):
+        matricules = [r.matricule for r in batch]
+        students = dict(self.db.query(
+            db_models.Student.registration_number, db_models.Student.id
+        ).join(
+            db_models.StudentEnrollment, db_models.StudentEnrollment.student_id == db_models.Student.id
+        ).filter(
+            db_models.StudentEnrollment.class_id == self.class_id,
+            db_models.Student.registration_number.in_(matricules)
+        ).all())
+
+        resolved = []
+        for r in batch:
+            student_id = students.get(r.matricule)
+            if not student_id:
+                self._error(r.line, r.matricule, "Student not enrolled in this class")
+                continue
+            resolved.append((student_id, r))
+
+        existing = {row.student_id: row for row in self.db.query(
+            db_models.Grade.student_id, db_models.Grade.id,
+            db_models.Grade.interro_avg, db_models.Grade.devoir_avg, db_models.Grade.compo_grade,
+        ).filter(
+            db_models.Grade.subject_id == self.subject_id,
+            db_models.Grade.period_id == self.period_id,
+            db_models.Grade.student_id.in_([student_id for student_id, _ in resolved])
+        )} if resolved else {}
+
+        inserts, updates = [], []
+        for student_id, r in resolved:
+            marks = {'interro_avg': r.interro, 'devoir_avg': r.devoir, 'compo_grade': r.compo}
+            current = existing.get(student_id)
+            if current is not None:
+                # A blank cell leaves the stored mark as it is: re-uploading a
+                # partial sheet must not wipe the marks it doesn't carry
+                mapping = {column: value for column, value in marks.items() if value is not None}
+                merged = {column: getattr(current, column) if value is None else value
+                          for column, value in marks.items()}
+                mapping['period_avg'] = round(subject_average(*merged.values()), 2)
+                mapping['id'] = current.id
+                updates.append(mapping)
+            else:
+                mapping = dict(marks, period_avg=round(subject_average(*marks.values()), 2))
+                mapping.update({
+                    'id': db_models.generate_uuid(),
+                    'student_id': student_id,
+                    'subject_id': self.subject_id,
+                    'period_id': self.period_id,
+                })
+                inserts.append(mapping)
+            self._student_ids.add(student_id)
+
+        if inserts:
+            self.db.bulk_insert_mappings(db_models.Grade, inserts)
+        if updates:
+            self.db.bulk_update_mappings(db_models.Grade, updates)
+        if inserts or updates:
+            # The bulk mappings API fires no session events: bump the grades version by hand
+            record_write(self.db, db_models.Grade.__tablename__)
+        self.inserted += len(inserts)
+        self.updated += len(updates)
+
+    def run(self, records: Iterable[GradeRecord]) -> Dict:
+        def validated():
+            for record in records:
+                self.received += 1
+                if self._validate(record):
+                    yield record
+
+        try:
+            for batch in _chunks(validated(), BATCH_SIZE):
+                self._write_batch(batch)
+            if self._student_ids:
+                refresh_class_results(self.db, self.class_id, self.period_id, self._student_ids)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+        return {
+            'received': self.received,
+            'inserted': self.inserted,
+            'updated': self.updated,
+            'errors': sorted(self.errors, key=lambda e: e['row']),
+        }
@@ -0,0 +1,145 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from starlette.concurrency import run_in_threadpool
+from app.services.pdf_generator import TEMPLATE_VERSION
+
+# Rendered bulletins are stored on local disk under
+#   <CACHE_DIR>/<hash of (period_id, class_id)>/<sha256 of the render inputs>.pdf
+# The ids come from requests: they are hashed, never used as path components.
+# Keys are content addresses: any change to the student data, grade rows,
+# rank, school info or template version gives a new key, so a stale PDF can
+# never be served. Grade writes still drop the (class, period) directory so
+# the space is reclaimed right away, and the total size is bounded by LRU
+# (file mtimes are the access times, so every worker evicts in the same order).
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "../.."))
+CACHE_DIR = os.environ.get("BULLETIN_CACHE_DIR", os.path.join(backend_dir, "storage", "pdf_cache"))
+MAX_BYTES = int(os.environ.get("BULLETIN_CACHE_MAX_MB", 512)) * 1024 * 1024
+# Every API worker shares the directory but indexes it on its own, seeing
+# only its own writes in between: each one rescans it after writing this
+# fraction of the bound, so the directory stays under MAX_BYTES plus
+# workers x MAX_BYTES / RESCAN_FRACTION (6% per worker by default).
+RESCAN_FRACTION = 16
+
+
+def cache_key(student_data: Dict, grades_data: List[Dict], school_info: Dict) -> str:
+    payload = json.dumps([TEMPLATE_VERSION, student_data, grades_data, school_info], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class PDFCache:
+    def __init__(self, directory: str = CACHE_DIR, max_bytes: int = MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # path -> size, least recently used first; loaded from disk on first use
+        self._index: Optional[OrderedDict] = None
+        self._size = 0
+        # Bytes this process wrote since its last scan of the directory
+        self._written = 0
+        self.rescan_bytes = max(1, max_bytes // RESCAN_FRACTION)
+
+    def _scope_dir(self, class_id: str, period_id: str) -> str:
+        scope = hashlib.sha256(json.dumps([period_id, class_id]).encode("utf-8")).hexdigest()[:32]
+        return self._contained(os.path.join(self.directory, scope))
+
+    def _path(self, class_id: str, period_id: str, key: str) -> str:
+        return self._contained(os.path.join(self._scope_dir(class_id, period_id), f"{key}.pdf"))
+
+    def _contained(self, path: str) -> str:
+        root = os.path.realpath(self.directory)
+        if os.path.commonpath([root, os.path.realpath(path)]) != root:
+            raise ValueError(f"Cache path outside of {self.directory}: {path}")
+        return path
+
+    def _load_index(self, previous: Optional[OrderedDict] = None):
+        if self._index is not None:
+            return
+        # mtimes are coarse (a few ms): ties keep the order this process knows
+        known = {path: position for position, path in enumerate(previous or ())}
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".pdf"):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, known.get(path, -1), path, stat.st_size))
+        self._index = OrderedDict((path, size) for _, _, path, size in sorted(entries))
+        self._size = sum(self._index.values())
+        self._written = 0
+
+    def get(self, class_id: str, period_id: str, key: str) -> Optional[bytes]:
+        path = self._path(class_id, period_id, key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            self._load_index()
+            if path in self._index:
+                self._index.move_to_end(path)
+        try:
+            # mtime doubles as the access time for the LRU order across restarts
+            os.utime(path)
+        except FileNotFoundError:
+            pass
+        return data
+
+    def put(self, class_id: str, period_id: str, key: str, data: bytes):
+        path = self._path(class_id, period_id, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._load_index()
+            self._size -= self._index.pop(path, 0)
+            self._index[path] = len(data)
+            self._size += len(data)
+            self._written += len(data)
+            if self._written >= self.rescan_bytes:
+                # Pick up what the other workers wrote (and evicted) meanwhile
+                previous, self._index = self._index, None
+                self._load_index(previous)
+            self._evict()
+
+    def _evict(self):
+        while self._size > self.max_bytes and self._index:
+            path, size = self._index.popitem(last=False)
+            self._size -= size
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def invalidate(self, class_id: str, period_id: str):
+        scope_dir = self._scope_dir(class_id, period_id)
+        with self._lock:
+            if self._index is not None:
+                prefix = scope_dir + os.sep
+                for path in [p for p in self._index if p.startswith(prefix)]:
+                    self._size -= self._index.pop(path)
+            shutil.rmtree(scope_dir, ignore_errors=True)
+
+    # File I/O (and rmtree) off the event loop, for the API handlers
+    async def get_async(self, class_id: str, period_id: str, key: str) -> Optional[bytes]:
+        return await run_in_threadpool(self.get, class_id, period_id, key)
+
+    async def put_async(self, class_id: str, period_id: str, key: str, data: bytes):
+        await run_in_threadpool(self.put, class_id, period_id, key, data)
+
+    async def invalidate_async(self, class_id: str, period_id: str):
+        await run_in_threadpool(self.invalidate, class_id, period_id)
+
+
+pdf_cache = PDFCache()
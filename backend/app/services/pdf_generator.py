@@ -1,55 +1,106 @@
 from reportlab.lib.pagesizes import A4
 from reportlab.lib import colors
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image, PageBreak
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import cm
+from reportlab import rl_config
+from collections import OrderedDict
+from contextlib import contextmanager
 import io
+import threading
 
-class PDFGenerator:
-    def __init__(self):
-        self.styles = getSampleStyleSheet()
-        self.custom_style = ParagraphStyle(
-            'CustomStyle',
-            parent=self.styles['Normal'],
-            fontSize=10,
-            leading=12
-        )
+# Bump whenever the report card layout changes, so cached PDFs are not reused
+TEMPLATE_VERSION = "2"
+
+# Page streams are already deflated; the extra ASCII85 pass costs ~10% of the
+# render time in pure Python and makes every PDF 25% larger. ReportLab only
+# has the process-wide rl_config.useA85, read while the pages are formatted,
+# so it is switched for the duration of our own builds and put back after.
+_stream_encoding_lock = threading.RLock()
 
-    def generate_report_card(self, student_data, grades_data, school_info):
-        """
-        Generates a PDF report card for a single student.
-        """
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=2*cm, leftMargin=2*cm, topMargin=2*cm, bottomMargin=2*cm)
-        elements = []
 
+@contextmanager
+def _stream_encoding(ascii85):
+    with _stream_encoding_lock:
+        previous = rl_config.useA85
+        rl_config.useA85 = int(ascii85)
+        try:
+            yield
+        finally:
+            rl_config.useA85 = previous
+
+# Templates kept per generator (one per establishment and period in practice)
+MAX_TEMPLATES = 32
+
+GRADES_HEADER = ['Matière', 'Coef', 'Interro', 'Devoir', 'Compo', 'Moyenne', 'Appréciation']
+STUDENT_COL_WIDTHS = [9*cm, 8*cm]
+GRADES_COL_WIDTHS = [4*cm, 1*cm, 2*cm, 2*cm, 2*cm, 2*cm, 4*cm]
+SUMMARY_COL_WIDTHS = [13*cm, 4*cm]
+SIGNATURE_COL_WIDTHS = [6*cm, 5*cm, 6*cm]
+
+STUDENT_TABLE_STYLE = TableStyle([
+    ('FONTNAME', (0,0), (-1,-1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0,0), (-1,-1), 10),
+    ('BOTTOMPADDING', (0,0), (-1,-1), 6),
+])
+
+GRADES_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0,0), (-1,0), colors.grey),
+    ('TEXTCOLOR', (0,0), (-1,0), colors.whitesmoke),
+    ('ALIGN', (1,1), (-1,-1), 'CENTER'),
+    ('GRID', (0,0), (-1,-1), 0.5, colors.black),
+    ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0,0), (-1,0), 10),
+    ('BOTTOMPADDING', (0,0), (-1,0), 12),
+    ('BACKGROUND', (0,1), (-1,-1), colors.beige),
+])
+
+SUMMARY_TABLE_STYLE = TableStyle([
+    ('GRID', (0,0), (-1,-1), 1, colors.black),
+    ('FONTNAME', (0,0), (-1,-1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0,0), (-1,-1), 12),
+    ('ALIGN', (1,0), (1,1), 'CENTER'),
+    ('BACKGROUND', (0,0), (-1,-1), colors.lightgrey),
+])
+
+
+class ReportCardTemplate:
+    """
+    Report card with its constant parts built once: school header, title
+    block, spacers and signature table. Only the student, grades and
+    summary tables are created per student. Flowables are shared between
+    builds, so a template must not be used by two threads at once.
+    """
+
+    def __init__(self, styles, school_info, academic_year, period):
         # 1. Header (School Info)
-        elements.append(Paragraph(f"<b>{school_info['name']}</b>", self.styles['Title']))
-        elements.append(Paragraph(f"{school_info['address']}", self.styles['Normal']))
-        elements.append(Paragraph(f"Contact: {school_info['phone']}", self.styles['Normal']))
-        elements.append(Spacer(1, 1*cm))
+        self.header = [
+            Paragraph(f"<b>{school_info['name']}</b>", styles['Title']),
+            Paragraph(f"{school_info['address']}", styles['Normal']),
+            Paragraph(f"Contact: {school_info['phone']}", styles['Normal']),
+            Spacer(1, 1*cm),
+            Paragraph(f"<b>BULLETIN DE NOTES</b>", styles['Heading2']),
+            Paragraph(f"Année Scolaire: {academic_year}", styles['Normal']),
+            Paragraph(f"Période: {period}", styles['Normal']),
+            Spacer(1, 0.5*cm),
+        ]
+        self.section_spacer = Spacer(1, 1*cm)
+        self.signature_spacer = Spacer(1, 2*cm)
+
+        # 5. Signatures
+        self.signatures = Table([["Le Parent", "", "Le Chef d'Établissement"]], colWidths=SIGNATURE_COL_WIDTHS)
 
+    def elements(self, student_data, grades_data):
         # 2. Student Info
-        elements.append(Paragraph(f"<b>BULLETIN DE NOTES</b>", self.styles['Heading2']))
-        elements.append(Paragraph(f"Année Scolaire: {student_data['academic_year']}", self.styles['Normal']))
-        elements.append(Paragraph(f"Période: {student_data['period']}", self.styles['Normal']))
-        elements.append(Spacer(1, 0.5*cm))
-        
         student_info = [
             [f"Élève: {student_data['name']}", f"Matricule: {student_data['matricule']}"],
             [f"Classe: {student_data['class']}", f"Rang: {student_data['rank']}"]
         ]
-        t_student = Table(student_info, colWidths=[9*cm, 8*cm])
-        t_student.setStyle(TableStyle([
-            ('FONTNAME', (0,0), (-1,-1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0,0), (-1,-1), 10),
-            ('BOTTOMPADDING', (0,0), (-1,-1), 6),
-        ]))
-        elements.append(t_student)
-        elements.append(Spacer(1, 1*cm))
+        t_student = Table(student_info, colWidths=STUDENT_COL_WIDTHS)
+        t_student.setStyle(STUDENT_TABLE_STYLE)
 
         # 3. Grades Table
-        data = [['Matière', 'Coef', 'Interro', 'Devoir', 'Compo', 'Moyenne', 'Appréciation']]
+        data = [GRADES_HEADER]
         for g in grades_data:
             data.append([
                 g['subject'],
@@ -60,42 +111,92 @@ class PDFGenerator:
                 f"<b>{g['moyenne']:.2f}</b>",
                 g['appreciation']
             ])
-
-        t_grades = Table(data, colWidths=[4*cm, 1*cm, 2*cm, 2*cm, 2*cm, 2*cm, 4*cm])
-        t_grades.setStyle(TableStyle([
-            ('BACKGROUND', (0,0), (-1,0), colors.grey),
-            ('TEXTCOLOR', (0,0), (-1,0), colors.whitesmoke),
-            ('ALIGN', (1,1), (-1,-1), 'CENTER'),
-            ('GRID', (0,0), (-1,-1), 0.5, colors.black),
-            ('FONTNAME', (0,0), (-1,0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0,0), (-1,0), 10),
-            ('BOTTOMPADDING', (0,0), (-1,0), 12),
-            ('BACKGROUND', (0,1), (-1,-1), colors.beige),
-        ]))
-        elements.append(t_grades)
-        elements.append(Spacer(1, 1*cm))
+        t_grades = Table(data, colWidths=GRADES_COL_WIDTHS)
+        t_grades.setStyle(GRADES_TABLE_STYLE)
 
         # 4. Summary & Totals
         summary = [
             ["MOYENNE GÉNÉRALE", f"{student_data['general_avg']:.2f} / 20"],
             ["RÉSULTAT", "PASSAGE" if student_data['general_avg'] >= 10 else "REDOUBLEMENT"]
         ]
-        t_sum = Table(summary, colWidths=[13*cm, 4*cm])
-        t_sum.setStyle(TableStyle([
-            ('GRID', (0,0), (-1,-1), 1, colors.black),
-            ('FONTNAME', (0,0), (-1,-1), 'Helvetica-Bold'),
-            ('FONTSIZE', (0,0), (-1,-1), 12),
-            ('ALIGN', (1,0), (1,1), 'CENTER'),
-            ('BACKGROUND', (0,0), (-1,-1), colors.lightgrey),
-        ]))
-        elements.append(t_sum)
-        elements.append(Spacer(1, 2*cm))
+        t_sum = Table(summary, colWidths=SUMMARY_COL_WIDTHS)
+        t_sum.setStyle(SUMMARY_TABLE_STYLE)
 
-        # 5. Signatures
-        sig = [["Le Parent", "", "Le Chef d'Établissement"]]
-        t_sig = Table(sig, colWidths=[6*cm, 5*cm, 6*cm])
-        elements.append(t_sig)
+        return self.header + [
+            t_student,
+            self.section_spacer,
+            t_grades,
+            self.section_spacer,
+            t_sum,
+            self.signature_spacer,
+            self.signatures,
+        ]
+
+
+class PDFGenerator:
+    def __init__(self, use_templates=True, ascii85=False):
+        self.styles = getSampleStyleSheet()
+        self.custom_style = ParagraphStyle(
+            'CustomStyle',
+            parent=self.styles['Normal'],
+            fontSize=10,
+            leading=12
+        )
+        # With use_templates=False every report card is built from scratch (benchmark baseline)
+        self.use_templates = use_templates
+        self.ascii85 = ascii85
+        self._templates = OrderedDict()
+
+    def get_template(self, school_info, academic_year, period) -> ReportCardTemplate:
+        if not self.use_templates:
+            return ReportCardTemplate(self.styles, school_info, academic_year, period)
+
+        key = (school_info['name'], school_info['address'], school_info['phone'], academic_year, period)
+        template = self._templates.get(key)
+        if template is None:
+            template = ReportCardTemplate(self.styles, school_info, academic_year, period)
+            self._templates[key] = template
+            if len(self._templates) > MAX_TEMPLATES:
+                self._templates.popitem(last=False)
+        else:
+            self._templates.move_to_end(key)
+        return template
+
+    def _new_document(self, buffer):
+        return SimpleDocTemplate(buffer, pagesize=A4, rightMargin=2*cm, leftMargin=2*cm, topMargin=2*cm, bottomMargin=2*cm)
+
+    def _build(self, doc, elements):
+        with _stream_encoding(self.ascii85):
+            doc.build(elements)
+
+    def generate_report_card(self, student_data, grades_data, school_info):
+        """
+        Generates a PDF report card for a single student.
+        """
+        buffer = io.BytesIO()
+        doc = self._new_document(buffer)
+
+        template = self.get_template(school_info, student_data['academic_year'], student_data['period'])
+        self._build(doc, template.elements(student_data, grades_data))
+        buffer.seek(0)
+        return buffer.getvalue()
+
+    def generate_class_report(self, students, school_info):
+        """
+        Generates one PDF holding the report cards of several students,
+        given as (student_data, grades_data) pairs, one page break apart.
+        The document, fonts and header flowables are set up only once.
+        """
+        buffer = io.BytesIO()
+        doc = self._new_document(buffer)
+
+        elements = []
+        for student_data, grades_data in students:
+            if elements:
+                elements.append(PageBreak())
+            template = self.get_template(school_info, student_data['academic_year'], student_data['period'])
+            elements.extend(template.elements(student_data, grades_data))
 
-        doc.build(elements)
+        self._build(doc, elements)
         buffer.seek(0)
         return buffer.getvalue()
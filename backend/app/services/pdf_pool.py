@@ -0,0 +1,140 @@
+import asyncio
+import cProfile
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+from app.core import profile_capture
+from app.core.metrics import PDF_RENDER_DURATION, PDF_RENDERS
+from app.services.pdf_generator import PDFGenerator
+
+# ReportLab rendering is CPU bound and holds the GIL, so bulk generation is
+# spread over worker processes. PDF_WORKERS overrides the CPU count.
+PDF_WORKERS = int(os.environ.get("PDF_WORKERS", 0)) or os.cpu_count() or 1
+
+_executor: Optional[ProcessPoolExecutor] = None
+_worker_generator: Optional[PDFGenerator] = None
+
+
+def _init_worker():
+    # Each worker builds its stylesheet once and reuses it for every render
+    global _worker_generator
+    _worker_generator = PDFGenerator()
+
+
+def _timed(profile: bool, generate, *args) -> Tuple[bytes, float, Optional[Dict]]:
+    # (pdf, render seconds, cProfile stats when asked by a profile capture).
+    # The time is spent rendering, without the wait in the pool queue.
+    start = time.perf_counter()
+    if profile:
+        profiler = cProfile.Profile()
+        pdf = profiler.runcall(generate, *args)
+        profiler.create_stats()
+        return pdf, time.perf_counter() - start, profiler.stats
+    pdf = generate(*args)
+    return pdf, time.perf_counter() - start, None
+
+
+def _render(student_data: Dict, grades_data: List[Dict], school_info: Dict, profile: bool = False):
+    return _timed(profile, _worker_generator.generate_report_card, student_data, grades_data, school_info)
+
+
+def _render_class(students: List[Tuple[Dict, List[Dict]]], school_info: Dict, profile: bool = False):
+    return _timed(profile, _worker_generator.generate_class_report, students, school_info)
+
+
+def _rendered(kind: str, result: Tuple[bytes, float, Optional[Dict]]) -> bytes:
+    pdf, duration, stats = result
+    PDF_RENDERS.inc(kind, "ok")
+    PDF_RENDER_DURATION.observe(duration, kind)
+    profile_capture.add_render_stats(stats)
+    return pdf
+
+
+async def _submit(kind: str, fn, *args) -> bytes:
+    loop = asyncio.get_running_loop()
+    try:
+        result = await loop.run_in_executor(get_executor(), fn, *args, profile_capture.profiling_renders())
+    except Exception:
+        PDF_RENDERS.inc(kind, "error")
+        raise
+    return _rendered(kind, result)
+
+
+def _mp_context():
+    # The pool starts from a request handler, when the process already runs
+    # threads (aiosqlite, the threadpool): a forked worker could inherit a
+    # lock held by one of them and hang. The forkserver forks from a clean
+    # single-threaded process instead (spawn where there is none, e.g. Windows).
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context("forkserver")
+        # Imported once in the server, not by every worker
+        context.set_forkserver_preload([__name__])
+        return context
+    return multiprocessing.get_context("spawn")
+
+
+def get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=PDF_WORKERS, initializer=_init_worker, mp_context=_mp_context())
+    return _executor
+
+
+async def render_report_card(student_data: Dict, grades_data: List[Dict], school_info: Dict) -> bytes:
+    """
+    Renders one report card in the pool without blocking the event loop.
+    """
+    return await _submit("report_card", _render, student_data, grades_data, school_info)
+
+
+async def render_class_report(students: List[Tuple[Dict, List[Dict]]], school_info: Dict) -> bytes:
+    """
+    Renders several report cards into one multi-page PDF in a pool worker.
+    """
+    return await _submit("class_report", _render_class, students, school_info)
+
+
+async def render_many(jobs: Iterable[Tuple[Any, Dict, List[Dict], Dict]], window: int = None) -> AsyncIterator[Tuple[Any, Any]]:
+    """
+    Renders (key, student_data, grades_data, school_info) jobs in the pool and
+    yields (key, pdf bytes or exception) in completion order. At most `window`
+    renders are in flight, so finished PDFs never pile up in memory.
+    """
+    window = window or PDF_WORKERS * 2
+    loop = asyncio.get_running_loop()
+    executor = get_executor()
+    pending = {}
+    jobs = iter(jobs)
+
+    def submit_next() -> bool:
+        job = next(jobs, None)
+        if job is None:
+            return False
+        key, student_data, grades_data, school_info = job
+        future = loop.run_in_executor(executor, _render, student_data, grades_data, school_info,
+                                      profile_capture.profiling_renders())
+        pending[future] = key
+        return True
+
+    while len(pending) < window and submit_next():
+        pass
+
+    while pending:
+        done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        for future in done:
+            key = pending.pop(future)
+            if future.exception() is not None:
+                PDF_RENDERS.inc("report_card", "error")
+                yield key, future.exception()
+            else:
+                yield key, _rendered("report_card", future.result())
+            submit_next()
+
+
+def shutdown():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
@@ -0,0 +1,123 @@
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional
+from app.models import db_models
+
+# Weights of each grade component in the subject average (25% / 25% / 50%)
+INTERRO_WEIGHT = 0.25
+DEVOIR_WEIGHT = 0.25
+COMPO_WEIGHT = 0.5
+
+
+def subject_average(interro, devoir, compo) -> float:
+    # Missing values count as 0 once the student is registered in the subject
+    i = float(interro or 0)
+    d = float(devoir or 0)
+    c = float(compo or 0)
+    return (i * INTERRO_WEIGHT) + (d * DEVOIR_WEIGHT) + (c * COMPO_WEIGHT)
+
+
+def appreciation(average: float) -> str:
+    return 'Passable' if average >= 10 else 'Faible'  # Simple logic
+
+
+def format_rank(rank: Optional[int]) -> str:
+    if not rank:
+        return "-"
+    return f"{rank}e" if rank > 1 else "1er"
+
+
+def grade_line(subject_name: str, coefficient, interro, devoir, compo, average=None) -> Dict:
+    """
+    One row of the bulletin grades table. `average` is the stored period
+    average when available, otherwise it is computed from the components.
+    """
+    if average is None:
+        average = subject_average(interro, devoir, compo)
+    average = float(average)
+    return {
+        'subject': subject_name,
+        'coef': coefficient if coefficient is not None else 1,
+        'interro': float(interro or 0),
+        'devoir': float(devoir or 0),
+        'compo': float(compo or 0),
+        'moyenne': average,
+        'appreciation': appreciation(average)
+    }
+
+
+def assign_ranks(averages: Dict[str, float]) -> Dict[str, int]:
+    """
+    Competition ranking: equal averages share the best rank (1, 2, 2, 4...).
+    """
+    ranks = {}
+    previous_avg = None
+    previous_rank = 0
+    ordered = sorted(averages.items(), key=lambda item: item[1], reverse=True)
+    for position, (student_id, avg) in enumerate(ordered, start=1):
+        if avg != previous_avg:
+            previous_rank = position
+            previous_avg = avg
+        ranks[student_id] = previous_rank
+    return ranks
+
+
+class ClassRanking:
+    """
+    General averages and ranks of every student of a class for one period.
+    All grades and subject coefficients are loaded with a single joined query,
+    so ranking a whole class costs the same as ranking one student.
+    """
+
+    def __init__(self, class_id: str, period_id: str, results: Dict[str, Dict]):
+        self.class_id = class_id
+        self.period_id = period_id
+        self.results = results
+
+    @classmethod
+    def compute(cls, db: Session, class_id: str, period_id: str) -> "ClassRanking":
+        rows = db.query(
+            db_models.Grade.student_id,
+            db_models.Subject.name,
+            db_models.Subject.coefficient,
+            db_models.Grade.interro_avg,
+            db_models.Grade.devoir_avg,
+            db_models.Grade.compo_grade,
+        ).join(
+            db_models.Subject, db_models.Subject.id == db_models.Grade.subject_id
+        ).join(
+            db_models.StudentEnrollment, db_models.StudentEnrollment.student_id == db_models.Grade.student_id
+        ).filter(
+            db_models.StudentEnrollment.class_id == class_id,
+            db_models.Grade.period_id == period_id
+        ).order_by(db_models.Grade.student_id, db_models.Subject.name).all()
+
+        results = {}
+        for student_id, subject_name, coefficient, interro, devoir, compo in rows:
+            entry = results.setdefault(student_id, {'grades_data': [], 'total_points': 0.0, 'total_coef': 0})
+            line = grade_line(subject_name, coefficient, interro, devoir, compo)
+            entry['grades_data'].append(line)
+            entry['total_points'] += line['moyenne'] * line['coef']
+            entry['total_coef'] += line['coef']
+
+        averages = {}
+        for student_id, entry in results.items():
+            entry['general_avg'] = entry['total_points'] / entry['total_coef'] if entry['total_coef'] > 0 else 0
+            averages[student_id] = entry['general_avg']
+
+        for student_id, rank in assign_ranks(averages).items():
+            results[student_id]['rank'] = rank
+
+        return cls(class_id, period_id, results)
+
+    def get(self, student_id: str) -> Optional[Dict]:
+        return self.results.get(student_id)
+
+    def rank_label(self, student_id: str) -> str:
+        entry = self.results.get(student_id)
+        return format_rank(entry['rank'] if entry else None)
+
+    def leaderboard(self) -> List[Dict]:
+        return sorted(
+            ({'student_id': sid, 'general_avg': e['general_avg'], 'rank': e['rank']} for sid, e in self.results.items()),
+            key=lambda item: item['rank']
+        )
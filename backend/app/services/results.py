@@ -0,0 +1,274 @@
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from typing import Dict, Iterable, List, Optional
+from app.models import db_models
+from app.services.ranking import (
+    ClassRanking, assign_ranks, grade_line, subject_average,
+    INTERRO_WEIGHT, DEVOIR_WEIGHT, COMPO_WEIGHT,
+)
+
+# Materialized results layer.
+# Grade.period_avg holds the subject average of each grade row and
+# PeriodResult holds the general average and rank of each (student, period).
+# Writers call the refresh helpers below inside their transaction; readers
+# get bulletins and leaderboards with indexed lookups instead of recomputing.
+
+
+def set_period_avg(grade: db_models.Grade) -> None:
+    grade.period_avg = round(subject_average(grade.interro_avg, grade.devoir_avg, grade.compo_grade), 2)
+
+
+def student_class_id(db: Session, student_id: str) -> Optional[str]:
+    enrollment = db.query(db_models.StudentEnrollment.class_id).filter(
+        db_models.StudentEnrollment.student_id == student_id
+    ).first()
+    return enrollment.class_id if enrollment else None
+
+
+def _is_materialized(db: Session, class_id: str, period_id: str) -> bool:
+    return db.query(db_models.PeriodResult.id).filter(
+        db_models.PeriodResult.class_id == class_id,
+        db_models.PeriodResult.period_id == period_id
+    ).first() is not None
+
+
+def _needs_rebuild(db: Session, class_id: str, period_id: str) -> bool:
+    if _is_materialized(db, class_id, period_id):
+        return False
+    # A class without grades in the period has no results to materialize either
+    student_ids = db.query(db_models.StudentEnrollment.student_id).filter(
+        db_models.StudentEnrollment.class_id == class_id
+    )
+    return db.query(db_models.Grade.id).filter(
+        db_models.Grade.period_id == period_id,
+        db_models.Grade.student_id.in_(student_ids)
+    ).first() is not None
+
+
+def rerank_class(db: Session, class_id: str, period_id: str) -> None:
+    """
+    Recompute ranks from the stored general averages of the class.
+    Only rows whose rank actually moved are written back.
+    """
+    results = db.query(db_models.PeriodResult).filter(
+        db_models.PeriodResult.class_id == class_id,
+        db_models.PeriodResult.period_id == period_id
+    ).all()
+    ranks = assign_ranks({r.student_id: r.general_avg for r in results})
+    for r in results:
+        if r.rank != ranks[r.student_id]:
+            r.rank = ranks[r.student_id]
+    db.flush()
+
+
+def rebuild_class_results(db: Session, class_id: str, period_id: str) -> ClassRanking:
+    """
+    Full rebuild of a class from raw grades. Used to backfill classes that
+    were graded before the results layer existed and after bulk imports.
+    """
+    student_ids = db.query(db_models.StudentEnrollment.student_id).filter(
+        db_models.StudentEnrollment.class_id == class_id
+    )
+
+    # Backfill subject averages of legacy rows in a single statement. Only
+    # when there are some: the UPDATE would bump the grades version anyway
+    legacy = db.query(db_models.Grade).filter(
+        db_models.Grade.period_id == period_id,
+        db_models.Grade.student_id.in_(student_ids),
+        db_models.Grade.period_avg.is_(None)
+    )
+    if legacy.with_entities(db_models.Grade.id).first() is not None:
+        legacy.update({
+            db_models.Grade.period_avg: func.round(
+                func.coalesce(db_models.Grade.interro_avg, 0) * INTERRO_WEIGHT
+                + func.coalesce(db_models.Grade.devoir_avg, 0) * DEVOIR_WEIGHT
+                + func.coalesce(db_models.Grade.compo_grade, 0) * COMPO_WEIGHT, 2
+            )
+        }, synchronize_session=False)
+
+    ranking = ClassRanking.compute(db, class_id, period_id)
+
+    existing = {
+        r.student_id: r for r in db.query(db_models.PeriodResult).filter(
+            db_models.PeriodResult.class_id == class_id,
+            db_models.PeriodResult.period_id == period_id
+        ).all()
+    }
+    for student_id, entry in ranking.results.items():
+        result = existing.pop(student_id, None)
+        if result is None:
+            result = db_models.PeriodResult(student_id=student_id, period_id=period_id, class_id=class_id)
+            db.add(result)
+        result.total_points = entry['total_points']
+        result.total_coef = entry['total_coef']
+        result.general_avg = entry['general_avg']
+        result.rank = entry['rank']
+    # Students who no longer have grades in this period
+    for stale in existing.values():
+        db.delete(stale)
+
+    db.flush()
+    return ranking
+
+
+def refresh_student_result(db: Session, student_id: str, period_id: str) -> None:
+    """
+    Incremental update after one of the student's grades changed: only the
+    student's own totals are recomputed, then the class ranks are adjusted.
+    """
+    class_id = student_class_id(db, student_id)
+    if not class_id:
+        return
+
+    if not _is_materialized(db, class_id, period_id):
+        rebuild_class_results(db, class_id, period_id)
+        return
+
+    rows = db.query(
+        db_models.Subject.coefficient,
+        db_models.Grade.interro_avg,
+        db_models.Grade.devoir_avg,
+        db_models.Grade.compo_grade,
+    ).join(
+        db_models.Subject, db_models.Subject.id == db_models.Grade.subject_id
+    ).filter(
+        db_models.Grade.student_id == student_id,
+        db_models.Grade.period_id == period_id
+    ).order_by(db_models.Subject.name).all()
+
+    total_points = 0.0
+    total_coef = 0
+    for coefficient, interro, devoir, compo in rows:
+        line = grade_line(None, coefficient, interro, devoir, compo)
+        total_points += line['moyenne'] * line['coef']
+        total_coef += line['coef']
+
+    result = db.query(db_models.PeriodResult).filter(
+        db_models.PeriodResult.student_id == student_id,
+        db_models.PeriodResult.period_id == period_id
+    ).first()
+    if result is None:
+        result = db_models.PeriodResult(student_id=student_id, period_id=period_id, class_id=class_id)
+        db.add(result)
+    result.class_id = class_id
+    result.total_points = total_points
+    result.total_coef = total_coef
+    result.general_avg = total_points / total_coef if total_coef > 0 else 0
+    db.flush()
+
+    rerank_class(db, class_id, period_id)
+
+
+def refresh_class_results(db: Session, class_id: str, period_id: str, student_ids: Iterable[str] = None) -> None:
+    """
+    Refresh after a batch of grade writes. A single student goes through the
+    incremental path, anything larger is cheaper as one class rebuild.
+    """
+    student_ids = list(student_ids or [])
+    if len(student_ids) == 1:
+        refresh_student_result(db, student_ids[0], period_id)
+    else:
+        rebuild_class_results(db, class_id, period_id)
+
+
+def _ensure_materialized(db: Session, class_id: str, period_id: str) -> None:
+    # Readers always serve stored rows, so a first read backfills the class.
+    # Ungraded classes are left alone: reads must not turn into write transactions
+    if _needs_rebuild(db, class_id, period_id):
+        rebuild_class_results(db, class_id, period_id)
+        db.commit()
+
+
+def _grades_by_student(db: Session, period_id: str, student_filter) -> Dict[str, List[Dict]]:
+    rows = db.query(
+        db_models.Grade.student_id,
+        db_models.Subject.name,
+        db_models.Subject.coefficient,
+        db_models.Grade.interro_avg,
+        db_models.Grade.devoir_avg,
+        db_models.Grade.compo_grade,
+        db_models.Grade.period_avg,
+    ).join(
+        db_models.Subject, db_models.Subject.id == db_models.Grade.subject_id
+    ).filter(
+        db_models.Grade.period_id == period_id,
+        student_filter
+    ).order_by(db_models.Grade.student_id, db_models.Subject.name).all()
+
+    grades = {}
+    for student_id, subject_name, coefficient, interro, devoir, compo, period_avg in rows:
+        grades.setdefault(student_id, []).append(
+            grade_line(subject_name, coefficient, interro, devoir, compo, period_avg)
+        )
+    return grades
+
+
+def get_student_result(db: Session, student_id: str, class_id: str, period_id: str) -> Optional[Dict]:
+    """
+    Bulletin data of one student: stored average and rank plus grade lines.
+    """
+    _ensure_materialized(db, class_id, period_id)
+    result = db.query(db_models.PeriodResult).filter(
+        db_models.PeriodResult.student_id == student_id,
+        db_models.PeriodResult.period_id == period_id
+    ).first()
+    if result is None:
+        return None
+
+    grades = _grades_by_student(db, period_id, db_models.Grade.student_id == student_id)
+    return {
+        'grades_data': grades.get(student_id, []),
+        'general_avg': result.general_avg,
+        'rank': result.rank
+    }
+
+
+def get_class_results(db: Session, class_id: str, period_id: str) -> ClassRanking:
+    """
+    Bulletin data of a whole class, read from the results layer.
+    """
+    _ensure_materialized(db, class_id, period_id)
+    results = db.query(db_models.PeriodResult).filter(
+        db_models.PeriodResult.class_id == class_id,
+        db_models.PeriodResult.period_id == period_id
+    ).all()
+
+    student_ids = db.query(db_models.StudentEnrollment.student_id).filter(
+        db_models.StudentEnrollment.class_id == class_id
+    )
+    grades = _grades_by_student(db, period_id, db_models.Grade.student_id.in_(student_ids))
+    return ClassRanking(class_id, period_id, {
+        r.student_id: {
+            'grades_data': grades.get(r.student_id, []),
+            'total_points': r.total_points,
+            'total_coef': r.total_coef,
+            'general_avg': r.general_avg,
+            'rank': r.rank
+        } for r in results
+    })
+
+
+def get_leaderboard(db: Session, class_id: str, period_id: str) -> List[Dict]:
+    _ensure_materialized(db, class_id, period_id)
+
+    rows = db.query(
+        db_models.PeriodResult.student_id,
+        db_models.Student.first_name,
+        db_models.Student.last_name,
+        db_models.Student.registration_number,
+        db_models.PeriodResult.general_avg,
+        db_models.PeriodResult.rank,
+    ).join(
+        db_models.Student, db_models.Student.id == db_models.PeriodResult.student_id
+    ).filter(
+        db_models.PeriodResult.class_id == class_id,
+        db_models.PeriodResult.period_id == period_id
+    ).order_by(db_models.PeriodResult.rank).all()
+
+    return [{
+        'student_id': student_id,
+        'name': f"{first_name} {last_name}",
+        'matricule': matricule,
+        'general_avg': general_avg,
+        'rank': rank
+    } for student_id, first_name, last_name, matricule, general_avg, rank in rows]
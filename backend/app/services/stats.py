@@ -0,0 +1,151 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from sqlalchemy import func, or_
+from sqlalchemy.orm import Session
+from app.models import db_models
+
+# Dashboard statistics of an establishment (or of all of them).
+# Counts are computed once and kept in an in-process LRU cache with a TTL.
+# Writers that change a counter (students, assignments, grades) invalidate
+# the entries of their establishment, so the landing page of admins and
+# principals is a dict lookup. Each worker process has its own cache and
+# only sees its own writes: entries are also tagged with the data version
+# (table write counters) they were computed at, and a lookup at another
+# version misses, so a process never serves counts older than the ETag it
+# sends. The TTL bounds the lifetime of an entry either way.
+TTL_SECONDS = float(os.environ.get("STATS_CACHE_TTL", 60))
+MAX_ENTRIES = int(os.environ.get("STATS_CACHE_MAX_ENTRIES", 1024))
+
+StatsKey = Tuple[Optional[str], Optional[str]]
+# Opaque, compared for equality only: the counters returned by app.core.data_versions.etag()
+DataVersion = Optional[Tuple]
+
+
+class StatsCache:
+    def __init__(self, ttl: float = TTL_SECONDS, max_entries: int = MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # (establishment_id, period_id) -> (expires at, data version, stats), least recently used first
+        self._entries: "OrderedDict[StatsKey, Tuple[float, DataVersion, Dict]]" = OrderedDict()
+        # Bumped by every invalidation, see put()
+        self.generation = 0
+
+    def get(self, establishment_id: Optional[str], period_id: Optional[str],
+            data_version: DataVersion = None) -> Optional[Dict]:
+        key = (establishment_id, period_id)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, version, stats = entry
+            if expires < time.monotonic() or version != data_version:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return stats
+
+    def put(self, establishment_id: Optional[str], period_id: Optional[str], stats: Dict, generation: int = None,
+            data_version: DataVersion = None):
+        """
+        `generation` is the value read before computing `stats`: if a write
+        invalidated the cache meanwhile, the result may predate it and is dropped.
+        `data_version` is the one read before computing `stats` too.
+        """
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[(establishment_id, period_id)] = (time.monotonic() + self.ttl, data_version, stats)
+            self._entries.move_to_end((establishment_id, period_id))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, establishment_id: Optional[str] = None):
+        """
+        Drops the entries of an establishment, plus the all-establishments
+        ones which include it. Without an id everything is dropped.
+        """
+        with self._lock:
+            self.generation += 1
+            if establishment_id is None:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if key[0] in (establishment_id, None)]:
+                del self._entries[key]
+
+
+establishment_stats = StatsCache()
+
+
+def class_establishment_id(db: Session, class_id: str) -> Optional[str]:
+    return db.query(db_models.Class.establishment_id).filter(db_models.Class.id == class_id).scalar()
+
+
+def student_establishment_id(db: Session, student_id: str) -> Optional[str]:
+    return db.query(db_models.Student.establishment_id).filter(db_models.Student.id == student_id).scalar()
+
+
+def compute_stats(db: Session, establishment_id: Optional[str] = None, period_id: Optional[str] = None) -> Dict:
+    """
+    Counters of the admin dashboard. Grading completion is counted in grade
+    entries for `period_id`, by default the active period of each academic
+    year: every (student, subject) of an assigned class is expected, and
+    submitted once one of its three marks is entered.
+    """
+    students = db.query(func.count(db_models.Student.id))
+    # Teachers are the users with an assignment in one of the classes
+    teachers = db.query(func.count(func.distinct(db_models.TeacherAssignment.user_id))).join(
+        db_models.Class, db_models.Class.id == db_models.TeacherAssignment.class_id
+    )
+    classes = db.query(func.count(db_models.Class.id))
+    if establishment_id:
+        students = students.filter(db_models.Student.establishment_id == establishment_id)
+        teachers = teachers.filter(db_models.Class.establishment_id == establishment_id)
+        classes = classes.filter(db_models.Class.establishment_id == establishment_id)
+
+    # Distinct (class, subject, period) to grade: several teachers may share one
+    expected_pairs = db.query(
+        db_models.TeacherAssignment.class_id,
+        db_models.TeacherAssignment.subject_id,
+        db_models.Period.id.label("period_id"),
+    ).join(
+        db_models.Class, db_models.Class.id == db_models.TeacherAssignment.class_id
+    ).join(
+        db_models.Period, db_models.Period.academic_year_id == db_models.TeacherAssignment.academic_year_id
+    ).filter(
+        db_models.Period.id == period_id if period_id else db_models.Period.is_active == True
+    ).distinct()
+    if establishment_id:
+        expected_pairs = expected_pairs.filter(db_models.Class.establishment_id == establishment_id)
+    pairs = expected_pairs.subquery()
+
+    expected = db.query(func.count()).select_from(pairs).join(
+        db_models.StudentEnrollment, db_models.StudentEnrollment.class_id == pairs.c.class_id
+    )
+    submitted = expected.join(
+        db_models.Grade,
+        (db_models.Grade.student_id == db_models.StudentEnrollment.student_id)
+        & (db_models.Grade.subject_id == pairs.c.subject_id)
+        & (db_models.Grade.period_id == pairs.c.period_id)
+    ).filter(or_(
+        db_models.Grade.interro_avg.isnot(None),
+        db_models.Grade.devoir_avg.isnot(None),
+        db_models.Grade.compo_grade.isnot(None)
+    ))
+
+    expected_count = expected.scalar() or 0
+    submitted_count = submitted.scalar() or 0
+    return {
+        "totalStudents": students.scalar(),
+        "totalTeachers": teachers.scalar(),
+        "classesManaged": classes.scalar(),
+        "studentsTrend": 0,
+        "teachersTrend": 0,
+        "gradesSubmitted": submitted_count,
+        "gradesPending": expected_count - submitted_count,
+        "gradingCompletion": round(100 * submitted_count / expected_count) if expected_count else 0,
+    }
+
@@ -0,0 +1,74 @@
+import io
+import zipfile
+from typing import AsyncIterator, Callable, Optional, Tuple
+
+
+class _ChunkSink(io.RawIOBase):
+    """
+    Write-only, non-seekable target for ZipFile. Bytes written by the archive
+    are buffered until the stream writer drains them to the client.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class ZipStreamWriter:
+    """
+    Builds a ZIP archive incrementally. Because the target is not seekable,
+    zipfile writes each entry with a trailing data descriptor, so the bytes
+    of an entry can be sent as soon as it has been added.
+    """
+
+    def __init__(self, compression: int = zipfile.ZIP_STORED):
+        self._sink = _ChunkSink()
+        self._zip = zipfile.ZipFile(self._sink, mode="w", compression=compression)
+        self.size = 0
+
+    def add(self, name: str, data: bytes) -> bytes:
+        self._zip.writestr(name, data)
+        return self._drain()
+
+    def close(self) -> bytes:
+        # Writes the central directory
+        self._zip.close()
+        return self._drain()
+
+    def _drain(self) -> bytes:
+        data = self._sink.drain()
+        self.size += len(data)
+        return data
+
+
+async def stream_zip(entries: AsyncIterator[Tuple[str, bytes]], compression: int = zipfile.ZIP_STORED,
+                     on_complete: Optional[Callable[[int], None]] = None) -> AsyncIterator[bytes]:
+    """
+    Turns an async iterator of (filename, content) into ZIP bytes, one chunk per entry.
+    PDFs are already compressed, so entries are stored by default.
+    `on_complete` gets the archive size once it is fully written.
+    """
+    writer = ZipStreamWriter(compression)
+    async for name, content in entries:
+        chunk = writer.add(name, content)
+        if chunk:
+            yield chunk
+    yield writer.close()
+    if on_complete is not None:
+        on_complete(writer.size)
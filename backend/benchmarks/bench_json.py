@@ -0,0 +1,142 @@
+"""
+Serialization benchmark of large list responses: the response_model path
+(ORM objects validated through the Pydantic schema, then JSON encoded by
+FastAPI) against the fast path of app.core.responses (dicts built from the
+SQL result tuples, encoded by orjson). Both are served by real FastAPI
+routes over the ASGI transport, on a scratch SQLite database holding
+--rows synthetic grades and students, and must return the same JSON.
+
+    python benchmarks/bench_json.py --rows 10000 --repeat 20
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from datetime import date, datetime
+from decimal import Decimal
+from typing import List
+
+# Run from anywhere: python backend/benchmarks/bench_json.py
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+
+def populate(engine, rows):
+    from sqlalchemy.orm import Session
+    from app.core.database import Base
+    from app.models import db_models
+
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        establishment = db_models.Establishment(id=str(uuid.uuid4()), name="Bench", type="COLLEGE")
+        db.add(establishment)
+        students = [db_models.Student(
+            id=str(uuid.uuid4()), first_name=f"Prénom {i}", last_name=f"Nom {i}",
+            birth_date=date(2010, 1 + i % 12, 1 + i % 28), gender="MF"[i % 2],
+            email=f"eleve{i}@example.com", registration_number=f"MAT{i:06d}",
+            establishment_id=establishment.id, parent_name=f"Parent {i}",
+            parent_phone="+229 00 00 00", created_at=datetime(2025, 9, 1, 8, i % 60, i % 60),
+        ) for i in range(rows)]
+        db.add_all(students)
+        subject_id, period_id = str(uuid.uuid4()), str(uuid.uuid4())
+        db.add_all(db_models.Grade(
+            id=str(uuid.uuid4()), student_id=student.id, subject_id=subject_id, period_id=period_id,
+            interro_avg=Decimal(i % 20), devoir_avg=Decimal((i * 3) % 20) + Decimal("0.5"),
+            compo_grade=Decimal((i * 7) % 20) + Decimal("0.25"), period_avg=Decimal("12.34"),
+        ) for i, student in enumerate(students))
+        db.commit()
+
+
+def build_app(db_url):
+    from fastapi import Depends, FastAPI
+    from sqlalchemy import select
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+    from app.core.database import async_url, create_async_db_engine
+    from app.core.responses import fast_response, result_rows
+    from app.models import db_models, schemas
+
+    engine = create_async_db_engine(async_url(db_url))
+    sessions = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def get_db():
+        async with sessions() as session:
+            yield session
+
+    app = FastAPI()
+    cases = [
+        ("grades", db_models.Grade, schemas.GradeResponse),
+        ("students", db_models.Student, schemas.Student),
+    ]
+    def add_routes(name, model, schema):
+        columns = [getattr(model, field) for field in schema.model_fields]
+
+        @app.get(f"/{name}/model", response_model=List[schema])
+        async def model_path(db: AsyncSession = Depends(get_db)):
+            return (await db.execute(select(model).order_by(model.id))).scalars().all()
+
+        @app.get(f"/{name}/fast", response_model=List[schema])
+        async def fast_path(db: AsyncSession = Depends(get_db)):
+            return fast_response(result_rows(await db.execute(select(*columns).order_by(model.id))))
+
+    for case in cases:
+        add_routes(*case)
+
+    return app, engine, [name for name, _, _ in cases]
+
+
+async def run(args, db_url):
+    import httpx
+
+    app, engine, names = build_app(db_url)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for name in names:
+            model = await client.get(f"/{name}/model")
+            fast = await client.get(f"/{name}/fast")
+            if model.json() != fast.json():
+                raise SystemExit(f"{name}: the fast path returned a different body")
+
+            timings = {}
+            for path in ("model", "fast"):
+                durations = []
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    response = await client.get(f"/{name}/{path}")
+                    durations.append(time.perf_counter() - start)
+                timings[path] = statistics.median(durations)
+                print(f"{name:9} {path:6} {len(response.json()):6} rows  {len(response.content) / 1024:8.0f} KiB  "
+                      f"median {timings[path] * 1000:7.1f} ms")
+            print(f"{name:9} fast path is {timings['model'] / timings['fast']:.1f}x faster")
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000, help="rows per list")
+    parser.add_argument("--repeat", type=int, default=20, help="timed requests per path")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_json_")
+    db_url = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    # The app modules create their engines on import: point them at the scratch database
+    os.environ["DATABASE_URL"] = db_url
+    try:
+        from app.core.database import create_db_engine
+        from app.core.responses import orjson
+        print(f"encoder: {'orjson' if orjson else 'json (orjson not installed)'}")
+        engine = create_db_engine(db_url)
+        populate(engine, args.rows)
+        engine.dispose()
+        asyncio.run(run(args, db_url))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
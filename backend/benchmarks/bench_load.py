@@ -0,0 +1,140 @@
+"""
+Load benchmark of the API: concurrent clients hitting the list and save
+endpoints in process (ASGI transport, no network), reporting throughput and
+latency percentiles. Also measures list latency while bulletins are being
+generated, which shows whether one slow request stalls the event loop.
+
+Runs on a copy of the SQLite database, the original is never written.
+
+    python benchmarks/bench_load.py --requests 400 --concurrency 1 32
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+# Run from anywhere: python backend/benchmarks/bench_load.py
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def sample_ids(db_file):
+    conn = sqlite3.connect(db_file)
+    class_id, period_id = conn.execute(
+        "SELECT e.class_id, g.period_id FROM grades g "
+        "JOIN student_enrollments e ON e.student_id = g.student_id "
+        "GROUP BY e.class_id, g.period_id ORDER BY COUNT(*) DESC LIMIT 1"
+    ).fetchone()
+    subject_id, = conn.execute(
+        "SELECT g.subject_id FROM grades g JOIN student_enrollments e ON e.student_id = g.student_id "
+        "WHERE e.class_id = ? AND g.period_id = ? LIMIT 1", (class_id, period_id)
+    ).fetchone()
+    student_ids = [row[0] for row in conn.execute(
+        "SELECT student_id FROM student_enrollments WHERE class_id = ?", (class_id,)
+    )]
+    conn.close()
+    return class_id, period_id, subject_id, student_ids
+
+
+async def run_load(client, make_request, total, concurrency):
+    latencies = []
+    errors = 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            start = time.perf_counter()
+            response = await make_request(i)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return total / elapsed, latencies, errors
+
+
+def report(label, concurrency, throughput, latencies, errors):
+    print(f"{label:22} c={concurrency:<3} {throughput:8.1f} req/s   "
+          f"p50 {statistics.median(latencies) * 1000:7.1f} ms   p99 {percentile(latencies, 99) * 1000:7.1f} ms"
+          + (f"   {errors} errors" if errors else ""))
+
+
+async def main_async(args, ids):
+    import httpx
+    from app.main import app
+
+    class_id, period_id, subject_id, student_ids = ids
+    scenarios = {
+        "list grades": lambda client, i: client.get(
+            "/api/grades/", params={"subject_id": subject_id, "period_id": period_id}),
+        "list students": lambda client, i: client.get("/api/students/", params={"class_id": class_id}),
+        "save grade": lambda client, i: client.post("/api/grades/", json={
+            "student_id": student_ids[i % len(student_ids)], "subject_id": subject_id, "period_id": period_id,
+            "interro_avg": i % 20, "devoir_avg": (i * 3) % 20, "compo_grade": (i * 7) % 20}),
+    }
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        # Warm up connections, caches and the results layer
+        await client.get(f"/api/bulletins/ranking/{class_id}", params={"period_id": period_id})
+        for make_request in scenarios.values():
+            await make_request(client, 0)
+
+        for label, make_request in scenarios.items():
+            for concurrency in args.concurrency:
+                throughput, latencies, errors = await run_load(
+                    client, lambda i: make_request(client, i), args.requests, concurrency)
+                report(label, concurrency, throughput, latencies, errors)
+
+        # List latency while a whole class of bulletins is generated
+        # (the grade saves above invalidated its cached PDFs)
+        bulk = asyncio.create_task(client.get(
+            f"/api/bulletins/download-bulk/{class_id}", params={"period_id": period_id, "output": "pdf"}))
+        await asyncio.sleep(0)
+        concurrency = max(args.concurrency)
+        throughput, latencies, errors = await run_load(
+            client, lambda i: scenarios["list students"](client, i), args.requests, concurrency)
+        await bulk
+        report("list during bulletins", concurrency, throughput, latencies, errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database", default=os.path.join(backend_dir, "edumanager.db"),
+                        help="SQLite database to copy (needs graded students)")
+    parser.add_argument("--requests", type=int, default=400, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 32])
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_load_")
+    db_file = os.path.join(workdir, "bench.db")
+    shutil.copy(args.database, db_file)
+    # Must be set before the app (and its engines) are imported
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_file}"
+    os.environ["BULLETIN_CACHE_DIR"] = os.path.join(workdir, "pdf_cache")
+    os.environ["BULLETIN_STORAGE_DIR"] = os.path.join(workdir, "bulletins")
+    try:
+        print(f"requests per scenario: {args.requests}")
+        asyncio.run(main_async(args, sample_ids(db_file)))
+    finally:
+        from app.services import pdf_pool
+        pdf_pool.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Micro-benchmark of report card rendering: pages per second with every
+flowable rebuilt per student (baseline) versus the precompiled template,
+and the whole batch rendered as one multi-page class document. All three
+use the same stream encoding: binary, as the app renders, or ReportLab's
+default ASCII85 with --ascii85 (run both to see what the encoding costs).
+
+    python benchmarks/bench_pdf.py --pages 300
+    python benchmarks/bench_pdf.py --pages 300 --ascii85
+"""
+import argparse
+import os
+import sys
+import time
+
+# Run from anywhere: python backend/benchmarks/bench_pdf.py
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from app.services.pdf_generator import PDFGenerator
+
+SCHOOL_INFO = {'name': 'Lycée Moderne de Tokoin', 'address': 'Lomé, Togo', 'phone': '+228 22 21 00 00'}
+SUBJECTS = ["Mathématiques", "Français", "Anglais", "Physique-Chimie", "SVT", "Histoire-Géo", "EPS", "Philosophie",
+            "Allemand", "Espagnol", "Informatique", "Musique"]
+
+
+def sample_student(i):
+    grades_data = []
+    for j, subject in enumerate(SUBJECTS):
+        interro, devoir, compo = (i + j) % 20, (i * 3 + j) % 20, (i * 7 + j) % 20
+        moyenne = interro * 0.25 + devoir * 0.25 + compo * 0.5
+        grades_data.append({
+            'subject': subject, 'coef': 1 + j % 4, 'interro': float(interro), 'devoir': float(devoir),
+            'compo': float(compo), 'moyenne': moyenne, 'appreciation': 'Passable' if moyenne >= 10 else 'Faible'
+        })
+    student_data = {
+        'name': f"Élève {i}", 'matricule': f"MAT-{i:06d}", 'academic_year': '2025-2026',
+        'period': 'Trimestre 1', 'class': '6ème A', 'rank': f"{i + 1}e", 'general_avg': 8 + i % 10
+    }
+    return student_data, grades_data
+
+
+def run(generator, students):
+    size = 0
+    start = time.perf_counter()
+    for student_data, grades_data in students:
+        size += len(generator.generate_report_card(student_data, grades_data, SCHOOL_INFO))
+    return len(students) / (time.perf_counter() - start), size / len(students)
+
+
+def run_class_document(generator, students):
+    start = time.perf_counter()
+    size = len(generator.generate_class_report(students, SCHOOL_INFO))
+    return len(students) / (time.perf_counter() - start), size / len(students)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3, help="best of N runs")
+    parser.add_argument("--ascii85", action="store_true", help="ASCII85 encoded streams (ReportLab's default)")
+    args = parser.parse_args()
+
+    students = [sample_student(i) for i in range(args.pages)]
+    # Warm up fonts and imports
+    PDFGenerator(ascii85=args.ascii85).generate_report_card(*students[0], SCHOOL_INFO)
+
+    baseline, templated, class_document = (0, 0), (0, 0), (0, 0)
+    # Interleave the runs so machine noise hits both modes alike
+    for _ in range(args.repeat):
+        baseline = max(baseline, run(PDFGenerator(use_templates=False, ascii85=args.ascii85), students))
+        templated = max(templated, run(PDFGenerator(use_templates=True, ascii85=args.ascii85), students))
+        class_document = max(class_document, run_class_document(PDFGenerator(ascii85=args.ascii85), students))
+
+    print(f"pages: {args.pages}, best of {args.repeat}, {'ASCII85' if args.ascii85 else 'binary'} streams")
+    print(f"rebuilt per student:  {baseline[0]:8.1f} pages/s, {baseline[1] / 1024:.1f} KiB/page")
+    print(f"precompiled template: {templated[0]:8.1f} pages/s, {templated[1] / 1024:.1f} KiB/page "
+          f"({templated[0] / baseline[0]:.2f}x)")
+    print(f"single class document: {class_document[0]:7.1f} pages/s, {class_document[1] / 1024:.1f} KiB/page "
+          f"({class_document[0] / baseline[0]:.2f}x)")
+
+if __name__ == "__main__":
+    main()
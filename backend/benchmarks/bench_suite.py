@@ -0,0 +1,279 @@
+"""
+Benchmark suite of the hot endpoints, run against the FastAPI app in process
+(ASGI transport, no network) on a generated dataset: scripts/seed_data.py
+with a fixed --seed, so every run and every commit sees the same data.
+
+For each scenario it records latency percentiles, throughput and the number
+of SQL statements issued per request, prints them and writes them as JSON.
+Given the JSON of another run, --compare reports the scenarios that got
+slower or issue more queries, and exits with status 1 if there are any.
+
+    python benchmarks/bench_suite.py --output before.json
+    git checkout my-branch
+    python benchmarks/bench_suite.py --output after.json --compare before.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable, NamedTuple, Optional
+
+# Run from anywhere: python backend/benchmarks/bench_suite.py
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+
+class Scenario(NamedTuple):
+    name: str
+    request: Callable  # (client, i) -> awaitable response
+    requests: int
+    concurrency: int
+    # Untimed, before the scenario and before each request (e.g. dropping a cache to measure cold requests)
+    setup: Optional[Callable] = None
+    before: Optional[Callable] = None
+
+
+def percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+def git_commit():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=backend_dir,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=backend_dir,
+                               capture_output=True, text=True, check=True).stdout.strip()
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def sample_ids(db_file):
+    """The largest graded class and its ids, the same for every run on the same dataset."""
+    conn = sqlite3.connect(db_file)
+    class_id, period_id = conn.execute(
+        "SELECT e.class_id, g.period_id FROM grades g "
+        "JOIN student_enrollments e ON e.student_id = g.student_id "
+        "GROUP BY e.class_id, g.period_id ORDER BY COUNT(*) DESC, e.class_id, g.period_id LIMIT 1"
+    ).fetchone()
+    subject_id, = conn.execute(
+        "SELECT subject_id FROM teacher_assignments WHERE class_id = ? ORDER BY subject_id LIMIT 1", (class_id,)
+    ).fetchone()
+    teacher_id, = conn.execute(
+        "SELECT user_id FROM teacher_assignments WHERE class_id = ? ORDER BY user_id LIMIT 1", (class_id,)
+    ).fetchone()
+    establishment_id, = conn.execute("SELECT establishment_id FROM classes WHERE id = ?", (class_id,)).fetchone()
+    student_ids = [row[0] for row in conn.execute(
+        "SELECT student_id FROM student_enrollments WHERE class_id = ? ORDER BY student_id", (class_id,)
+    )]
+    counts = {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+              for table in ("establishments", "classes", "students", "grades")}
+    conn.close()
+    return dict(class_id=class_id, period_id=period_id, subject_id=subject_id, teacher_id=teacher_id,
+                establishment_id=establishment_id, student_ids=student_ids, counts=counts)
+
+
+class QueryCounter:
+    """Counts the statements sent to the database by the app's engines."""
+
+    def __init__(self, engines):
+        from sqlalchemy import event
+
+        self.count = 0
+        for engine in engines:
+            event.listen(engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args):
+        self.count += 1
+
+
+def scenarios(args, ids):
+    from app.services.pdf_cache import pdf_cache
+    from app.services.stats import establishment_stats
+
+    class_id, period_id, students = ids["class_id"], ids["period_id"], ids["student_ids"]
+    drop_bulletins = lambda *_: pdf_cache.invalidate(class_id, period_id)
+    return [
+        Scenario("list_grades", lambda client, i: client.get(
+            "/api/grades/", params={"class_id": class_id, "period_id": period_id}), args.requests, args.concurrency),
+        Scenario("my_assignments", lambda client, i: client.get(
+            "/api/teachers/my-assignments", params={"user_id": ids["teacher_id"]}), args.requests, args.concurrency),
+        Scenario("stats", lambda client, i: client.get(
+            "/api/establishments/stats", params={"establishment_id": ids["establishment_id"]}),
+            args.requests, args.concurrency),
+        Scenario("stats_cold", lambda client, i: client.get(
+            "/api/establishments/stats", params={"establishment_id": ids["establishment_id"]}),
+            args.requests, args.concurrency, before=lambda i: establishment_stats.invalidate()),
+        Scenario("save_grade", lambda client, i: client.post("/api/grades/", json={
+            "student_id": students[i % len(students)], "subject_id": ids["subject_id"], "period_id": period_id,
+            "interro_avg": i % 20, "devoir_avg": (i * 3) % 20, "compo_grade": (i * 7) % 20,
+        }), args.requests, args.concurrency),
+        # Cold renders: each student once, after dropping the class's cached bulletins
+        Scenario("download_single", lambda client, i: client.get(
+            f"/api/bulletins/download-single/{students[i % len(students)]}", params={"period_id": period_id}),
+            min(args.requests, len(students)), args.concurrency, setup=drop_bulletins),
+        Scenario("download_bulk", lambda client, i: client.get(
+            f"/api/bulletins/download-bulk/{class_id}", params={"period_id": period_id, "output": "pdf"}),
+            args.bulk_requests, 1, before=drop_bulletins),
+    ]
+
+
+async def run_scenario(client, scenario, counter):
+    latencies = []
+    errors = 0
+    indexes = iter(range(scenario.requests))
+    queries_before = counter.count
+
+    async def worker():
+        nonlocal errors
+        for i in indexes:
+            if scenario.before:
+                scenario.before(i)
+            start = time.perf_counter()
+            response = await scenario.request(client, i)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(scenario.concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        "requests": scenario.requests,
+        "concurrency": scenario.concurrency,
+        "throughput_rps": round(scenario.requests / elapsed, 2),
+        "mean_ms": round(statistics.mean(latencies) * 1000, 2),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p90_ms": round(percentile(latencies, 90) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(max(latencies) * 1000, 2),
+        "queries_per_request": round((counter.count - queries_before) / scenario.requests, 2),
+        "errors": errors,
+    }
+
+
+async def run_suite(args, ids):
+    import httpx
+    from app.core.database import async_engine, engine
+    from app.main import app
+
+    counter = QueryCounter([engine, async_engine.sync_engine])
+    selected = [s for s in scenarios(args, ids) if not args.only or s.name in args.only]
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        # Warm up connections, the results layer and the PDF workers
+        await client.get(f"/api/bulletins/ranking/{ids['class_id']}", params={"period_id": ids["period_id"]})
+        await client.get(f"/api/bulletins/download-single/{ids['student_ids'][0]}",
+                         params={"period_id": ids["period_id"]})
+        for scenario in selected:
+            await scenario.request(client, 0)
+            if scenario.setup:
+                scenario.setup()
+            results[scenario.name] = result = await run_scenario(client, scenario, counter)
+            print(f"{scenario.name:16} c={result['concurrency']:<3} {result['throughput_rps']:8.1f} req/s   "
+                  f"p50 {result['p50_ms']:8.1f} ms   p99 {result['p99_ms']:8.1f} ms   "
+                  f"{result['queries_per_request']:6.1f} queries/req"
+                  + (f"   {result['errors']} errors" if result["errors"] else ""))
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Prints the change of every scenario against the baseline, returns the regressed ones."""
+    regressions = []
+    print(f"\nagainst {baseline['meta'].get('commit')} (threshold {threshold:.0%}):")
+    for name, new in results.items():
+        old = baseline["scenarios"].get(name)
+        if old is None:
+            print(f"  {name:16} new scenario")
+            continue
+        p50 = new["p50_ms"] / old["p50_ms"] - 1 if old["p50_ms"] else 0
+        p99 = new["p99_ms"] / old["p99_ms"] - 1 if old["p99_ms"] else 0
+        queries = new["queries_per_request"] - old["queries_per_request"]
+        slower = p50 > threshold
+        # Fractions come from caches filled during the scenario, half a query is noise
+        more_queries = queries >= 0.5
+        flag = "REGRESSION" if slower or more_queries else ""
+        print(f"  {name:16} p50 {p50:+7.1%}   p99 {p99:+7.1%}   queries/req {queries:+6.1f}   {flag}")
+        if flag:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", default="medium", help="dataset preset of scripts/seed_data.py")
+    parser.add_argument("--seed", type=int, default=1, help="dataset random seed")
+    parser.add_argument("--database", help="SQLite database to copy instead of generating one")
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    parser.add_argument("--bulk-requests", type=int, default=3, help="requests of download_bulk")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--only", nargs="+", help="scenarios to run")
+    parser.add_argument("--output", help="write the results as JSON")
+    parser.add_argument("--compare", help="JSON results of a previous run")
+    parser.add_argument("--threshold", type=float, default=0.2, help="p50 slowdown counted as a regression")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_suite_")
+    db_file = os.path.join(workdir, "bench.db")
+    try:
+        if args.database:
+            shutil.copy(args.database, db_file)
+            dataset = {"database": os.path.abspath(args.database)}
+        else:
+            subprocess.run([sys.executable, os.path.join(backend_dir, "scripts", "seed_data.py"),
+                            "--database-url", f"sqlite:///{db_file}", "--scale", args.scale,
+                            "--seed", str(args.seed), "--no-test-accounts"],
+                           check=True, stdout=subprocess.DEVNULL)
+            dataset = {"scale": args.scale, "seed": args.seed}
+        ids = sample_ids(db_file)
+        dataset.update(ids.pop("counts"))
+
+        # Must be set before the app (and its engines) are imported
+        os.environ["DATABASE_URL"] = f"sqlite:///{db_file}"
+        os.environ["BULLETIN_CACHE_DIR"] = os.path.join(workdir, "pdf_cache")
+        os.environ["BULLETIN_STORAGE_DIR"] = os.path.join(workdir, "bulletins")
+        print(f"dataset: {dataset}")
+        results = asyncio.run(run_suite(args, ids))
+    finally:
+        if "app.services.pdf_pool" in sys.modules:
+            sys.modules["app.services.pdf_pool"].shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "dataset": dataset,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+        },
+        "scenarios": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"results written to {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
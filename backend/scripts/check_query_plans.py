@@ -0,0 +1,136 @@
+"""
+Checks that the hot queries (bulletins, grade list, teacher assignments)
+are served by indexes. The real code paths are run against the database,
+every SELECT they issue is captured and its plan is inspected. Exits with
+status 1 if a hot table is read with a full scan.
+
+    python scripts/check_query_plans.py [--database-url sqlite:///path/to.db]
+"""
+import argparse
+import asyncio
+import os
+import re
+import sys
+
+# If running from root: python backend/scripts/check_query_plans.py
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_dir = os.path.dirname(current_dir)
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from fastapi import Response
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.core.database import SQLALCHEMY_DATABASE_URL, async_url, create_async_db_engine, create_db_engine
+from app.core.pagination import encode_cursor
+from app.core import migrations
+from app.models import db_models
+from app.services.ranking import ClassRanking
+from app.services.results import get_class_results, get_student_result
+from app.api import grades, teachers
+
+# Tables that must never be scanned in full by the hot paths
+HOT_TABLES = ("grades", "student_enrollments", "teacher_assignments", "period_results")
+
+
+def capture_selects(engines, label, run):
+    captured = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            captured.append((label, statement, parameters))
+
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        run()
+    finally:
+        for engine in engines:
+            event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return captured
+
+
+def call_handler(async_engine, handler, **params):
+    # Route handlers take an AsyncSession, as they do behind FastAPI
+    async def call():
+        async with AsyncSession(async_engine) as session:
+            result = await handler(db=session, **params)
+        await async_engine.dispose()
+        return result
+    return asyncio.run(call())
+
+
+def full_scans(conn, statement, parameters):
+    if conn.dialect.name == "sqlite":
+        rows = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+        plan = [row[-1] for row in rows]
+        # SEARCH is an index lookup; SCAN reads the whole table, or the whole
+        # of an index ("SCAN grades USING INDEX ...") which is no better
+        tables = [m.group(1) for line in plan for m in [re.match(r"SCAN (\w+)", line.strip())] if m]
+    else:
+        plan = [row[0] for row in conn.exec_driver_sql(f"EXPLAIN {statement}", parameters).fetchall()]
+        tables = [m.group(1) for line in plan for m in [re.search(r"Seq Scan on (\w+)", line)] if m]
+    return plan, [t for t in tables if t in HOT_TABLES]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=SQLALCHEMY_DATABASE_URL)
+    parser.add_argument("--verbose", action="store_true", help="print every plan")
+    args = parser.parse_args()
+
+    engine = create_db_engine(args.database_url)
+    async_engine = create_async_db_engine(async_url(args.database_url))
+    migrations.upgrade(engine)
+    if engine.dialect.name == "sqlite":
+        # Give the planner row counts, as a production database would have
+        with engine.begin() as conn:
+            conn.execute(text("ANALYZE"))
+
+    db = Session(engine)
+    sample = db.query(
+        db_models.Grade.student_id, db_models.Grade.subject_id, db_models.Grade.period_id,
+        db_models.StudentEnrollment.class_id
+    ).join(
+        db_models.StudentEnrollment, db_models.StudentEnrollment.student_id == db_models.Grade.student_id
+    ).first()
+    assignment = db.query(db_models.TeacherAssignment).first()
+    if not sample or not assignment:
+        print("The database needs at least one grade and one teacher assignment (run a seed script first).")
+        return 1
+    student_id, subject_id, period_id, class_id = sample
+
+    checks = [
+        ("bulletin: class ranking", lambda: ClassRanking.compute(db, class_id, period_id)),
+        ("bulletin: class results", lambda: get_class_results(db, class_id, period_id)),
+        ("bulletin: single student", lambda: get_student_result(db, student_id, class_id, period_id)),
+        ("grade list", lambda: call_handler(
+            async_engine, grades.list_grades, response=Response(), subject_id=subject_id, period_id=period_id)),
+        ("grade list: class page", lambda: call_handler(
+            async_engine, grades.list_grades, response=Response(), class_id=class_id, subject_id=subject_id,
+            period_id=period_id, cursor=encode_cursor([""]), limit=50, compact=True)),
+        ("teacher assignments", lambda: call_handler(async_engine, teachers.get_my_assignments, user_id=assignment.user_id)),
+    ]
+
+    failures = 0
+    with engine.connect() as conn:
+        for label, run in checks:
+            for _, statement, parameters in capture_selects([engine, async_engine.sync_engine], label, run):
+                plan, scanned = full_scans(conn, statement, parameters)
+                status = "FULL SCAN of " + ", ".join(scanned) if scanned else "ok"
+                if scanned:
+                    failures += 1
+                if scanned or args.verbose:
+                    print(f"[{status}] {label}\n  {' '.join(statement.split())}")
+                    for line in plan:
+                        print(f"    {line}")
+            print(f"{label}: checked")
+    db.close()
+
+    print(f"{failures} statement(s) with full scans of hot tables" if failures else "All hot queries use indexes")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
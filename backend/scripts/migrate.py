@@ -0,0 +1,40 @@
+"""
+Applies pending schema migrations (app/core/migrations/versions).
+
+    python scripts/migrate.py [--database-url URL] [--status]
+"""
+import argparse
+import os
+import sys
+
+# If running from root: python backend/scripts/migrate.py
+current_dir = os.path.dirname(os.path.abspath(__file__))
+backend_dir = os.path.dirname(current_dir)
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
+
+from app.core.database import SQLALCHEMY_DATABASE_URL, create_db_engine
+from app.core import migrations
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=SQLALCHEMY_DATABASE_URL)
+    parser.add_argument("--status", action="store_true", help="list migrations without applying them")
+    args = parser.parse_args()
+
+    engine = create_db_engine(args.database_url)
+    if args.status:
+        applied = migrations.applied_versions(engine)
+        for migration in migrations.load_migrations():
+            state = "applied" if migration.version in applied else "pending"
+            print(f"{state:8} {migration}")
+        return 0
+
+    applied = migrations.upgrade(engine)
+    print(f"Applied {len(applied)} migration(s)" if applied else "Database is up to date")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,188 +1,297 @@
-import sys
+"""
+Synthetic dataset generator, from the demo data to production-sized
+databases for performance testing.
+
+The size is establishments x classes x students (per class) x subjects x
+periods, from a --scale preset or the individual options. Rows are built in
+memory and written with bulk INSERTs of --batch-size rows, one transaction
+per establishment; ids increase within a run so the inserts append to the
+indexes instead of scattering. Existing data is kept, a run only adds.
+
+    python scripts/seed_data.py                   # demo: 2 schools, 2,000 students
+    python scripts/seed_data.py --scale large     # 100,000 students, 3M grades
+    python scripts/seed_data.py --scale large --establishments 5 --grade-ratio 0.5
+"""
+import argparse
 import os
 import random
-import uuid
+import sys
+import time
 from datetime import date, timedelta
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
 
-# setup path
 # If running from root: python backend/scripts/seed_data.py
-# __file__ = backend/scripts/seed_data.py
-# dirname = backend/scripts
-# parent = backend
 current_dir = os.path.dirname(os.path.abspath(__file__))
 backend_dir = os.path.dirname(current_dir)
-sys.path.append(backend_dir)
-print(f"Added {backend_dir} to sys.path")
-
-try:
-    from app.core.database import Base, DATABASE_URL
-    from app.models import db_models
-    from faker import Faker
-    fake = Faker(['fr_FR'])
-except ImportError as e:
-    print(f"ImportError during setup: {e}")
-    sys.exit(1)
-
-def init_db():
-    print(f"Connecting to DB at {DATABASE_URL}")
-    engine = create_engine(DATABASE_URL)
-    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-    return SessionLocal()
-
-def seed_data():
-    try:
-        db = init_db()
-        print("Beginning data seeding...")
-
-        schools_data = [
-            {"name": "Lycée Moderne de Lomé", "type": "LYCEE"},
-            {"name": "Collège Saint-Joseph", "type": "COLLEGE"}
-        ]
-
-        subjects_list = [
-            "Mathématiques", "Français", "Anglais", "Physique-Chimie", 
-            "SVT", "Histoire-Géo", "EPS", "Philosophie"
-        ]
-
-        classes_list = [
-            "6ème A", "6ème B", "5ème A", "5ème B", 
-            "4ème A", "4ème B", "3ème A", "3ème B", 
-            "2nde A", "2nde C", "1ère A", "1ère C", "Tle A", "Tle C"
-        ]
-
-        for school_info in schools_data:
-            print(f"Creating school: {school_info['name']}")
-            establishment = db_models.Establishment(
-                name=school_info['name'],
-                type=school_info['type'],
-                address=fake.address(),
-                phone=fake.phone_number()
-            )
-            db.add(establishment)
-            db.flush()
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
 
-            year = db_models.AcademicYear(
-                label="2025-2026",
-                is_active=True,
-                establishment_id=establishment.id
-            )
-            db.add(year)
-            db.flush()
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from app.core.database import DATABASE_URL, create_db_engine
+from app.core import migrations
+from app.core.data_versions import record_write
+from app.models import db_models
+from app.services.ranking import INTERRO_WEIGHT, DEVOIR_WEIGHT, COMPO_WEIGHT
 
-            periods = []
-            for i, p_name in enumerate(["Trimestre 1", "Trimestre 2", "Trimestre 3"]):
-                period = db_models.Period(
-                    name=p_name,
-                    is_active=(i == 0),
-                    start_date=date(2025, 9, 15) + timedelta(days=i*90),
-                    end_date=date(2025, 12, 15) + timedelta(days=i*90),
-                    academic_year_id=year.id
-                )
-                db.add(period)
-                periods.append(period)
-            db.flush()
-            current_period = periods[0] # Seeding grades for T1
-
-            subjects = []
-            for subj_name in subjects_list:
-                subject = db_models.Subject(
-                    name=subj_name,
-                    coefficient=random.randint(1, 4),
-                    establishment_id=establishment.id
-                )
-                db.add(subject)
-                subjects.append(subject)
-            db.flush()
+SCALES = {
+    # The former seed: every student graded in about half of the subjects of the first term
+    "demo": dict(establishments=2, classes=10, students=100, subjects=8, periods=3, graded_periods=1, grade_ratio=0.5),
+    "medium": dict(establishments=5, classes=20, students=50, subjects=10, periods=3, graded_periods=3, grade_ratio=1.0),
+    "large": dict(establishments=20, classes=50, students=100, subjects=10, periods=3, graded_periods=3, grade_ratio=1.0),
+}
+
+SCHOOL_NAMES = ["Lycée Moderne de Lomé", "Collège Saint-Joseph", "Lycée de Tokoin", "Collège Protestant",
+                "Lycée d'Adidogomé", "Collège Notre-Dame", "Lycée de Bè", "Collège Jean Piaget"]
+LEVELS = ["6ème", "5ème", "4ème", "3ème", "2nde", "1ère", "Tle"]
+SUBJECTS = ["Mathématiques", "Français", "Anglais", "Physique-Chimie", "SVT", "Histoire-Géo", "EPS",
+            "Philosophie", "Espagnol", "Allemand", "Économie", "Informatique", "Arts plastiques", "Musique"]
+FIRST_NAMES = {
+    "M": ["Koffi", "Kodjo", "Yao", "Komla", "Kossi", "Ama", "Mensah", "Lucas", "Hugo", "Louis", "Jules",
+          "Arthur", "Gabriel", "Nathan", "Étienne", "Mawuli", "Sena", "Edem", "Elom", "Kafui"],
+    "F": ["Akossiwa", "Adjo", "Afi", "Ablavi", "Abra", "Ayélé", "Emma", "Léa", "Chloé", "Manon", "Jade",
+          "Camille", "Inès", "Sarah", "Élodie", "Dzifa", "Enyonam", "Yawa", "Mawussi", "Esi"],
+}
+LAST_NAMES = ["Agbeko", "Amouzou", "Adjavon", "Kpodar", "Lawson", "Mensah", "Olympio", "Gnassingbé", "Tchalla",
+              "Akakpo", "Dossou", "Ayivi", "Koudjo", "Attiogbé", "Martin", "Bernard", "Dubois", "Durand",
+              "Lefebvre", "Moreau", "Laurent", "Simon", "Michel", "Garcia", "David", "Bertrand", "Roux",
+              "Fontaine", "Chevalier", "Besson"]
+
+# Fixed accounts of the login screen
+TEST_ACCOUNTS = [
+    {"name": "Thomas Anderson", "email": "admin@lycee.tg", "can_generate_bulletins": True},
+    {"name": "M. Dubois", "email": "teacher@lycee.tg", "can_generate_bulletins": False},
+]
+
+
+class Ids:
+    """
+    UUID-formatted ids increasing within a run: a random 64-bit run prefix
+    followed by a counter.
+    """
+
+    def __init__(self, rng: random.Random):
+        self.prefix = rng.getrandbits(64) << 64
+        self.count = 0
+
+    def __call__(self) -> str:
+        self.count += 1
+        h = f"{self.prefix | self.count:032x}"
+        return f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+
+
+# On SQLite the big tables skip SQLAlchemy's per-row parameter processing,
+# which costs as much as the inserts: their rows only hold plain values that
+# sqlite3 binds as they are, and every column with a Python default is given
+RAW_TABLES = {"students", "student_enrollments", "grades"}
+
+
+class BulkWriter:
+    """Buffers rows per table and inserts them --batch-size at a time."""
+
+    def __init__(self, db: Session, batch_size: int):
+        self.db = db
+        self.batch_size = batch_size
+        self.buffers = {}
+        self.counts = {}
+        self.raw = db.get_bind().dialect.name == "sqlite"
+        if self.raw:
+            # 256 MB of page cache keeps the index pages of the big tables in memory
+            db.connection().exec_driver_sql("PRAGMA cache_size = -262144")
+
+    def add(self, model, row: dict):
+        buffer = self.buffers.setdefault(model, [])
+        buffer.append(row)
+        if len(buffer) >= self.batch_size:
+            self.flush(model)
 
-            classes = []
-            # Select 10 classes
-            selected_classes = classes_list[:10]
-            for class_name in selected_classes:
-                cls = db_models.Class(
-                    name=class_name,
-                    academic_year_id=year.id,
-                    establishment_id=establishment.id
-                )
-                db.add(cls)
-                classes.append(cls)
+    def flush(self, model=None):
+        for table_model in ([model] if model else list(self.buffers)):
+            rows = self.buffers.get(table_model)
+            if rows:
+                name = table_model.__tablename__
+                if self.raw and name in RAW_TABLES:
+                    columns = list(rows[0])
+                    sql = f"INSERT INTO {name} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+                    self.db.connection().exec_driver_sql(sql, [tuple(row.values()) for row in rows])
+                    record_write(self.db, name)
+                else:
+                    self.db.execute(insert(table_model.__table__), rows)
+                self.counts[name] = self.counts.get(name, 0) + len(rows)
+                self.buffers[table_model] = []
+
+
+def class_names(count):
+    sections = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    return [f"{LEVELS[i % len(LEVELS)]} {sections[(i // len(LEVELS)) % len(sections)]}"
+            + (f"{i // (len(LEVELS) * len(sections)) + 1}" if i >= len(LEVELS) * len(sections) else "")
+            for i in range(count)]
+
+
+def seed_establishment(writer: BulkWriter, rng: random.Random, ids: Ids, run_tag: str, index: int, args) -> dict:
+    establishment_id = ids()
+    writer.add(db_models.Establishment, {
+        "id": establishment_id,
+        "name": SCHOOL_NAMES[index % len(SCHOOL_NAMES)] + (f" {index // len(SCHOOL_NAMES) + 1}" if index >= len(SCHOOL_NAMES) else ""),
+        "type": "LYCEE" if index % 2 == 0 else "COLLEGE",
+        "address": f"{rng.randint(1, 300)} rue {rng.choice(LAST_NAMES)}, Lomé",
+        "phone": f"+228 22 {rng.randint(10, 99)} {rng.randint(10, 99)} {rng.randint(10, 99)}",
+    })
+    year_id = ids()
+    writer.add(db_models.AcademicYear, {"id": year_id, "label": "2025-2026", "is_active": True,
+                                        "establishment_id": establishment_id})
+    period_ids = []
+    for p in range(args.periods):
+        period_ids.append(ids())
+        writer.add(db_models.Period, {
+            "id": period_ids[-1], "name": f"Trimestre {p + 1}", "is_active": p == 0,
+            "start_date": date(2025, 9, 15) + timedelta(days=p * 90),
+            "end_date": date(2025, 12, 15) + timedelta(days=p * 90),
+            "academic_year_id": year_id,
+        })
+    graded_periods = period_ids[:args.graded_periods]
+
+    subject_ids = []
+    for s in range(args.subjects):
+        subject_ids.append(ids())
+        name = SUBJECTS[s % len(SUBJECTS)] + (f" {s // len(SUBJECTS) + 1}" if s >= len(SUBJECTS) else "")
+        writer.add(db_models.Subject, {"id": subject_ids[-1], "name": name, "coefficient": rng.randint(1, 4),
+                                       "establishment_id": establishment_id})
+
+    class_ids = []
+    for name in class_names(args.classes):
+        class_ids.append(ids())
+        writer.add(db_models.Class, {"id": class_ids[-1], "name": name, "academic_year_id": year_id,
+                                     "establishment_id": establishment_id})
+
+    # One teacher per subject and group of up to --classes-per-teacher classes
+    for s, subject_id in enumerate(subject_ids):
+        for start in range(0, len(class_ids), args.classes_per_teacher):
+            teacher_id = ids()
+            last_name = rng.choice(LAST_NAMES)
+            writer.add(db_models.User, {
+                "id": teacher_id, "name": f"Prof. {last_name}",
+                "email": f"prof.{teacher_id[-8:]}.{run_tag}@ecole.tg",
+            })
+            for class_id in class_ids[start:start + args.classes_per_teacher]:
+                writer.add(db_models.TeacherAssignment, {"id": ids(), "user_id": teacher_id, "class_id": class_id,
+                                                         "subject_id": subject_id, "academic_year_id": year_id})
+
+    random_ = rng.random
+    for class_id in class_ids:
+        for _ in range(args.students):
+            student_id = ids()
+            gender = "M" if random_() < 0.5 else "F"
+            first_name = rng.choice(FIRST_NAMES[gender])
+            last_name = rng.choice(LAST_NAMES)
+            writer.add(db_models.Student, {
+                "id": student_id, "first_name": first_name, "last_name": last_name,
+                "birth_date": f"{2008 + int(random_() * 8)}-{1 + int(random_() * 12):02d}-{1 + int(random_() * 28):02d}",
+                "gender": gender, "address": "Lomé", "establishment_id": establishment_id,
+                "registration_number": f"MAT-{run_tag}-{ids.count:08d}",
+                "parent_name": f"{rng.choice(FIRST_NAMES['M' if random_() < 0.5 else 'F'])} {last_name}",
+                "parent_phone": f"+228 90 {rng.randint(10, 99)} {rng.randint(10, 99)} {rng.randint(10, 99)}",
+            })
+            writer.add(db_models.StudentEnrollment, {"id": ids(), "student_id": student_id, "class_id": class_id,
+                                                     "academic_year_id": year_id})
+            for subject_id in subject_ids:
+                for period_id in graded_periods:
+                    if random_() >= args.grade_ratio:
+                        continue
+                    # Marks from 5 to 20 in quarter points
+                    interro = int(20 + random_() * 61) / 4
+                    devoir = int(20 + random_() * 61) / 4
+                    compo = int(20 + random_() * 61) / 4
+                    writer.add(db_models.Grade, {
+                        "id": ids(), "student_id": student_id, "subject_id": subject_id, "period_id": period_id,
+                        "interro_avg": interro, "devoir_avg": devoir, "compo_grade": compo,
+                        # Stored like app.services.results.set_period_avg does
+                        "period_avg": round(interro * INTERRO_WEIGHT + devoir * DEVOIR_WEIGHT + compo * COMPO_WEIGHT, 2),
+                    })
+    writer.flush()
+    return {"class_ids": class_ids, "subject_ids": subject_ids, "year_id": year_id, "graded_periods": graded_periods}
+
+
+def add_test_accounts(db: Session, first: dict):
+    for account in TEST_ACCOUNTS:
+        user = db.query(db_models.User).filter(db_models.User.email == account["email"]).first()
+        if user is None:
+            user = db_models.User(**account)
+            db.add(user)
             db.flush()
+            print(f"  Created user: {account['email']}")
+        if not account["can_generate_bulletins"] and first:
+            exists = db.query(db_models.TeacherAssignment.id).filter_by(user_id=user.id).first()
+            if not exists:
+                db.add(db_models.TeacherAssignment(user_id=user.id, class_id=first["class_ids"][0],
+                                                   subject_id=first["subject_ids"][0], academic_year_id=first["year_id"]))
 
-            teachers = []
-            for _ in range(8):
-                t_user = db_models.User(
-                    name=f"Prof. {fake.last_name()}",
-                    email=fake.unique.email(),
-                )
-                db.add(t_user)
-                db.flush()
-                teachers.append(t_user)
-            
-            for t in teachers:
-                my_classes = random.sample(classes, 2)
-                my_subject = random.choice(subjects)
-                for c in my_classes:
-                    assign = db_models.TeacherAssignment(
-                        user_id=t.id,
-                        class_id=c.id,
-                        subject_id=my_subject.id,
-                        academic_year_id=year.id
-                    )
-                    db.add(assign)
-
-            print(f"  Generating 1000 students for {school_info['name']}...")
-            for cls_idx, cls in enumerate(classes):
-                students_per_class = 100
-                for _ in range(students_per_class):
-                    gender = random.choice(['M', 'F'])
-                    first_name = fake.first_name_male() if gender == 'M' else fake.first_name_female()
-                    
-                    student = db_models.Student(
-                        first_name=first_name,
-                        last_name=fake.last_name(),
-                        birth_date=fake.date_of_birth(minimum_age=10, maximum_age=18),
-                        gender=gender,
-                        address=fake.address(),
-                        establishment_id=establishment.id,
-                        registration_number=f"MAT-{fake.unique.random_number(digits=6)}",
-                        parent_name=fake.name(),
-                        parent_phone=fake.phone_number(),
-                        parent_email=fake.email()
-                    )
-                    db.add(student)
-                    db.flush()
-
-                    enroll = db_models.StudentEnrollment(
-                        student_id=student.id,
-                        class_id=cls.id,
-                        academic_year_id=year.id
-                    )
-                    db.add(enroll)
-
-                    if random.random() < 0.5:
-                        my_subjects = random.sample(subjects, k=random.randint(3, 8))
-                        for sub in my_subjects:
-                            grade = db_models.Grade(
-                                student_id=student.id,
-                                subject_id=sub.id,
-                                period_id=current_period.id,
-                                interro_avg=round(random.uniform(5, 20), 2),
-                                devoir_avg=round(random.uniform(5, 20), 2),
-                                compo_grade=round(random.uniform(5, 20), 2)
-                            )
-                            db.add(grade)
-                
-                print(f"    Class {cls.name} done.")
-            
+
+def materialize_results(db: Session, created: list):
+    # Imported here: only needed with --results
+    from app.services.results import rebuild_class_results
+    for establishment in created:
+        for period_id in establishment["graded_periods"]:
+            for class_id in establishment["class_ids"]:
+                rebuild_class_results(db, class_id, period_id)
+        db.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=sorted(SCALES), default="demo", help="preset, the options below override it")
+    parser.add_argument("--establishments", type=int)
+    parser.add_argument("--classes", type=int, help="classes per establishment")
+    parser.add_argument("--students", type=int, help="students per class")
+    parser.add_argument("--subjects", type=int, help="subjects per establishment")
+    parser.add_argument("--periods", type=int, help="periods per academic year")
+    parser.add_argument("--graded-periods", type=int, help="periods with grades, from the first one")
+    parser.add_argument("--grade-ratio", type=float, help="share of (student, subject, period) graded")
+    parser.add_argument("--classes-per-teacher", type=int, default=5)
+    parser.add_argument("--batch-size", type=int, default=5000, help="rows per INSERT")
+    parser.add_argument("--seed", type=int, help="random seed, for a reproducible dataset")
+    parser.add_argument("--results", action="store_true", help="also build the averages and ranks (period_results)")
+    parser.add_argument("--no-test-accounts", action="store_true")
+    parser.add_argument("--database-url", default=DATABASE_URL)
+    args = parser.parse_args()
+    for key, value in SCALES[args.scale].items():
+        if getattr(args, key) is None:
+            setattr(args, key, value)
+    args.graded_periods = min(args.graded_periods, args.periods)
+
+    engine = create_db_engine(args.database_url)
+    migrations.upgrade(engine)
+
+    rng = random.Random(args.seed)
+    ids = Ids(rng)
+    run_tag = f"{rng.getrandbits(24):06x}"
+    students = args.establishments * args.classes * args.students
+    print(f"Seeding {args.establishments} establishments x {args.classes} classes x {args.students} students "
+          f"({students:,} students), {args.subjects} subjects, {args.graded_periods}/{args.periods} periods graded "
+          f"at {args.grade_ratio:.0%}")
+
+    start = time.perf_counter()
+    created = []
+    with Session(engine) as db:
+        writer = BulkWriter(db, args.batch_size)
+        for index in range(args.establishments):
+            created.append(seed_establishment(writer, rng, ids, run_tag, index, args))
+            db.commit()
+            print(f"  establishment {index + 1}/{args.establishments} done ({time.perf_counter() - start:.1f}s)")
+        if not args.no_test_accounts:
+            add_test_accounts(db, created[0] if created else None)
             db.commit()
-        
-        print("Data seeding completed successfully!")
-    
-    except Exception as e:
-        print(f"An error occurred: {e}")
-        import traceback
-        traceback.print_exc()
+        elapsed = time.perf_counter() - start
+        for name, count in writer.counts.items():
+            print(f"  {name:20} {count:>10,} rows")
+        total = sum(writer.counts.values())
+        print(f"Inserted {total:,} rows in {elapsed:.1f}s ({total / elapsed:,.0f} rows/s)")
+
+        if args.results:
+            start = time.perf_counter()
+            materialize_results(db, created)
+            print(f"Built class results in {time.perf_counter() - start:.1f}s")
+    engine.dispose()
+
 
 if __name__ == "__main__":
-    seed_data()
+    main()
@@ -1,5 +1,6 @@
 from sqlalchemy.orm import Session
-from app.core.database import SessionLocal, engine, Base
+from app.core.database import SessionLocal, engine
+from app.core import migrations
 from app.models import db_models
 from datetime import date
 
@@ -7,7 +8,7 @@ def seed():
     db = SessionLocal()
     
     # Create tables if they don't exist
-    Base.metadata.create_all(bind=engine)
+    migrations.upgrade(engine)
     
     # Check if data already exists
     if db.query(db_models.Role).first():
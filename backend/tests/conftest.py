@@ -0,0 +1,81 @@
+"""
+Tests run against the app on a scratch SQLite database, migrated by the
+app's own startup; the bulletin caches and job artifacts go to a scratch
+directory too. Each test seeds its own school (see `school`), so tests
+don't depend on each other's rows.
+"""
+import os
+import shutil
+import tempfile
+import uuid
+from datetime import date
+from types import SimpleNamespace
+
+import pytest
+
+# Must be set before the app (and its engines) are imported
+_workdir = tempfile.mkdtemp(prefix="edumanager_tests_")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_workdir, 'test.db')}"
+os.environ["BULLETIN_CACHE_DIR"] = os.path.join(_workdir, "pdf_cache")
+os.environ["BULLETIN_STORAGE_DIR"] = os.path.join(_workdir, "bulletins")
+os.environ["PDF_WORKERS"] = "1"
+
+
+@pytest.fixture(scope="session")
+def app():
+    from app.main import app
+    yield app
+    shutil.rmtree(_workdir, ignore_errors=True)
+
+
+@pytest.fixture(scope="session")
+def client(app):
+    from fastapi.testclient import TestClient
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def db(app):
+    from app.core.database import SessionLocal
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def school(db):
+    """
+    Factory of a school: one class of `students` enrolled students, one
+    subject and one period. Matricules are unique across tests.
+    """
+    from app.models import db_models
+
+    def make(students=3):
+        tag = uuid.uuid4().hex[:8]
+        establishment = db_models.Establishment(name=f"Lycée {tag}", type="LYCEE")
+        db.add(establishment)
+        db.flush()
+        year = db_models.AcademicYear(label="2025-2026", is_active=True, establishment_id=establishment.id)
+        db.add(year)
+        db.flush()
+        cls = db_models.Class(name=f"6e A {tag}", academic_year_id=year.id, establishment_id=establishment.id)
+        subject = db_models.Subject(name=f"Maths {tag}", coefficient=2, establishment_id=establishment.id)
+        period = db_models.Period(name="Trimestre 1", academic_year_id=year.id)
+        db.add_all([cls, subject, period])
+        db.flush()
+        pupils = []
+        for i in range(students):
+            student = db_models.Student(
+                first_name=f"Prénom {i}", last_name=f"Nom {i}", birth_date=date(2012, 1, 1 + i),
+                gender="MF"[i % 2], registration_number=f"M{tag}{i:03d}", establishment_id=establishment.id,
+            )
+            db.add(student)
+            db.flush()
+            db.add(db_models.StudentEnrollment(student_id=student.id, class_id=cls.id, academic_year_id=year.id))
+            pupils.append(student)
+        db.commit()
+        return SimpleNamespace(establishment=establishment, year=year, cls=cls, subject=subject,
+                               period=period, students=pupils)
+
+    return make
@@ -0,0 +1,22 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.services import pdf_pool
+from tests.test_pdf_generator import GRADES, SCHOOL_INFO, STUDENT
+
+
+def test_shutdown_stops_the_pdf_pool(app):
+    with TestClient(app) as client:
+        assert client.get("/").status_code == 200
+        pdf_pool.get_executor()
+    assert pdf_pool._executor is None
+
+
+def test_pdf_workers_are_not_forked_from_the_api_process(app):
+    try:
+        pdf = asyncio.run(pdf_pool.render_report_card(STUDENT, GRADES, SCHOOL_INFO))
+        assert pdf.startswith(b"%PDF")
+        assert pdf_pool._executor._mp_context.get_start_method() in ("forkserver", "spawn")
+    finally:
+        pdf_pool.shutdown()
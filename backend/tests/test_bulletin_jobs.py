@@ -0,0 +1,77 @@
+import asyncio
+import json
+import logging
+import os
+import subprocess
+import sys
+import uuid
+import zipfile
+from types import SimpleNamespace
+
+import pytest
+
+from app.services import bulletin_jobs
+
+
+def test_render_failures_are_logged_and_recorded_on_the_job(app, monkeypatch, caplog):
+    students = [SimpleNamespace(id="s1", registration_number="M1"), SimpleNamespace(id="s2", registration_number="M2")]
+
+    async def render_class_bulletins(class_id, period_id, jobs):
+        yield students[0], b"%PDF-1.4"
+        yield students[1], RuntimeError("layout overflow")
+
+    monkeypatch.setattr(bulletin_jobs, "_collect_render_jobs", lambda job: [("c1", "", [None, None])])
+    monkeypatch.setattr(bulletin_jobs, "render_class_bulletins", render_class_bulletins)
+    monkeypatch.setattr(bulletin_jobs, "_semaphore", asyncio.Semaphore(1))
+
+    job = bulletin_jobs.BulletinJob("class", "T1", ["c1"], "c1")
+    with caplog.at_level(logging.ERROR, logger="edumanager.bulletin_jobs"):
+        asyncio.run(bulletin_jobs._run(job))
+
+    assert (job.status, job.done, job.failed) == (bulletin_jobs.DONE, 1, 1)
+    assert job.failures == [{"student_id": "s2", "registration_number": "M2", "error": "layout overflow"}]
+    assert "s2" in caplog.text and "layout overflow" in caplog.text
+    with zipfile.ZipFile(job.artifact_path) as archive:
+        assert archive.namelist() == ["bulletin_M1.pdf"]
+    # Kept in the metadata, so a restarted worker still reports them
+    assert bulletin_jobs.BulletinJob.load(job.id).failures == job.failures
+
+
+def saved_job(owner):
+    job = bulletin_jobs.BulletinJob("class", "T1", ["c1"], "c1")
+    job.status = bulletin_jobs.RUNNING
+    job.owner = owner
+    job.save()
+    return job
+
+
+def test_jobs_of_live_workers_stay_running(app):
+    # Another worker of this host, e.g. the one the load balancer sent the submit to
+    job = saved_job(dict(bulletin_jobs.OWNER, pid=os.getppid(), instance="other"))
+
+    assert bulletin_jobs.get_job(job.id).status == bulletin_jobs.RUNNING
+    # Nor can a worker of another host be checked
+    job = saved_job(dict(bulletin_jobs.OWNER, host="elsewhere", pid=1))
+    assert bulletin_jobs.get_job(job.id).status == bulletin_jobs.RUNNING
+
+
+def test_jobs_of_gone_workers_are_interrupted(app):
+    finished = subprocess.Popen([sys.executable, "-c", "pass"])
+    finished.wait()
+    owners = [
+        dict(bulletin_jobs.OWNER, pid=finished.pid, instance="other"),
+        dict(bulletin_jobs.OWNER, instance="before-restart"),  # same pid, previous process
+        None,  # written before owners were recorded
+    ]
+    for owner in owners:
+        job = saved_job(owner)
+        loaded = bulletin_jobs.get_job(job.id)
+        assert (loaded.status, loaded.error) == (bulletin_jobs.FAILED, "Interrupted by a server restart")
+        with open(job.metadata_path) as f:
+            assert json.load(f)["status"] == bulletin_jobs.FAILED
+
+
+@pytest.mark.parametrize("job_id", ["../../etc/passwd", "..", "not-a-uuid", str(uuid.uuid4()).upper()])
+def test_job_ids_must_be_uuids(client, job_id):
+    assert bulletin_jobs.get_job(job_id) is None
+    assert client.get(f"/api/bulletins/jobs/{job_id}/download").status_code == 404
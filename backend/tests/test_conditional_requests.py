@@ -0,0 +1,61 @@
+from app.models import db_models
+from app.services.stats import establishment_stats
+
+
+def grade_all(db, s):
+    for student in s.students:
+        db.add(db_models.Grade(student_id=student.id, subject_id=s.subject.id, period_id=s.period.id,
+                               interro_avg=12, devoir_avg=13, compo_grade=14, period_avg=13.25))
+    db.commit()
+
+
+def test_list_etag_answers_304_until_the_data_changes(client, school, db):
+    s = school(students=2)
+    params = {"class_id": s.cls.id}
+    first = client.get("/api/students/", params=params)
+    tag = first.headers["ETag"]
+
+    assert client.get("/api/students/", params=params, headers={"If-None-Match": tag}).status_code == 304
+
+    s.students[0].first_name = "Renamed"
+    db.commit()
+    changed = client.get("/api/students/", params=params, headers={"If-None-Match": tag})
+    assert changed.status_code == 200 and changed.headers["ETag"] != tag
+
+
+def test_stats_cache_entry_follows_the_data_version(client, school, db):
+    s = school(students=2)
+    params = {"establishment_id": s.establishment.id}
+    first = client.get("/api/establishments/stats", params=params)
+    assert first.json()["totalStudents"] == 2
+
+    # Written by "another process": nothing invalidates this process's cache
+    db.add(db_models.Student(first_name="Nouvel", last_name="Élève", establishment_id=s.establishment.id))
+    db.commit()
+    second = client.get("/api/establishments/stats", params=params, headers={"If-None-Match": first.headers["ETag"]})
+
+    assert second.status_code == 200
+    assert second.headers["ETag"] != first.headers["ETag"]
+    assert second.json()["totalStudents"] == 3
+
+
+def test_bulletin_zip_is_not_recompressed(client, school, db):
+    s = school(students=2)
+    grade_all(db, s)
+
+    response = client.get(f"/api/bulletins/download-bulk/{s.cls.id}", params={"period_id": s.period.id},
+                          headers={"Accept-Encoding": "gzip, br"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-zip-compressed"
+    assert "content-encoding" not in response.headers
+    assert response.content[:2] == b"PK"
+
+
+def test_json_is_compressed(client, school):
+    s = school(students=20)
+    response = client.get("/api/students/", params={"class_id": s.cls.id}, headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["ETag"].endswith('-gzip"')
+    assert len(response.json()) == 20
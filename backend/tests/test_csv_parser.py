@@ -0,0 +1,32 @@
+import io
+
+import pytest
+
+from app.services.csv_parser import CSVParser
+
+
+def records(content: bytes):
+    return list(CSVParser.iter_grades_csv(io.BytesIO(content)))
+
+
+def test_marks_are_clamped_and_blank_cells_are_none():
+    rows = records(b"matricule,name,interro,devoir,compo\nM1,A,25,-3,\nM2,B,12.5,,7\n")
+    assert [(r.matricule, r.interro, r.devoir, r.compo, r.error) for r in rows] == [
+        ("M1", 20.0, 0.0, None, None),
+        ("M2", 12.5, None, 7.0, None),
+    ]
+
+
+def test_semicolon_delimiter_and_decimal_commas():
+    rows = records("﻿Matricule;Name;Interro;Devoir;Compo\r\nM1;Élève;12,5;10;8,25\r\n".encode())
+    assert (rows[0].matricule, rows[0].name, rows[0].interro, rows[0].compo) == ("M1", "Élève", 12.5, 8.25)
+
+
+def test_invalid_mark_flags_the_row():
+    row, = records(b"matricule,name,interro,devoir,compo\nM1,A,abc,1,1\n")
+    assert row.error == "Invalid interro: 'abc'"
+
+
+def test_missing_column_fails_on_the_header():
+    with pytest.raises(ValueError, match="compo"):
+        CSVParser.iter_grades_csv(io.BytesIO(b"matricule,name,interro,devoir\n"))
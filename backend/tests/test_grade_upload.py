@@ -0,0 +1,114 @@
+import pytest
+
+from app.models import db_models
+
+
+def upload(client, school, content: bytes, name="notes.csv"):
+    return client.post(
+        "/api/grades/upload",
+        params={"class_id": school.cls.id, "period_id": school.period.id, "subject_id": school.subject.id},
+        files={"file": (name, content, "text/csv")},
+    )
+
+
+def grades_by_matricule(db, school):
+    rows = db.query(db_models.Student.registration_number, db_models.Grade).join(
+        db_models.Grade, db_models.Grade.student_id == db_models.Student.id
+    ).filter(db_models.Grade.period_id == school.period.id).all()
+    return {matricule: grade for matricule, grade in rows}
+
+
+def sheet(*rows):
+    return ("matricule,name,interro,devoir,compo\n" + "".join(f"{','.join(map(str, r))}\n" for r in rows)).encode()
+
+
+def test_upload_inserts_then_updates_in_one_pass(client, db, school):
+    s = school(students=3)
+    a, b, c = (st.registration_number for st in s.students)
+
+    response = upload(client, s, sheet((a, "A", 10, 12, 14), (b, "B", 8, 9, 10), (c, "C", 15, 15, 15)))
+    assert response.status_code == 200
+    report = response.json()
+    assert (report["received"], report["inserted"], report["updated"], report["errors"]) == (3, 3, 0, [])
+
+    response = upload(client, s, sheet((a, "A", 11, 12, 14)))
+    assert (response.json()["inserted"], response.json()["updated"]) == (0, 1)
+    db.expire_all()
+    assert float(grades_by_matricule(db, s)[a].interro_avg) == 11
+
+
+def test_upload_reports_bad_rows_and_keeps_the_good_ones(client, db, school):
+    s = school(students=2)
+    a, b = (st.registration_number for st in s.students)
+
+    report = upload(client, s, sheet((a, "A", 10, 10, 10), ("UNKNOWN", "X", 1, 1, 1), (a, "A", 5, 5, 5),
+                                     (b, "B", "abc", 1, 1), ("", "Y", 1, 1, 1))).json()
+    assert report["inserted"] == 1
+    assert [(e["row"], e["error"]) for e in report["errors"]] == [
+        (3, "Student not enrolled in this class"),
+        (4, "Duplicate matricule in file"),
+        (5, "Invalid interro: 'abc'"),
+        (6, "Missing matricule"),
+    ]
+    assert set(grades_by_matricule(db, s)) == {a}
+
+
+def test_upload_refreshes_period_results(client, db, school):
+    s = school(students=2)
+    a, b = (st.registration_number for st in s.students)
+
+    upload(client, s, sheet((a, "A", 10, 10, 10), (b, "B", 16, 16, 16)))
+    results = {r.student_id: r for r in db.query(db_models.PeriodResult).filter_by(class_id=s.cls.id)}
+    assert results[s.students[1].id].rank == 1
+    assert results[s.students[0].id].rank == 2
+
+
+def test_upload_rejects_missing_columns_and_other_files(client, school):
+    s = school(students=1)
+    assert upload(client, s, b"matricule,name,interro\nX,Y,1\n").status_code == 400
+    assert upload(client, s, sheet(), name="notes.xlsx").status_code == 400
+
+
+def test_blank_cells_keep_the_stored_marks(client, db, school):
+    s = school(students=2)
+    a, b = (st.registration_number for st in s.students)
+    upload(client, s, sheet((a, "A", 10, 12, 14), (b, "B", 8, 9, 10)))
+
+    # Second sheet only carries the composition marks
+    report = upload(client, s, sheet((a, "A", "", "", 16), (b, "B", "", "", ""))).json()
+    assert report["updated"] == 2
+    db.expire_all()
+    grades = grades_by_matricule(db, s)
+    assert [float(v) for v in (grades[a].interro_avg, grades[a].devoir_avg, grades[a].compo_grade)] == [10, 12, 16]
+    assert [float(v) for v in (grades[b].interro_avg, grades[b].devoir_avg, grades[b].compo_grade)] == [8, 9, 10]
+    # The average is recomputed from the merged marks
+    from app.services.ranking import subject_average
+    assert float(grades[a].period_avg) == round(subject_average(10, 12, 16), 2)
+
+
+@pytest.mark.parametrize("bad_row", [
+    b"\xff\xfe,x,1,1,1\n",  # not UTF-8
+    b'M1,"' + b"x" * 200_000 + b"\n",  # unclosed quote, larger than the csv field limit
+], ids=["encoding", "csv"])
+def test_unreadable_rows_past_the_header_are_a_client_error(client, school, bad_row):
+    s = school(students=1)
+    # Past the first read chunk, so the error is raised while rows are ingested
+    filler = b"".join(b"NOPE%06d,X,1,1,1\n" % i for i in range(5000))
+    response = upload(client, s, sheet() + filler + bad_row)
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("Invalid CSV file")
+
+
+def test_one_row_reupload_changes_the_grade_list_etag(client, school):
+    s = school(students=2)
+    a, b = (st.registration_number for st in s.students)
+    assert upload(client, s, sheet((a, "A", 10, 12, 14), (b, "B", 8, 9, 10))).status_code == 200
+    params = {"class_id": s.cls.id, "period_id": s.period.id}
+    tag = client.get("/api/grades/", params=params).headers["ETag"]
+
+    assert upload(client, s, sheet((a, "A", 18, 18, 18))).status_code == 200
+    response = client.get("/api/grades/", params=params, headers={"If-None-Match": tag})
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] != tag
+    assert 18 in [float(row["compo_grade"]) for row in response.json()]
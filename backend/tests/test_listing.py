@@ -0,0 +1,69 @@
+import uuid
+
+import pytest
+
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.models import db_models
+
+
+def all_pages(client, url, **params):
+    rows, cursor = [], None
+    while True:
+        response = client.get(url, params={**params, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        rows += response.json()
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if not cursor:
+            return rows
+
+
+@pytest.mark.parametrize("sort", ["registration_number", "-registration_number"])
+def test_pages_step_over_null_sort_values(client, school, db, sort):
+    s = school(students=6)
+    for student in s.students[1::2]:
+        student.registration_number = None
+    db.commit()
+
+    whole = client.get("/api/students/", params={"class_id": s.cls.id, "sort": sort}).json()
+    for limit in (1, 2, 4):
+        paged = all_pages(client, "/api/students/", class_id=s.cls.id, sort=sort, limit=limit)
+        assert [row["id"] for row in paged] == [row["id"] for row in whole]
+
+    numbers = [row["registration_number"] for row in whole]
+    nulls = [None] * 3
+    if sort.startswith("-"):
+        assert numbers == sorted(numbers[:3], reverse=True) + nulls
+    else:
+        assert numbers == nulls + sorted(numbers[3:])
+
+
+def test_search_matches_wildcards_literally(client, school, db):
+    s = school(students=3)
+    s.students[0].last_name = "Dupont_Marie"
+    s.students[1].last_name = "Dupont%Marie"
+    s.students[2].last_name = "DupontXMarie"
+    db.commit()
+
+    def search(q):
+        rows = client.get("/api/students/", params={"class_id": s.cls.id, "q": q}).json()
+        return sorted(row["last_name"] for row in rows)
+
+    assert search("t_m") == ["Dupont_Marie"]
+    assert search("%") == ["Dupont%Marie"]
+    assert search("dupont") == ["Dupont%Marie", "DupontXMarie", "Dupont_Marie"]
+
+
+@pytest.mark.parametrize("flags, role", [
+    ({}, "ENSEIGNANT"),
+    ({"can_generate_bulletins": True}, "PROVISEUR"),
+    ({"is_super_admin": True, "can_generate_bulletins": True}, "SUPER_ADMIN"),
+])
+def test_login_role(client, db, flags, role):
+    email = f"{uuid.uuid4().hex[:8]}@example.com"
+    db.add(db_models.User(name="Test", email=email, **flags))
+    db.commit()
+
+    response = client.post("/api/auth/login", json={"email": email, "password": "password123"})
+
+    assert response.status_code == 200
+    assert response.json()["role"] == role
@@ -0,0 +1,17 @@
+from app.core import metrics
+
+
+def test_metrics_are_off_without_a_token(client):
+    assert client.get("/metrics").status_code == 404
+
+
+def test_metrics_need_the_scrape_token(client, monkeypatch):
+    monkeypatch.setattr(metrics, "TOKEN", "s3cret")
+    monkeypatch.setattr(metrics, "ENABLED", True)
+
+    assert client.get("/metrics").status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert client.get("/metrics", headers={"Authorization": "Basic s3cret"}).status_code == 401
+    response = client.get("/metrics", headers={"Authorization": "Bearer s3cret"})
+    assert response.status_code == 200
+    assert "# TYPE http_requests_total counter" in response.text
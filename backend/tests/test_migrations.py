@@ -0,0 +1,46 @@
+from sqlalchemy import inspect, text
+
+from app.core import migrations
+from app.core.database import Base, create_db_engine
+from app.models import db_models  # noqa: F401
+
+
+def fresh_engine(tmp_path):
+    return create_db_engine(f"sqlite:///{tmp_path / 'migrations.db'}")
+
+
+def test_migrated_schema_matches_the_models(tmp_path):
+    engine = fresh_engine(tmp_path)
+    applied = migrations.upgrade(engine, log=lambda message: None)
+    assert [m.version for m in applied] == [m.version for m in migrations.load_migrations()]
+
+    inspector = inspect(engine)
+    for table in Base.metadata.sorted_tables:
+        columns = {c["name"] for c in inspector.get_columns(table.name)}
+        assert set(table.columns.keys()) <= columns, table.name
+        indexes = {i["name"] for i in inspector.get_indexes(table.name)}
+        assert {i.name for i in table.indexes} <= indexes, table.name
+    assert migrations.upgrade(engine) == []
+    engine.dispose()
+
+
+def test_duplicate_grades_are_reported_through_the_runner_log(tmp_path):
+    engine = fresh_engine(tmp_path)
+    migrations.migrations_table.create(engine)
+    before_dedupe = [m for m in migrations.load_migrations() if m.version < 4]
+    for migration in before_dedupe:
+        migrations._apply(engine, migration, log=lambda message: None)
+    with engine.begin() as conn:
+        for i, updated_at in enumerate(["2025-01-01", "2025-02-01", "2025-03-01"]):
+            conn.execute(text(
+                "INSERT INTO grades (id, student_id, subject_id, period_id, compo_grade, updated_at) "
+                "VALUES (:id, 's1', 'm1', 'p1', :grade, :updated_at)"
+            ), {"id": f"g{i}", "grade": 10 + i, "updated_at": updated_at})
+
+    messages = []
+    migrations.upgrade(engine, log=messages.append)
+
+    assert "Removed 2 duplicate grade rows" in messages
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT id FROM grades")).scalars().all() == ["g2"]
+    engine.dispose()
@@ -0,0 +1,74 @@
+import pytest
+
+from app.core import pagination
+from app.models import db_models
+
+
+def pages(client, url, **params):
+    """Follows X-Next-Cursor from the first page to the last, returns the pages."""
+    result = []
+    cursor = None
+    while True:
+        response = client.get(url, params={**params, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        result.append(response.json())
+        cursor = response.headers.get(pagination.NEXT_CURSOR_HEADER)
+        if not cursor:
+            return result
+
+
+@pytest.fixture
+def graded_school(school, db):
+    s = school(students=5)
+    for i, student in enumerate(s.students):
+        db.add(db_models.Grade(student_id=student.id, subject_id=s.subject.id, period_id=s.period.id,
+                               interro_avg=10 + i, devoir_avg=10, compo_grade=10, period_avg=10))
+    db.commit()
+    return s
+
+
+def test_lists_are_whole_without_limit_or_cursor(client, graded_school, monkeypatch):
+    monkeypatch.setattr(pagination, "DEFAULT_PAGE_SIZE", 2)
+    s = graded_school
+
+    students = client.get("/api/students/", params={"class_id": s.cls.id})
+    grades = client.get("/api/grades/", params={"class_id": s.cls.id})
+
+    assert len(students.json()) == 5 and pagination.NEXT_CURSOR_HEADER not in students.headers
+    assert len(grades.json()) == 5 and pagination.NEXT_CURSOR_HEADER not in grades.headers
+
+
+@pytest.mark.parametrize("sort", ["last_name", "-registration_number", "id"])
+def test_student_pages_cover_the_class_once(client, graded_school, sort):
+    s = graded_school
+    whole = client.get("/api/students/", params={"class_id": s.cls.id, "sort": sort}).json()
+
+    result = pages(client, "/api/students/", class_id=s.cls.id, sort=sort, limit=2)
+
+    assert [len(page) for page in result] == [2, 2, 1]
+    assert [row["id"] for page in result for row in page] == [row["id"] for row in whole]
+
+
+def test_grade_pages_cover_the_class_once(client, graded_school):
+    s = graded_school
+
+    result = pages(client, "/api/grades/", class_id=s.cls.id, limit=2, compact=True)
+
+    ids = [row["id"] for page in result for row in page]
+    assert len(ids) == 5 and ids == sorted(ids)
+
+
+def test_cursor_without_limit_gets_a_default_page(client, graded_school, monkeypatch):
+    monkeypatch.setattr(pagination, "DEFAULT_PAGE_SIZE", 2)
+    s = graded_school
+    first = client.get("/api/grades/", params={"class_id": s.cls.id, "limit": 1})
+
+    second = client.get("/api/grades/", params={"class_id": s.cls.id,
+                                                 "cursor": first.headers[pagination.NEXT_CURSOR_HEADER]})
+
+    assert len(second.json()) == 2 and pagination.NEXT_CURSOR_HEADER in second.headers
+
+
+def test_invalid_limit_and_cursor(client):
+    assert client.get("/api/grades/", params={"limit": 0}).status_code == 400
+    assert client.get("/api/grades/", params={"cursor": "not-a-cursor"}).status_code == 400
@@ -0,0 +1,86 @@
+import os
+
+import pytest
+
+from app.services.pdf_cache import PDFCache, pdf_cache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return PDFCache(str(tmp_path / "cache"), max_bytes=1024)
+
+
+def test_put_get_and_invalidate_one_scope(cache):
+    cache.put("c1", "T1", "k", b"pdf 1")
+    cache.put("c2", "T1", "k", b"pdf 2")
+    assert cache.get("c1", "T1", "k") == b"pdf 1"
+    assert cache.get("c1", "T2", "k") is None
+
+    cache.invalidate("c1", "T1")
+    assert cache.get("c1", "T1", "k") is None
+    assert cache.get("c2", "T1", "k") == b"pdf 2"
+
+
+@pytest.mark.parametrize("class_id, period_id", [
+    ("c1", "../../outside"),
+    ("..", ".."),
+    ("c1", "/tmp"),
+    ("../..", ""),
+])
+def test_request_ids_never_leave_the_cache_directory(cache, tmp_path, class_id, period_id):
+    sibling = tmp_path / "outside"
+    sibling.mkdir()
+    (sibling / "keep.txt").write_text("not a cache file")
+
+    cache.put(class_id, period_id, "k", b"pdf")
+    assert cache.get(class_id, period_id, "k") == b"pdf"
+    for root, _, files in os.walk(tmp_path):
+        for name in files:
+            path = os.path.join(root, name)
+            assert path == str(sibling / "keep.txt") or path.startswith(cache.directory + os.sep)
+
+    cache.invalidate(class_id, period_id)
+    assert (sibling / "keep.txt").exists()
+    assert os.path.isdir(cache.directory)
+
+
+def test_least_recently_used_pdfs_are_evicted(cache):
+    cache.put("c1", "T1", "a", b"a" * 400)
+    cache.put("c1", "T1", "b", b"b" * 400)
+    cache.get("c1", "T1", "a")
+    cache.put("c1", "T1", "c", b"c" * 400)
+    assert cache.get("c1", "T1", "b") is None
+    assert cache.get("c1", "T1", "a") is not None
+    assert cache.get("c1", "T1", "c") is not None
+
+
+def test_saving_a_grade_drops_the_cached_bulletins_of_the_class(client, school):
+    s = school(students=2)
+    for student in s.students:
+        client.post("/api/grades/", json={
+            "student_id": student.id, "subject_id": s.subject.id, "period_id": s.period.id,
+            "interro_avg": 12, "devoir_avg": 13, "compo_grade": 14,
+        })
+
+    response = client.get(f"/api/bulletins/download-single/{s.students[0].id}", params={"period_id": s.period.id})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/pdf"
+    scope_dir = pdf_cache._scope_dir(s.cls.id, s.period.id)
+    assert len(os.listdir(scope_dir)) == 1
+
+    client.post("/api/grades/", json={
+        "student_id": s.students[1].id, "subject_id": s.subject.id, "period_id": s.period.id,
+        "interro_avg": 2, "devoir_avg": 3, "compo_grade": 4,
+    })
+    assert not os.path.exists(scope_dir)
+
+
+def test_workers_sharing_the_directory_keep_it_bounded(tmp_path):
+    directory = str(tmp_path / "cache")
+    workers = [PDFCache(directory, max_bytes=4096) for _ in range(3)]
+    for i in range(60):
+        for n, worker in enumerate(workers):
+            worker.put(f"c{n}", "T1", f"k{i}", bytes(100))
+
+    total = sum(os.path.getsize(os.path.join(root, name)) for root, _, files in os.walk(directory) for name in files)
+    assert total <= 4096 + len(workers) * workers[0].rescan_bytes
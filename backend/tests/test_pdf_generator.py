@@ -0,0 +1,21 @@
+from reportlab import rl_config
+
+from app.services.pdf_generator import PDFGenerator
+
+SCHOOL_INFO = {'name': 'Lycée Test', 'address': 'Lomé', 'phone': '+228 00 00 00 00'}
+STUDENT = {'name': 'Élève 1', 'matricule': 'MAT-1', 'academic_year': '2025-2026', 'period': 'Trimestre 1',
+           'class': '6ème A', 'rank': '1er', 'general_avg': 12.5}
+GRADES = [{'subject': 'Mathématiques', 'coef': 2, 'interro': 12.0, 'devoir': 14.0, 'compo': 11.0,
+           'moyenne': 12.0, 'appreciation': 'Assez bien'}]
+
+
+def test_stream_encoding_is_per_generator():
+    default = rl_config.useA85
+    binary = PDFGenerator().generate_report_card(STUDENT, GRADES, SCHOOL_INFO)
+    ascii85 = PDFGenerator(ascii85=True).generate_report_card(STUDENT, GRADES, SCHOOL_INFO)
+    class_report = PDFGenerator().generate_class_report([(STUDENT, GRADES)] * 2, SCHOOL_INFO)
+
+    assert b"/ASCII85Decode" not in binary and b"/ASCII85Decode" not in class_report
+    assert b"/ASCII85Decode" in ascii85
+    # The process-wide setting other ReportLab users see is left alone
+    assert rl_config.useA85 == default
@@ -0,0 +1,51 @@
+from sqlalchemy import select
+
+from app.core.data_versions import versions
+from app.models import db_models
+
+
+def version(db, name):
+    db.rollback()  # fresh snapshot
+    return db.execute(select(versions.c.version).where(versions.c.name == name)).scalar()
+
+
+def add_grades(db, s, period_avg):
+    for i, student in enumerate(s.students):
+        db.add(db_models.Grade(student_id=student.id, subject_id=s.subject.id, period_id=s.period.id,
+                               interro_avg=10 + i, devoir_avg=10 + i, compo_grade=10 + i,
+                               period_avg=(10 + i) if period_avg else None))
+    db.commit()
+
+
+def test_reads_of_an_ungraded_class_write_nothing(client, school, db):
+    s = school(students=2)
+    before = version(db, "grades"), version(db, "period_results")
+
+    for _ in range(3):
+        assert client.get(f"/api/bulletins/ranking/{s.cls.id}", params={"period_id": s.period.id}).json() == []
+    client.get(f"/api/bulletins/download-single/{s.students[0].id}", params={"period_id": s.period.id})
+    client.get(f"/api/bulletins/download-bulk/{s.cls.id}", params={"period_id": s.period.id})
+
+    assert (version(db, "grades"), version(db, "period_results")) == before
+
+
+def test_first_read_backfills_legacy_grades(client, school, db):
+    s = school(students=2)
+    add_grades(db, s, period_avg=False)
+
+    ranking = client.get(f"/api/bulletins/ranking/{s.cls.id}", params={"period_id": s.period.id}).json()
+
+    assert [row["rank"] for row in ranking] == [1, 2]
+    db.rollback()
+    assert all(g.period_avg is not None for g in db.query(db_models.Grade).filter_by(period_id=s.period.id))
+
+
+def test_materializing_leaves_complete_grades_alone(client, school, db):
+    s = school(students=2)
+    add_grades(db, s, period_avg=True)
+    grades_version = version(db, "grades")
+
+    ranking = client.get(f"/api/bulletins/ranking/{s.cls.id}", params={"period_id": s.period.id}).json()
+
+    assert len(ranking) == 2
+    assert version(db, "grades") == grades_version
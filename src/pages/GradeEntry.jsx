@@ -134,7 +134,7 @@ const GradeEntry = ({ user }) => {
                 const studentsRes = await api.get(`/students?class_id=${selectedAssignment.class_id}`);
 
                 // Fetch existing grades for this class/subject/period
-                const gradesRes = await api.get(`/grades?subject_id=${selectedAssignment.subject_id}&period_id=${selectedPeriod}`);
+                const gradesRes = await api.get(`/grades?class_id=${selectedAssignment.class_id}&subject_id=${selectedAssignment.subject_id}&period_id=${selectedPeriod}`);
                 const gradesMap = {};
                 gradesRes.data.forEach(g => {
                     gradesMap[g.student_id] = {